@@ -3,22 +3,20 @@
 
 import os
 import argparse
-from typing import Tuple, Iterable
+from typing import Tuple, Iterable, Iterator, Optional
 
 import pandas as pd
 
-# Headless backend so it works in CI/terminal
-import matplotlib
-matplotlib.use("Agg")
-import matplotlib.pyplot as plt
-import matplotlib.dates as mdates
+from storage import is_store, read_store
+from tickfile import is_tickfile, read_ticks
+from csv_index import CsvIndex
+from bars import load_bars, bars_to_prices
+from indicator_cache import IndicatorCache
+import metrics
+from instrument import add_cli_flags, cli_session, timed
 
-# Candles are optional (we'll warn if missing)
-try:
-    import mplfinance as mpf  # type: ignore
-    HAS_MPF = True
-except Exception:
-    HAS_MPF = False
+# No matplotlib/mplfinance here: charts live in plotting.py and are loaded on first
+# use (see __getattr__ below), so data/indicator users start fast.
 
 
 # --------- Core Loading & Validation ---------
@@ -30,31 +28,116 @@ def resolve_path(path: str) -> str:
     base = os.path.dirname(os.path.abspath(__file__))
     return os.path.join(base, path)
 
-def load_prices(csv_path: str = "crypto_prices.csv") -> pd.DataFrame:
-    """Load CSV and parse timestamp."""
-    path = resolve_path(csv_path)
-    if not os.path.exists(path):
-        raise FileNotFoundError(
-            f"CSV not found at {path}. "
-            f"Tip: run price_tracker.py first or pass --csv /full/path.csv"
-        )
-    df = pd.read_csv(path)
+REQUIRED_COLS = ("BTC_USDT", "ETH_USDT")
+PRICE_DTYPES = {c: "float64" for c in REQUIRED_COLS}
+TS_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+@timed("parse")
+def parse_timestamps(s: pd.Series) -> pd.Series:
+    """Fast fixed-format parse (logger format); other formats fall back to the flexible parser."""
+    if pd.api.types.is_datetime64_any_dtype(s):
+        return s
+    ts = pd.to_datetime(s, format=TS_FORMAT, errors="coerce")
+    bad = ts.isna() & s.notna()
+    if bad.any():
+        ts[bad] = pd.to_datetime(s[bad], format="mixed", errors="coerce")
+    return ts
+
+def _clean_prices(df: pd.DataFrame, path: str) -> pd.DataFrame:
+    """Validate columns, parse timestamps, drop malformed rows, sort only if needed."""
     if "timestamp" not in df.columns:
         raise ValueError(f"'timestamp' column missing in {path}. Columns: {list(df.columns)}")
     # Parse timestamp
-    df["timestamp"] = pd.to_datetime(df["timestamp"], errors="coerce")
+    df["timestamp"] = parse_timestamps(df["timestamp"])
     # Basic required columns
-    for col in ("BTC_USDT", "ETH_USDT"):
+    for col in REQUIRED_COLS:
         if col not in df.columns:
             raise ValueError(f"Required column '{col}' missing. Columns present: {list(df.columns)}")
-    # Drop completely malformed rows
-    df = df.dropna(subset=["timestamp", "BTC_USDT", "ETH_USDT"])
-    # Sort by time just in case
-    df = df.sort_values("timestamp").reset_index(drop=True)
+    # Drop completely malformed rows (skip the copy when there are none)
+    subset = ["timestamp", *REQUIRED_COLS]
+    if df[subset].isna().to_numpy().any():
+        df = df.dropna(subset=subset)
+    # Sort by time just in case (the logger appends in order, so usually a no-op)
+    if not df["timestamp"].is_monotonic_increasing:
+        df = df.sort_values("timestamp", kind="stable")
+    if not isinstance(df.index, pd.RangeIndex) or df.index.start != 0 or df.index.step != 1:
+        df = df.reset_index(drop=True)
+    return df
+
+@timed("load")
+def load_prices(csv_path: str = "crypto_prices.csv", start=None, end=None,
+                last_n: Optional[int] = None) -> pd.DataFrame:
+    """
+    Load CSV and parse timestamp.
+    csv_path may also be a columnar store directory (see storage.py); then only the
+    partitions overlapping [start, end] are read. start/end are inclusive bounds.
+    A tick file (see tickfile.py) is read as a snapshot copy of its ring.
+    For a plain CSV, start/end/last_n seek through the byte-offset index next to it
+    (csv_index.py, built or brought up to date on the way) and parse only those rows.
+    last_n keeps the last N rows after the time filter.
+    """
+    path = resolve_path(csv_path)
+    if not os.path.exists(path):
+        raise FileNotFoundError(
+            f"CSV not found at {path}. "
+            f"Tip: run price_tracker.py first or pass --csv /full/path.csv"
+        )
+    if os.path.isdir(path) and is_store(path):
+        df = read_store(path, start=start, end=end)
+    elif is_tickfile(path):
+        df = read_ticks(path, copy=True)
+    else:
+        df = _read_csv_range(path, start, end, last_n)
+    df = _clean_prices(df, path)
+    if start is not None or end is not None:
+        keep = pd.Series(True, index=df.index)
+        if start is not None:
+            keep &= df["timestamp"] >= pd.Timestamp(start)
+        if end is not None:
+            keep &= df["timestamp"] <= pd.Timestamp(end)
+        df = df[keep].reset_index(drop=True)
+    if last_n is not None and last_n > 0:
+        df = df.tail(last_n).reset_index(drop=True)
     if len(df) == 0:
         raise ValueError("CSV loaded but after cleaning there are 0 rows. Need some data to plot.")
     return df
 
+def _read_csv_range(path: str, start=None, end=None, last_n: Optional[int] = None) -> pd.DataFrame:
+    """Raw CSV rows for load_prices: only the indexed byte range when a bound is given."""
+    if start is None and end is None and not (last_n and last_n > 0):
+        return pd.read_csv(path, dtype=PRICE_DTYPES)
+    try:
+        idx = CsvIndex(path).update()
+    except OSError as e:  # e.g. read-only directory: no sidecar, plain scan
+        print(f"⚠️ No index for {path} ({e}); reading the whole file")
+        return pd.read_csv(path, dtype=PRICE_DTYPES)
+    if not idx.sorted:
+        return pd.read_csv(path, dtype=PRICE_DTYPES)
+    return idx.read(start, end, last_n if last_n and last_n > 0 else None, dtype=PRICE_DTYPES)
+
+def iter_prices(csv_path: str = "crypto_prices.csv", chunksize: int = 500_000) -> Iterator[pd.DataFrame]:
+    """
+    Stream the CSV as validated, typed chunks (same cleaning as load_prices), so
+    peak memory is bounded by chunksize rather than the file size.
+    Each chunk is time-sorted; across chunks the logger's append order is trusted
+    (a warning is printed if a chunk starts before the previous one ended).
+    """
+    path = resolve_path(csv_path)
+    if not os.path.exists(path):
+        raise FileNotFoundError(
+            f"CSV not found at {path}. "
+            f"Tip: run price_tracker.py first or pass --csv /full/path.csv"
+        )
+    last = None
+    for chunk in pd.read_csv(path, dtype=PRICE_DTYPES, chunksize=chunksize):
+        chunk = _clean_prices(chunk, path)
+        if len(chunk) == 0:
+            continue
+        if last is not None and chunk["timestamp"].iloc[0] < last:
+            print(f"⚠️ {path}: rows out of order across chunks near {last}")
+        last = chunk["timestamp"].iloc[-1]
+        yield chunk
+
 def basic_stats(df: pd.DataFrame) -> dict:
     return {
         "BTC_USDT": {
@@ -71,12 +154,14 @@ def basic_stats(df: pd.DataFrame) -> dict:
 
 
 # --------- Indicators ---------
+@timed("indicator.sma")
 def add_sma(df: pd.DataFrame, col="BTC_USDT", windows: Iterable[int] = (5, 20)) -> pd.DataFrame:
     out = df.copy()
     for w in windows:
         out[f"SMA_{w}"] = out[col].rolling(window=w, min_periods=1).mean()
     return out
 
+@timed("indicator.rsi")
 def add_rsi(df: pd.DataFrame, col="BTC_USDT", period: int = 14) -> pd.DataFrame:
     out = df.copy()
     if len(out) < 2:
@@ -93,82 +178,34 @@ def add_rsi(df: pd.DataFrame, col="BTC_USDT", period: int = 14) -> pd.DataFrame:
     return out
 
 
-# --------- Plotting ---------
-def _ensure_dir(out_file: str) -> None:
-    d = os.path.dirname(str(out_file)) or "."
-    os.makedirs(d, exist_ok=True)
-
-def _format_time_axis(ax):
-    ax.xaxis.set_major_formatter(mdates.DateFormatter("%H:%M\n%d-%b"))
-    ax.xaxis.set_major_locator(mdates.AutoDateLocator(minticks=3, maxticks=8))
-    plt.setp(ax.get_xticklabels(), rotation=0, ha="center")
-
-def plot_price_with_mas(df: pd.DataFrame, out_file: str = "charts/day3_price_ma.png") -> str:
-    _ensure_dir(out_file)
-    fig, ax = plt.subplots(figsize=(11, 6))
-    ax.plot(df["timestamp"], df["BTC_USDT"], label="BTC", linewidth=1.2)
-    for w in (5, 20):
-        col = f"SMA_{w}"
-        if col in df.columns:
-            ax.plot(df["timestamp"], df[col], label=col, linewidth=1.0)
-    ax.set_title("BTC/USDT with SMA(5, 20)")
-    ax.set_xlabel("Time")
-    ax.set_ylabel("Price (USDT)")
-    ax.legend()
-    _format_time_axis(ax)
-    fig.tight_layout()
-    fig.savefig(out_file)
-    plt.close(fig)
-    return out_file
-
-def plot_rsi(df: pd.DataFrame, out_file: str = "charts/day3_rsi.png", period: int = 14) -> str:
-    _ensure_dir(out_file)
-    rsi_col = f"RSI_{period}"
-    if rsi_col not in df.columns:
-        raise ValueError(f"{rsi_col} not found. Did you run add_rsi(period={period})?")
-    fig, ax = plt.subplots(figsize=(11, 3))
-    ax.plot(df["timestamp"], df[rsi_col], label=rsi_col, linewidth=1.2)
-    ax.axhline(70, linestyle="--")
-    ax.axhline(30, linestyle="--")
-    ax.set_ylim(0, 100)
-    ax.set_title(f"RSI({period})")
-    ax.set_xlabel("Time")
-    ax.set_ylabel("RSI")
-    _format_time_axis(ax)
-    fig.tight_layout()
-    fig.savefig(out_file)
-    plt.close(fig)
-    return out_file
-
-# Day-2 compatibility wrappers (so old tests still pass)
-def plot_prices(df: pd.DataFrame, output_file: str = "charts/day2_line.png") -> str:
-    _ensure_dir(output_file)
-    fig, ax = plt.subplots(figsize=(10, 5))
-    ax.plot(df["timestamp"], df["BTC_USDT"], label="BTC", linewidth=1.2)
-    ax.plot(df["timestamp"], df["ETH_USDT"], label="ETH", linewidth=1.2)
-    ax.set_xlabel("Time")
-    ax.set_ylabel("Price (USDT)")
-    ax.set_title("BTC vs ETH over time")
-    ax.legend()
-    _format_time_axis(ax)
-    fig.tight_layout()
-    fig.savefig(output_file)
-    plt.close(fig)
-    return output_file
-
-def plot_candles(df: pd.DataFrame, output_file: str = "charts/day2_btc_candles.png") -> str:
-    if not HAS_MPF:
-        raise RuntimeError("mplfinance is required for plot_candles; install with: pip install mplfinance")
-    _ensure_dir(output_file)
-    ohlc = df[["timestamp", "BTC_USDT"]].copy()
-    ohlc = ohlc.rename(columns={"BTC_USDT": "Close"})
-    # Mock OHLC from close-only stream
-    ohlc["Open"] = ohlc["Close"]
-    ohlc["High"] = ohlc["Close"]
-    ohlc["Low"]  = ohlc["Close"]
-    ohlc = ohlc.set_index("timestamp")
-    mpf.plot(ohlc, type="candle", style="charles", savefig=output_file)
-    return output_file
+# --------- Plotting (loaded on first use) ---------
+_PLOTTING = ("plot_price_with_mas", "plot_rsi", "plot_prices", "plot_candles", "HAS_MPF")
+
+def __getattr__(name: str):
+    """analysis.plot_* and HAS_MPF import plotting.py (and matplotlib) only when first asked for."""
+    if name in _PLOTTING:
+        import plotting
+        return getattr(plotting, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# --------- Metrics ---------
+# Kept for existing callers; the single-pass implementations live in metrics.py.
+def calculate_drawdown(equity: pd.Series) -> dict:
+    """
+    Returns dict with:
+      - max_drawdown: minimum of equity / running_peak - 1 (<= 0)
+      - dd_series: drawdown series (same length as equity)
+    """
+    res = metrics.drawdown(equity)
+    return {"max_drawdown": res["max_drawdown"], "dd_series": pd.Series(res["dd_series"], dtype=float)}
+
+def calculate_sharpe(returns: pd.Series, periods_per_year: float = 252.0, risk_free: float = 0.0) -> float:
+    """
+    Sharpe = (mean(excess) / std) * sqrt(periods_per_year)
+    - Return NaN if series is empty, constant, non-finite, or std ~ 0.
+    """
+    return metrics.sharpe(returns, periods_per_year, risk_free)
 
 
 # --------- CLI & Self-Check ---------
@@ -179,8 +216,14 @@ def parse_args() -> argparse.Namespace:
     p.add_argument("--sma", default="5,20", help="SMA windows, comma-separated (default: 5,20)")
     p.add_argument("--rsi", type=int, default=14, help="RSI period (default: 14)")
     p.add_argument("--limit", type=int, default=0, help="Use only last N rows (0 = all)")
+    p.add_argument("--start", default=None, help="First timestamp to load, e.g. '2025-01-01 12:00'")
+    p.add_argument("--end", default=None, help="Last timestamp to load (inclusive)")
     p.add_argument("--no-candles", action="store_true", help="Skip candlestick chart")
+    p.add_argument("--bars", default="", help="Work on cached OHLC bars of this interval (e.g. 1m, 5m, 1h, 1d)")
+    p.add_argument("--cache-dir", default="", help="On-disk indicator cache directory, e.g. .indicators (default: off)")
+    p.add_argument("--no-downsample", action="store_true", help="Plot every row instead of fitting to the chart width")
     p.add_argument("--selfcheck", action="store_true", help="Run environment/CSV checks and exit")
+    add_cli_flags(p)
     return p.parse_args()
 
 def selfcheck(csv: str) -> None:
@@ -197,6 +240,7 @@ def selfcheck(csv: str) -> None:
             print("  Dtypes:\n", df.dtypes)
         except Exception as e:
             print("  Failed to load CSV:", e)
+    from plotting import HAS_MPF
     print("  mplfinance installed:", HAS_MPF)
 
 def main():
@@ -204,25 +248,56 @@ def main():
     if args.selfcheck:
         selfcheck(args.csv)
         return
-
-    df = load_prices(args.csv)
-    if args.limit and args.limit > 0:
-        df = df.tail(args.limit).reset_index(drop=True)
+    with cli_session(args, "analysis"):
+        _run(args)
+
+def _run(args: argparse.Namespace) -> None:
+    """The analysis pipeline behind main(): load, indicators, charts, stats."""
+
+    bars = None
+    if args.bars:
+        # Bars are cached next to the CSV; only newly logged ticks get parsed
+        path = resolve_path(args.csv)
+        bars = {c: load_bars(path, args.bars, c) for c in ("BTC_USDT", "ETH_USDT")}
+        df = bars_to_prices(bars).dropna().reset_index(drop=True)
+        if args.start or args.end:
+            keep = pd.Series(True, index=df.index)
+            if args.start:
+                keep &= df["timestamp"] >= pd.Timestamp(args.start)
+            if args.end:
+                keep &= df["timestamp"] <= pd.Timestamp(args.end)
+            df = df[keep].reset_index(drop=True)
+        if args.limit and args.limit > 0:
+            df = df.tail(args.limit).reset_index(drop=True)
+    else:
+        # start/end/limit seek through the CSV's byte-offset index instead of a full parse
+        df = load_prices(args.csv, start=args.start, end=args.end, last_n=args.limit or None)
 
     # Indicators
     windows = tuple(int(w.strip()) for w in args.sma.split(",") if w.strip())
-    df = add_sma(df, "BTC_USDT", windows=windows)
-    df = add_rsi(df, "BTC_USDT", period=args.rsi)
+    if args.cache_dir:
+        # Unchanged data -> cached series; a grown log only computes the new rows
+        cache = IndicatorCache(disk_dir=resolve_path(args.cache_dir))
+        df = cache.add_sma(df, "BTC_USDT", windows=windows)
+        df = cache.add_rsi(df, "BTC_USDT", period=args.rsi)
+    else:
+        df = add_sma(df, "BTC_USDT", windows=windows)
+        df = add_rsi(df, "BTC_USDT", period=args.rsi)
 
     # Plots
+    from plotting import plot_price_with_mas, plot_rsi, plot_candles
     out_price = os.path.join(args.outdir, "day3_price_ma.png")
     out_rsi   = os.path.join(args.outdir, "day3_rsi.png")
-    plot_price_with_mas(df, out_price)
-    plot_rsi(df, out_rsi, period=args.rsi)
+    downsample = False if args.no_downsample else None
+    plot_price_with_mas(df, out_price, downsample=downsample)
+    plot_rsi(df, out_rsi, period=args.rsi, downsample=downsample)
 
     if not args.no_candles:
         try:
-            plot_candles(df, os.path.join(args.outdir, "day2_btc_candles.png"))
+            candles = bars["BTC_USDT"] if bars is not None else df
+            if bars is not None and (args.limit or args.start or args.end):
+                candles = candles[candles["timestamp"].isin(df["timestamp"])]
+            plot_candles(candles, os.path.join(args.outdir, "day2_btc_candles.png"))
         except Exception as e:
             print("⚠️ Skipping candles:", e)
 
@@ -233,71 +308,3 @@ def main():
 
 if __name__ == "__main__":
     main()
-
-# ---------------- Metrics (Day 5) ----------------
-import math
-import numpy as np
-import pandas as pd
-
-def calculate_drawdown(equity: pd.Series) -> dict:
-    """
-    Returns dict with:
-      - max_drawdown: minimum of equity / running_peak - 1 (<= 0)
-      - dd_series: drawdown series (same length as equity)
-    """
-    if len(equity) == 0:
-        return {"max_drawdown": 0.0, "dd_series": pd.Series([], dtype=float)}
-    equity = pd.Series(equity).astype(float).reset_index(drop=True)
-    peak = equity.cummax()
-    dd = equity / peak - 1.0
-    return {"max_drawdown": float(dd.min()), "dd_series": dd}
-
-def calculate_sharpe(returns: pd.Series, periods_per_year: float = 252.0, risk_free: float = 0.0) -> float:
-    """
-    Simple Sharpe = (mean(returns) - rf) / std(returns) * sqrt(periods_per_year)
-    If std == 0 (constant returns), returns NaN to avoid divide-by-zero.
-    """
-    r = pd.Series(returns).astype(float).dropna()
-    if len(r) == 0:
-        return float("nan")
-    excess = r - risk_free / periods_per_year
-    mu = excess.mean()
-    sigma = excess.std(ddof=1)
-    if sigma == 0 or math.isclose(sigma, 0.0):
-        return float("nan")
-    return float(mu / sigma * math.sqrt(periods_per_year))
-# -------------------------------------------------
-
-# --- Hotfix: robust Sharpe against zero/tiny std and constant series ---
-import numpy as np  # safe to import again
-
-def calculate_sharpe(
-    returns: pd.Series,
-    periods_per_year: float = 252.0,
-    risk_free: float = 0.0
-) -> float:
-    """
-    Sharpe = (mean(excess) / std) * sqrt(periods_per_year)
-    - Return NaN if series is empty, constant, non-finite, or std ~ 0.
-    """
-    r = pd.Series(returns, dtype="float64").dropna()
-    if len(r) == 0:
-        return float("nan")
-    # If all returns are the same, volatility is effectively zero
-    if r.nunique(dropna=True) <= 1:
-        return float("nan")
-
-    # Remove any non-finite values defensively
-    r = r[np.isfinite(r.values)]
-    if len(r) == 0:
-        return float("nan")
-
-    excess = r - (risk_free / periods_per_year)
-    mu = float(excess.mean())
-    sigma = float(excess.std(ddof=1))
-
-    EPS = 1e-9  # treat tiny std as zero to avoid astronomical Sharpe
-    if not math.isfinite(sigma) or abs(sigma) < EPS:
-        return float("nan")
-
-    return float(mu / sigma * math.sqrt(periods_per_year))
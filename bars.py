@@ -0,0 +1,251 @@
+# bars.py
+# Real OHLC bars from the close-only tick log.
+#
+# - resample_ohlc: batch tick -> bar conversion for any interval (1m/5m/1h/1d/...).
+# - BarAggregator: incremental version; only the latest (open) bar changes per tick.
+# - load_bars: disk-cached bars. Finished bars are stored next to the CSV together
+#   with the byte offset already consumed, so later calls only parse the new tail.
+#   The meta also records the CSV's inode and the bytes just before that offset;
+#   if either changes (rotated or rewritten log), the cache is rebuilt.
+
+import os
+import io
+import json
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+BAR_COLUMNS = ["timestamp", "Open", "High", "Low", "Close", "Ticks"]
+TS_FORMAT = "%Y-%m-%d %H:%M:%S"
+_UNITS = {"s": "s", "m": "min", "h": "h", "d": "D"}
+PROBE_BYTES = 64
+READ_BYTES = 64 * 1024 * 1024  # CSV tail is parsed this much at a time
+
+
+def interval_ns(interval: str) -> int:
+    """'1m' / '5m' / '1h' / '1d' (or any pandas offset alias) -> bar size in ns."""
+    unit = interval[-1:].lower()
+    if interval[:-1].isdigit() and unit in _UNITS:
+        interval = interval[:-1] + _UNITS[unit]
+    step = pd.Timedelta(pd.tseries.frequencies.to_offset(interval)).value
+    if step <= 0:
+        raise ValueError(f"Bar interval must be positive, got {interval!r}")
+    return int(step)
+
+
+def _empty_bars() -> pd.DataFrame:
+    cols = {c: np.empty(0, dtype="float64") for c in BAR_COLUMNS}
+    cols["timestamp"] = np.empty(0, dtype="datetime64[ns]")
+    cols["Ticks"] = np.empty(0, dtype="int64")
+    return pd.DataFrame(cols)
+
+
+def _bars_from_arrays(ts_ns: np.ndarray, price: np.ndarray, step: int) -> pd.DataFrame:
+    """Aggregate ticks (int64 ns, float64) into OHLC bars; ticks are time-sorted first."""
+    ok = np.isfinite(price)
+    ts_ns, price = ts_ns[ok], price[ok]
+    if len(ts_ns) == 0:
+        return _empty_bars()
+    if np.any(ts_ns[1:] < ts_ns[:-1]):
+        order = np.argsort(ts_ns, kind="stable")
+        ts_ns, price = ts_ns[order], price[order]
+    bucket = ts_ns - ts_ns % step
+    starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+    ends = np.r_[starts[1:], len(bucket)] - 1
+    return pd.DataFrame({
+        "timestamp": bucket[starts].view("datetime64[ns]"),
+        "Open": price[starts],
+        "High": np.maximum.reduceat(price, starts),
+        "Low": np.minimum.reduceat(price, starts),
+        "Close": price[ends],
+        "Ticks": np.diff(np.r_[starts, len(bucket)]),
+    })
+
+
+def resample_ohlc(df: pd.DataFrame, col: str = "BTC_USDT", interval: str = "1m") -> pd.DataFrame:
+    """OHLC bars of `col` (bars labelled by their start time; empty buckets are skipped)."""
+    data = df[["timestamp", col]].dropna()
+    ts = pd.to_datetime(data["timestamp"]).to_numpy(dtype="datetime64[ns]").view("int64")
+    return _bars_from_arrays(ts, data[col].to_numpy(dtype="float64"), interval_ns(interval))
+
+
+def bars_to_prices(bars: dict) -> pd.DataFrame:
+    """{col: bars} -> DataFrame(timestamp, <col>=Close, ...) for the indicator/backtest code."""
+    out = None
+    for col, b in bars.items():
+        closes = b[["timestamp", "Close"]].rename(columns={"Close": col})
+        out = closes if out is None else out.merge(closes, on="timestamp", how="outer")
+    return out.sort_values("timestamp").reset_index(drop=True)
+
+
+class BarAggregator:
+    """Streaming OHLC: update() returns the bar that just closed (if any)."""
+
+    def __init__(self, interval: str = "1m"):
+        self.step = interval_ns(interval)
+        self.bar: Optional[dict] = None  # the open bar
+
+    def update(self, ts, price) -> Optional[dict]:
+        price = float(price)
+        if price != price:
+            return None
+        ts_ns = pd.Timestamp(ts).value
+        bucket = ts_ns - ts_ns % self.step
+        bar = self.bar
+        if bar is not None and bucket == bar["start"]:
+            bar["High"] = max(bar["High"], price)
+            bar["Low"] = min(bar["Low"], price)
+            bar["Close"] = price
+            bar["Ticks"] += 1
+            return None
+        if bar is not None and bucket < bar["start"]:
+            return None  # late tick for an already-closed bar
+        self.bar = {"start": bucket, "Open": price, "High": price, "Low": price, "Close": price, "Ticks": 1}
+        return _bar_row(bar) if bar is not None else None
+
+
+def _bar_row(bar: dict) -> dict:
+    row = {k: bar[k] for k in BAR_COLUMNS[1:]}
+    row["timestamp"] = pd.Timestamp(bar["start"])
+    return row
+
+
+# --------- Disk cache ---------
+def _cache_paths(csv_path: str, col: str, interval: str, cache_dir: Optional[str]):
+    d = cache_dir or os.path.join(os.path.dirname(os.path.abspath(csv_path)), ".bars")
+    stem = f"{os.path.basename(csv_path)}.{col}.{interval}"
+    return os.path.join(d, stem + ".csv"), os.path.join(d, stem + ".json")
+
+
+def _read_tail(csv_path: str, offset: int, header: Optional[list], limit: int):
+    """
+    Parse complete lines from byte `offset` on, about `limit` bytes of them.
+    Returns (frame, header, new_offset); new_offset == offset once nothing is left.
+    """
+    with open(csv_path, "rb") as f:
+        if offset == 0:
+            first = f.readline()
+            header = first.decode("utf-8").strip().split(",")
+            offset = len(first)
+        f.seek(offset)
+        chunk = f.read(limit)
+        if chunk and not chunk.endswith(b"\n"):
+            chunk += f.readline()  # finish the line the limit cut through
+    end = chunk.rfind(b"\n") + 1  # ignore a partially written last line
+    body = chunk[:end]
+    if not body.strip():
+        return pd.DataFrame(columns=header), header, offset + end
+    frame = pd.read_csv(io.BytesIO(body), names=header, header=None)
+    return frame, header, offset + end
+
+
+def _tick_bars(ticks: pd.DataFrame, col: str, step: int) -> pd.DataFrame:
+    if not len(ticks):
+        return _empty_bars()
+    ts = pd.to_datetime(ticks["timestamp"], format=TS_FORMAT, errors="coerce")
+    ok = ts.notna().to_numpy()
+    return _bars_from_arrays(
+        ts.to_numpy(dtype="datetime64[ns]").view("int64")[ok],
+        pd.to_numeric(ticks[col], errors="coerce").to_numpy(dtype="float64")[ok],
+        step,
+    )
+
+
+def _fold(open_bar: Optional[dict], new: pd.DataFrame):
+    """Merge new bars into the open one. Returns (finished bars, new open bar)."""
+    if open_bar is not None:
+        start = pd.Timestamp(open_bar["start"])
+        new = new[new["timestamp"] >= start]  # late ticks for closed bars are dropped
+        if len(new) and new["timestamp"].iloc[0] == start:
+            first = new.iloc[0]
+            merged = {"timestamp": start, "Open": open_bar["Open"],
+                      "High": max(open_bar["High"], first["High"]), "Low": min(open_bar["Low"], first["Low"]),
+                      "Close": first["Close"], "Ticks": open_bar["Ticks"] + int(first["Ticks"])}
+            new = pd.concat([pd.DataFrame([merged]), new.iloc[1:]], ignore_index=True)
+        else:
+            prev = {"timestamp": start, **{k: open_bar[k] for k in BAR_COLUMNS[1:]}}
+            new = pd.concat([pd.DataFrame([prev]), new], ignore_index=True)
+    if not len(new):
+        return new, open_bar
+    last = new.iloc[-1]
+    return new.iloc[:-1], {"start": str(last["timestamp"]), **{k: float(last[k]) for k in BAR_COLUMNS[1:5]},
+                           "Ticks": int(last["Ticks"])}
+
+
+def _identity(csv_path: str, offset: int) -> dict:
+    """Inode plus the bytes just before `offset`: changes when the CSV is replaced, not when it grows."""
+    with open(csv_path, "rb") as f:
+        f.seek(max(0, offset - PROBE_BYTES))
+        probe = f.read(min(offset, PROBE_BYTES)).decode("latin-1")
+        return {"inode": os.fstat(f.fileno()).st_ino, "probe": probe}
+
+
+def _replace_file(path: str, write) -> None:
+    """write(tmp_path), then move it over `path` in one step."""
+    tmp = path + ".tmp"
+    write(tmp)
+    os.replace(tmp, path)
+
+
+def load_bars(
+    csv_path: str,
+    interval: str = "1h",
+    col: str = "BTC_USDT",
+    cache_dir: Optional[str] = None,
+    include_open: bool = True,
+) -> pd.DataFrame:
+    """
+    OHLC bars for a logger CSV, using (and updating) an on-disk cache.
+    Finished bars are appended to <cache_dir>/<csv>.<col>.<interval>.csv; only the
+    part of the CSV written since the last call is parsed, READ_BYTES at a time.
+    If the CSV shrank or was replaced, the cache is rebuilt. The meta is replaced in
+    one step and records the bars file's length, so rows appended by an interrupted
+    call are cut off on the next one. include_open adds the still-open latest bar.
+    """
+    bars_path, meta_path = _cache_paths(csv_path, col, interval, cache_dir)
+    step = interval_ns(interval)
+    meta = None
+    if os.path.exists(meta_path) and os.path.exists(bars_path):
+        with open(meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+        if ("bars_bytes" not in meta or os.path.getsize(bars_path) < meta["bars_bytes"]
+                or os.path.getsize(csv_path) < meta["offset"]
+                or {k: meta.get(k) for k in ("inode", "probe")} != _identity(csv_path, meta["offset"])):
+            meta = None  # CSV was truncated/replaced, or the cache is damaged: rebuild
+
+    if meta is None:
+        os.makedirs(os.path.dirname(bars_path), exist_ok=True)
+        _replace_file(bars_path, lambda tmp: _empty_bars().to_csv(tmp, index=False))
+        closed = [_empty_bars()]
+        meta = {"offset": 0, "header": None, "open_bar": None}
+    else:
+        os.truncate(bars_path, meta["bars_bytes"])  # drop rows an interrupted call appended
+        closed = [pd.read_csv(bars_path, parse_dates=["timestamp"])]
+
+    offset, header, open_bar = meta["offset"], meta["header"], meta["open_bar"]
+    with open(bars_path, "a", encoding="utf-8", newline="") as out:
+        while True:
+            ticks, header, new_offset = _read_tail(csv_path, offset, header, READ_BYTES)
+            if new_offset == offset:
+                break
+            offset = new_offset
+            finished, open_bar = _fold(open_bar, _tick_bars(ticks, col, step))
+            if len(finished):
+                finished.to_csv(out, header=False, index=False, date_format=TS_FORMAT)
+                closed.append(finished)
+
+    meta = {"offset": offset, "header": header, "open_bar": open_bar,
+            "bars_bytes": os.path.getsize(bars_path), **_identity(csv_path, offset)}
+
+    def write_meta(tmp):
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+    _replace_file(meta_path, write_meta)
+
+    if include_open and open_bar is not None:
+        closed.append(pd.DataFrame([_bar_row(open_bar)])[BAR_COLUMNS])
+    parts = [c for c in closed if len(c)]
+    bars = pd.concat(parts, ignore_index=True) if parts else _empty_bars()
+    bars["Ticks"] = bars["Ticks"].astype("int64")
+    return bars
@@ -0,0 +1,71 @@
+# benchmarks/bench_csv_writer.py
+# Rows/sec of the CSV append path: legacy per-row DataFrame vs CsvWriter.
+# Usage: python benchmarks/bench_csv_writer.py [--rows 20000]
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from price_tracker import CsvWriter, append_row  # noqa: E402
+
+COLUMNS = ["timestamp", "BTC_USDT", "ETH_USDT"]
+
+
+def legacy_append_row(row: dict, path: str) -> None:
+    """The original append_row: one DataFrame + exists() + to_csv per row."""
+    df = pd.DataFrame([row], columns=COLUMNS)
+    df.to_csv(path, mode="a", header=not os.path.exists(path), index=False)
+
+
+def _rows(n: int):
+    for i in range(n):
+        yield {"timestamp": f"2025-09-01 00:{i // 60 % 60:02d}:{i % 60:02d}",
+               "BTC_USDT": 50000.0 + i * 0.01, "ETH_USDT": 3000.0 + i * 0.001}
+
+
+def bench(name, fn, n):
+    t0 = time.perf_counter()
+    fn(n)
+    dt = time.perf_counter() - t0
+    print(f"{name:<28} {n:>8} rows  {dt:8.3f}s  {n / dt:>12,.0f} rows/s")
+    return n / dt
+
+
+def main():
+    p = argparse.ArgumentParser(description="CSV append path micro-benchmark")
+    p.add_argument("--rows", type=int, default=20000)
+    args = p.parse_args()
+    n = args.rows
+
+    with tempfile.TemporaryDirectory() as d:
+        def legacy(n):
+            path = os.path.join(d, "legacy.csv")
+            for r in _rows(n):
+                legacy_append_row(r, path)
+
+        def per_row(n):
+            path = os.path.join(d, "per_row.csv")
+            for r in _rows(n):
+                append_row(r, path)
+
+        def buffered(fsync):
+            def run(n):
+                with CsvWriter(os.path.join(d, f"buf_{fsync}.csv"), COLUMNS, fsync=fsync) as w:
+                    for r in _rows(n):
+                        w.write(r)
+            return run
+
+        base = bench("legacy DataFrame.to_csv", legacy, min(n, 5000))
+        bench("append_row (open per row)", per_row, n)
+        for policy in ("never", "batch"):
+            rate = bench(f"CsvWriter fsync={policy}", buffered(policy), n)
+        print(f"speedup (CsvWriter batch vs legacy): {rate / base:,.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+# benchmarks/imports.py
+# Import-time guard: the compute modules must start without the plotting stack or
+# exchange clients, since sweep/report workers and live loops import them over and over.
+# Each module is imported in a fresh interpreter under `python -X importtime`.
+# Usage:
+#   python benchmarks/imports.py                          # table for CORE_MODULES
+#   python benchmarks/imports.py --modules strategy --budget-ms 600
+# Exits with status 1 when a module loads a HEAVY package or goes over the budget.
+
+import os
+import sys
+import argparse
+import subprocess
+from typing import Dict, List, Optional
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# Loaded on first use only (plotting.py, exchange factories)
+HEAVY = ("matplotlib", "mplfinance", "ccxt")
+CORE_MODULES = (
+    "analysis", "strategy", "execution", "metrics", "sweep", "portfolio", "paper_trader",
+    "price_tracker", "scheduler", "collector", "streaming", "indicator_cache", "storage",
+    "tickfile", "bars", "csv_index", "bootstrap", "service", "correlation",
+)
+
+
+def parse_importtime(stderr: str) -> Dict[str, int]:
+    """`-X importtime` output -> {module: cumulative microseconds}."""
+    out = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        try:
+            out[name.strip()] = int(cumulative)
+        except ValueError:  # the header line
+            continue
+    return out
+
+
+def import_profile(module: str, python: Optional[str] = None) -> dict:
+    """Import `module` in a fresh interpreter -> {module, ms, heavy: [packages loaded]}."""
+    proc = subprocess.run([python or sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          cwd=ROOT, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+    times = parse_importtime(proc.stderr)
+    return {"module": module, "ms": times.get(module, 0) / 1000.0,
+            "heavy": sorted(h for h in HEAVY if h in times)}
+
+
+def check(modules: List[str], budget_ms: Optional[float] = None) -> List[dict]:
+    """Profiles with a 'failed' flag (heavy package loaded, or slower than budget_ms)."""
+    rows = []
+    for m in modules:
+        r = import_profile(m)
+        r["failed"] = bool(r["heavy"]) or (budget_ms is not None and r["ms"] > budget_ms)
+        rows.append(r)
+    return rows
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Import-time check for the compute modules")
+    p.add_argument("--modules", default=",".join(CORE_MODULES), help="Modules to import, comma-separated")
+    p.add_argument("--budget-ms", type=float, default=None, help="Fail a module whose import takes longer")
+    return p.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    rows = check([m.strip() for m in args.modules.split(",") if m.strip()], args.budget_ms)
+    print(f"{'module':>16} {'import ms':>10}  heavy")
+    for r in rows:
+        flag = "  ❌" if r["failed"] else ""
+        print(f"{r['module']:>16} {r['ms']:>10.1f}  {','.join(r['heavy']) or '-'}{flag}")
+    return 1 if any(r["failed"] for r in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
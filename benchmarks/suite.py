@@ -0,0 +1,202 @@
+# benchmarks/suite.py
+# Timings for every pipeline stage on synthetic data, saved as JSON and checked
+# against a baseline.
+# Usage:
+#   python benchmarks/suite.py --rows 10000,1000000 --out benchmarks/results/latest.json
+#   python benchmarks/suite.py --rows 1000000 --save-baseline          # record benchmarks/baseline.json
+#   python benchmarks/suite.py --rows 1000000 --baseline benchmarks/baseline.json --threshold 0.2
+# Exits with status 1 when a stage is slower than baseline * (1 + threshold).
+
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import statistics
+import subprocess
+import tempfile
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+from analysis import (  # noqa: E402
+    load_prices, add_sma, add_rsi, calculate_sharpe, calculate_drawdown,
+    plot_price_with_mas, plot_rsi, plot_prices,
+)
+from strategy import prepare_indicators, generate_signals, backtest_long_only, plot_price_with_signals  # noqa: E402
+from price_tracker import CsvWriter  # noqa: E402
+from execution import ExecutionModel, FixedSlippage  # noqa: E402
+from benchmarks.synthetic import random_walk, symbols_for, write_csv  # noqa: E402
+
+DEFAULT_BASELINE = os.path.join(ROOT, "benchmarks", "baseline.json")
+PLOT_STAGES = ("plot_price_with_mas", "plot_rsi", "plot_prices", "plot_price_with_signals")
+
+
+def _csv_append(ctx: dict) -> None:
+    rows = ctx["append_rows"]
+    cols = list(rows[0])
+    with CsvWriter(os.path.join(ctx["tmp"], "append.csv"), cols, fsync="never") as w:
+        for r in rows:
+            w.write(r)
+
+
+# stage name -> fn(ctx); ctx holds the synthetic frame and its derived inputs
+STAGES: Dict[str, Callable[[dict], object]] = {
+    "load_prices": lambda ctx: load_prices(ctx["csv"]),
+    "add_sma": lambda ctx: add_sma(ctx["df"], windows=(5, 20)),
+    "add_rsi": lambda ctx: add_rsi(ctx["df"], period=14),
+    "generate_signals": lambda ctx: generate_signals(ctx["ind"]),
+    "backtest_long_only": lambda ctx: backtest_long_only(ctx["signals"]),
+    "backtest_execution": lambda ctx: backtest_long_only(ctx["signals"], execution=ctx["execution"]),
+    "calculate_sharpe": lambda ctx: calculate_sharpe(ctx["bt"]["strategy_ret"]),
+    "calculate_drawdown": lambda ctx: calculate_drawdown(ctx["bt"]["equity"]),
+    "plot_price_with_mas": lambda ctx: plot_price_with_mas(ctx["ind"], os.path.join(ctx["tmp"], "ma.png")),
+    "plot_rsi": lambda ctx: plot_rsi(ctx["ind"], os.path.join(ctx["tmp"], "rsi.png")),
+    "plot_prices": lambda ctx: plot_prices(ctx["df"], os.path.join(ctx["tmp"], "line.png")),
+    "plot_price_with_signals": lambda ctx: plot_price_with_signals(ctx["bt"], os.path.join(ctx["tmp"], "sig.png")),
+    "csv_append": _csv_append,
+}
+
+
+def _context(rows: int, symbols: int, seed: int, tmp: str, append_rows: int) -> dict:
+    cols = symbols_for(max(2, symbols))
+    csv = write_csv(os.path.join(tmp, f"prices_{rows}.csv"), rows, cols, seed)
+    df = random_walk(rows, cols, seed)
+    ind = prepare_indicators(df)
+    signals = generate_signals(ind)
+    sample = df.head(min(rows, append_rows))
+    sample = sample.assign(timestamp=sample["timestamp"].dt.strftime("%Y-%m-%d %H:%M:%S"))
+    execution = ExecutionModel(fill="next", latency=1, slippage=FixedSlippage(5), stop_loss=0.01, take_profit=0.02)
+    return {"csv": csv, "df": df, "ind": ind, "signals": signals, "bt": backtest_long_only(signals),
+            "execution": execution,
+            "tmp": tmp, "append_rows": sample.to_dict("records")}
+
+
+def run_suite(
+    rows: List[int],
+    stages: Optional[List[str]] = None,
+    symbols: int = 2,
+    seed: int = 0,
+    repeat: int = 3,
+    append_rows: int = 100_000,
+) -> List[dict]:
+    """Time each stage `repeat` times per row count -> [{stage, rows, min, median, repeat}]."""
+    stages = stages or list(STAGES)
+    unknown = [s for s in stages if s not in STAGES]
+    if unknown:
+        raise ValueError(f"Unknown stages {unknown}; choose from {list(STAGES)}")
+    results = []
+    for n in rows:
+        with tempfile.TemporaryDirectory() as tmp:
+            ctx = _context(n, symbols, seed, tmp, append_rows)
+            for name in stages:
+                times = []
+                for _ in range(repeat):
+                    t0 = time.perf_counter()
+                    STAGES[name](ctx)
+                    times.append(time.perf_counter() - t0)
+                results.append({"stage": name, "rows": n, "min": min(times),
+                                "median": statistics.median(times), "repeat": repeat})
+                print(f"{name:>24} {n:>11} {min(times):>10.4f}s", file=sys.stderr)
+    return results
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def environment() -> dict:
+    return {
+        "time": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": _git_commit(), "python": platform.python_version(), "platform": platform.platform(),
+        "cpus": os.cpu_count(), "numpy": np.__version__, "pandas": pd.__version__,
+    }
+
+
+def compare(results: List[dict], baseline: List[dict], threshold: float = 0.2,
+            min_delta: float = 0.005) -> List[dict]:
+    """
+    Match (stage, rows) against the baseline on best-of-repeat times.
+    A regression is slower than baseline * (1 + threshold) AND by more than
+    min_delta seconds (so sub-millisecond stages don't flap). Stages the baseline
+    has no entry for are listed with baseline/ratio None and never count as a regression.
+    """
+    base = {(r["stage"], r["rows"]): r for r in baseline}
+    out = []
+    for r in results:
+        b = base.get((r["stage"], r["rows"]))
+        if b is None:
+            out.append({"stage": r["stage"], "rows": r["rows"], "baseline": None, "current": r["min"],
+                        "ratio": None, "regression": False})
+            continue
+        ratio = r["min"] / b["min"] if b["min"] > 0 else float("inf")
+        out.append({"stage": r["stage"], "rows": r["rows"], "baseline": b["min"], "current": r["min"],
+                    "ratio": ratio,
+                    "regression": ratio > 1 + threshold and r["min"] - b["min"] > min_delta})
+    return out
+
+
+def _print_comparison(rows: List[dict]) -> None:
+    print(f"{'stage':>24} {'rows':>11} {'baseline s':>11} {'current s':>10} {'ratio':>7}")
+    for c in rows:
+        if c["baseline"] is None:
+            print(f"{c['stage']:>24} {c['rows']:>11} {'-':>11} {c['current']:>10.4f} {'-':>7}  ⚠️ no baseline")
+            continue
+        flag = "  ❌ regression" if c["regression"] else ""
+        print(f"{c['stage']:>24} {c['rows']:>11} {c['baseline']:>11.4f} {c['current']:>10.4f} "
+              f"{c['ratio']:>6.2f}x{flag}")
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Pipeline benchmark suite")
+    p.add_argument("--rows", default="10000,100000,1000000", help="Row counts, comma-separated (up to 1e8)")
+    p.add_argument("--symbols", type=int, default=2, help="Symbol columns in the synthetic data")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--repeat", type=int, default=3, help="Runs per stage; best-of is compared")
+    p.add_argument("--stages", default="", help=f"Subset of: {','.join(STAGES)}")
+    p.add_argument("--skip-plots", action="store_true", help="Leave out the plotting stages")
+    p.add_argument("--append-rows", type=int, default=100_000, help="Rows written by csv_append (capped at --rows)")
+    p.add_argument("--out", default="benchmarks/results/latest.json", help="Where to write the results JSON")
+    p.add_argument("--baseline", default="", help="Baseline JSON to compare against")
+    p.add_argument("--threshold", type=float, default=0.2, help="Allowed slowdown vs baseline (default: 0.2 = 20%%)")
+    p.add_argument("--save-baseline", nargs="?", const=DEFAULT_BASELINE, default=None,
+                   help=f"Also save the results as the baseline (default: {os.path.relpath(DEFAULT_BASELINE, ROOT)})")
+    return p.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    rows = [int(float(r)) for r in args.rows.split(",") if r.strip()]
+    stages = [s.strip() for s in args.stages.split(",") if s.strip()] or list(STAGES)
+    if args.skip_plots:
+        stages = [s for s in stages if s not in PLOT_STAGES]
+    results = run_suite(rows, stages, args.symbols, args.seed, args.repeat, args.append_rows)
+    doc = {"env": environment(), "params": {"symbols": args.symbols, "seed": args.seed}, "results": results}
+
+    for path in filter(None, [args.out, args.save_baseline]):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(doc, f, indent=1)
+        print(f"✅ Saved: {path}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        cmp = compare(results, baseline, args.threshold)
+        _print_comparison(cmp)
+        if any(c["regression"] for c in cmp):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,291 @@
+# bootstrap.py
+# Resampling robustness for backtest returns: confidence intervals for Sharpe,
+# max drawdown and final equity instead of one point estimate per history.
+#
+# - method="block": moving-block bootstrap. Each synthetic path has the original
+#   length and is stitched from random runs of `block` consecutive returns, which
+#   keeps short-range autocorrelation (volatility clusters, trade runs).
+# - method="offset": the real path started at a random bar (entry-timing luck),
+#   at most max_offset bars in.
+# Paths are never expanded bar by bar. Sharpe needs only sums of r and r^2, and
+# final equity / max drawdown only (sum, max prefix, min prefix, max drop) of
+# log(1 + r) per block. Those summaries are precomputed for every block start
+# (O(n log block)), and a resample is a (resamples x blocks) gather plus a scan.
+# Resamples are processed in chunks of bounded size, each with its own seed
+# spawned from `seed`, so results don't depend on n_jobs.
+
+import os
+import math
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from metrics import EPS
+
+METHODS = ("block", "offset")
+METRICS = ("sharpe", "max_drawdown", "final_equity")
+# Cap for the (resamples x blocks) gathers of one chunk
+MAX_CHUNK_BYTES = 64 * 1024 * 1024
+
+_SUMMARIES: Dict[str, np.ndarray] = {}
+
+
+# --------- Block summaries ---------
+def _combine(a: tuple, b: tuple) -> tuple:
+    """Summary of segment a followed by segment b: (total, max prefix, min prefix, max drop), log space."""
+    at, ahi, alo, add = a
+    bt, bhi, blo, bdd = b
+    return (at + bt, np.maximum(ahi, at + bhi), np.minimum(alo, at + blo),
+            np.maximum(np.maximum(add, bdd), ahi - (at + blo)))
+
+
+def _window_summaries(x: np.ndarray, length: int) -> tuple:
+    """Summaries of x[i:i+length] for every start i (binary lifting over powers of two)."""
+    level = (x, x, x, np.zeros_like(x))  # windows of 1 bar
+    size, out, out_len = 1, None, 0
+    while True:
+        if length & size:
+            if out is None:
+                out, out_len = level, size
+            else:
+                k = len(x) - out_len - size + 1
+                out = _combine(tuple(a[:k] for a in out), tuple(a[out_len:out_len + k] for a in level))
+                out_len += size
+        size *= 2
+        if size > length:
+            break
+        k = len(level[0]) - size // 2
+        level = _combine(tuple(a[:k] for a in level), tuple(a[size // 2:size // 2 + k] for a in level))
+    k = len(x) - length + 1
+    return tuple(np.ascontiguousarray(a[:k]) for a in out)
+
+
+def _prepare(r: np.ndarray, block: int) -> Dict[str, np.ndarray]:
+    """Per-start summaries for full blocks (and the shorter last block) of the centered returns."""
+    center = r.mean()
+    y = r - center  # keeps the sum-of-squares well conditioned
+    c1 = np.r_[0.0, np.cumsum(y)]
+    c2 = np.r_[0.0, np.cumsum(y * y)]
+    x = np.log1p(np.maximum(r, -1 + 1e-12))
+    out = {"center": np.array([center])}
+    n = len(r)
+    rem = n % block
+    for name, length in (("full", block), ("tail", rem)):
+        if length == 0 or n < block:
+            continue
+        t, hi, lo, dd = _window_summaries(x, length)
+        starts = np.arange(n - length + 1)
+        out.update({f"{name}_s1": c1[starts + length] - c1[starts], f"{name}_s2": c2[starts + length] - c2[starts],
+                    f"{name}_t": t, f"{name}_hi": hi, f"{name}_lo": lo, f"{name}_dd": dd})
+    return out
+
+
+def _init(summaries: Dict[str, np.ndarray]) -> None:
+    """Pool initializer: the per-start summaries, kept for the worker's lifetime."""
+    _SUMMARIES.clear()
+    _SUMMARIES.update(summaries)
+
+
+# --------- Resampling ---------
+def _path_metrics(n: int, s1, s2, t, hi, lo, dd, periods_per_year: float, center: float) -> dict:
+    """Metrics of paths given their blocks' summaries as (paths x blocks) arrays, blocks in order."""
+    level = np.cumsum(t, axis=1)
+    before = level - t  # log equity before each block
+    peak = np.maximum.accumulate(before + hi, axis=1)
+    drop = np.full_like(t, -np.inf)
+    drop[:, 1:] = peak[:, :-1] - (before[:, 1:] + lo[:, 1:])  # from an earlier block's peak
+    worst = np.maximum(dd.max(axis=1), drop.max(axis=1))
+    return {"sharpe": _sharpe(s1.sum(axis=1), s2.sum(axis=1), n, periods_per_year, center),
+            "max_drawdown": np.expm1(-worst), "final_equity": np.exp(level[:, -1])}
+
+
+def _sharpe(s1, s2, n, periods_per_year: float, center: float) -> np.ndarray:
+    """Sharpe (same conventions as metrics.sharpe) from sums of centered returns and their squares."""
+    s1, s2, n = np.asarray(s1, dtype="float64"), np.asarray(s2, dtype="float64"), np.asarray(n, dtype="float64")
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = s1 / n + center
+        std = np.sqrt(np.maximum(s2 - s1 * s1 / n, 0.0) / (n - 1))
+        out = mean / np.where(std < EPS, np.nan, std) * math.sqrt(periods_per_year)
+    return np.where(n >= 2, out, np.nan)
+
+
+def _block_starts(rng: np.random.Generator, m: int, n: int, block: int) -> np.ndarray:
+    """(m x blocks) random start bars; the last column starts the (shorter) tail block if any."""
+    n_full, rem = divmod(n, block)
+    starts = rng.integers(0, n - block + 1, size=(m, n_full + (rem > 0)))
+    if rem:
+        starts[:, -1] = rng.integers(0, n - rem + 1, size=m)
+    return starts
+
+
+def _chunk_seeds(seed: Optional[int], count: int) -> list:
+    return np.random.SeedSequence(seed).spawn(count)
+
+
+def _block_chunk(task: tuple, summaries: Optional[Dict[str, np.ndarray]] = None) -> dict:
+    """Metrics for one chunk of block-bootstrap resamples (summaries default to the worker's)."""
+    m, n, block, seed, periods_per_year = task
+    S = _SUMMARIES if summaries is None else summaries
+    starts = _block_starts(np.random.default_rng(seed), m, n, block)
+    full = starts[:, :n // block]
+    parts = {k: S[f"full_{k}"][full] for k in ("s1", "s2", "t", "hi", "lo", "dd")}
+    if n % block:
+        tail = starts[:, -1:]
+        parts = {k: np.concatenate([v, S[f"tail_{k}"][tail]], axis=1) for k, v in parts.items()}
+    return _path_metrics(n, periods_per_year=periods_per_year, center=float(S["center"][0]), **parts)
+
+
+def _offset_metrics(r: np.ndarray, offsets: np.ndarray, periods_per_year: float) -> dict:
+    """Metrics of r[k:] for every k in offsets (suffix scans, O(1) per resample)."""
+    n = len(r)
+    center = r.mean()
+    y = r - center
+    c1 = np.r_[0.0, np.cumsum(y)]
+    c2 = np.r_[0.0, np.cumsum(y * y)]
+    p = np.r_[0.0, np.cumsum(np.log1p(np.maximum(r, -1 + 1e-12)))]
+    rev_min = np.minimum.accumulate(p[1:][::-1])[::-1]  # min of p[j], j > k
+    drop = np.maximum.accumulate((p[1:] - rev_min)[::-1])[::-1]  # worst drop with its peak at bar >= k
+    count = n - offsets
+    return {"sharpe": _sharpe(c1[n] - c1[offsets], c2[n] - c2[offsets], count, periods_per_year, center),
+            "max_drawdown": np.expm1(-drop[offsets]), "final_equity": np.exp(p[n] - p[offsets])}
+
+
+def default_block(n: int) -> int:
+    """Block length ~ n^(1/3), the usual rule of thumb for moving-block bootstrap."""
+    return max(1, int(round(n ** (1 / 3))))
+
+
+def bootstrap(
+    returns,
+    n_resamples: int = 1000,
+    method: str = "block",
+    block: Optional[int] = None,
+    max_offset: Optional[int] = None,
+    seed: Optional[int] = None,
+    periods_per_year: float = 252.0,
+    chunk: Optional[int] = None,
+    n_jobs: Optional[int] = 1,
+) -> pd.DataFrame:
+    """
+    One row per synthetic path: sharpe, max_drawdown (<= 0), final_equity.
+    returns: per-bar strategy returns (non-finite values are dropped, as in metrics).
+    block: bars per block (default n^(1/3)); max_offset: latest start for
+    method="offset" (default half the series). chunk: resamples per chunk
+    (default: sized to MAX_CHUNK_BYTES). n_jobs=1 runs in-process; None uses
+    one worker per CPU. The same seed (and chunk) gives the same samples.
+    """
+    if method not in METHODS:
+        raise ValueError(f"method must be one of {METHODS}, got {method!r}")
+    r = np.asarray(returns, dtype="float64").ravel()
+    r = r[np.isfinite(r)]
+    n = len(r)
+    if n == 0:
+        raise ValueError("bootstrap needs at least one finite return")
+
+    if method == "offset":
+        hi = n // 2 if max_offset is None else min(int(max_offset), n - 1)
+        offsets = np.random.default_rng(seed).integers(0, hi + 1, size=n_resamples)
+        out = _offset_metrics(r, offsets, periods_per_year)
+        return pd.DataFrame({"offset": offsets, **{k: out[k] for k in METRICS}})
+
+    block = min(n, max(1, int(block or default_block(n))))
+    n_blocks = -(-n // block)
+    chunk = chunk or max(1, MAX_CHUNK_BYTES // (n_blocks * 8 * 8))
+    sizes = [min(chunk, n_resamples - i) for i in range(0, n_resamples, chunk)]
+    seeds = _chunk_seeds(seed, len(sizes))
+    tasks = [(m, n, block, s, periods_per_year) for m, s in zip(sizes, seeds)]
+
+    summaries = _prepare(r, block)
+    n_jobs = n_jobs or os.cpu_count() or 1
+    if n_jobs == 1 or len(tasks) <= 1:
+        results = [_block_chunk(t, summaries) for t in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=min(n_jobs, len(tasks)),
+                                 initializer=_init, initargs=(summaries,)) as pool:
+            results = list(pool.map(_block_chunk, tasks))
+    if not results:
+        return pd.DataFrame({k: pd.Series(dtype="float64") for k in METRICS})
+    return pd.DataFrame({k: np.concatenate([res[k] for res in results]) for k in METRICS})
+
+
+def block_paths(returns, n_resamples: int = 100, block: Optional[int] = None,
+                seed: Optional[int] = None) -> np.ndarray:
+    """
+    Block-bootstrap return paths as one (n_resamples x n) array, for plotting
+    fan charts or custom metrics on short series (memory is resamples x bars).
+    With the same seed, these are the paths behind bootstrap()'s first chunk.
+    """
+    r = np.asarray(returns, dtype="float64").ravel()
+    r = r[np.isfinite(r)]
+    n = len(r)
+    block = min(n, max(1, int(block or default_block(n))))
+    starts = _block_starts(np.random.default_rng(_chunk_seeds(seed, 1)[0]), n_resamples, n, block)
+    idx = (starts[:, :, None] + np.arange(block)).reshape(n_resamples, -1)
+    if n % block:  # the tail block only uses its first n % block bars
+        idx = np.concatenate([idx[:, :(n // block) * block], idx[:, -block:][:, :n % block]], axis=1)
+    return r[idx[:, :n]]
+
+
+def confidence_intervals(samples: pd.DataFrame, level: float = 0.95, point: Optional[dict] = None) -> pd.DataFrame:
+    """
+    Percentile intervals per metric: point (the original path's value, if given),
+    mean, low, median, high. NaN samples (e.g. flat paths for Sharpe) are ignored.
+    """
+    alpha = (1 - level) / 2
+    rows = []
+    for k in METRICS:
+        v = samples[k].to_numpy(dtype="float64")
+        v = v[np.isfinite(v)]
+        lo, med, hi = np.quantile(v, [alpha, 0.5, 1 - alpha]) if len(v) else (np.nan,) * 3
+        rows.append({"metric": k, "point": (point or {}).get(k, np.nan),
+                     "mean": v.mean() if len(v) else np.nan, "low": lo, "median": med, "high": hi,
+                     "valid": len(v)})
+    return pd.DataFrame(rows).set_index("metric")
+
+
+def point_estimates(returns, periods_per_year: float = 252.0) -> dict:
+    """The metrics of the original path (as bootstrap() computes them for resamples)."""
+    r = np.asarray(returns, dtype="float64").ravel()
+    r = r[np.isfinite(r)]
+    out = _offset_metrics(r, np.array([0]), periods_per_year)
+    return {k: float(v[0]) for k, v in out.items()}
+
+
+# --------- CLI ---------
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Bootstrap confidence intervals for the long-only backtest")
+    p.add_argument("--csv", default="crypto_prices.csv", help="Path to CSV (default: crypto_prices.csv)")
+    p.add_argument("--resamples", type=int, default=1000, help="Synthetic paths (default: 1000)")
+    p.add_argument("--method", choices=METHODS, default="block", help="block bootstrap or random entry offsets")
+    p.add_argument("--block", type=int, default=0, help="Bars per block (0 = n^(1/3))")
+    p.add_argument("--max-offset", type=int, default=None, help="Latest entry bar for --method offset")
+    p.add_argument("--level", type=float, default=0.95, help="Confidence level (default: 0.95)")
+    p.add_argument("--seed", type=int, default=None, help="Random seed for reproducible samples")
+    p.add_argument("--periods-per-year", type=float, default=252.0, help="Annualization for Sharpe")
+    p.add_argument("--fee-bps", type=float, default=10.0, help="Backtest fee in bps (default: 10)")
+    p.add_argument("--jobs", type=int, default=1, help="Worker processes (0 = CPU count)")
+    p.add_argument("--out", default="outputs/bootstrap.csv", help="Where to save the samples")
+    return p.parse_args()
+
+
+def main():
+    from analysis import load_prices
+    from strategy import generate_signals, backtest_long_only
+
+    args = parse_args()
+    df_bt = backtest_long_only(generate_signals(load_prices(args.csv)), fee_bps=args.fee_bps)
+    ret = df_bt["strategy_ret"].to_numpy()
+    samples = bootstrap(ret, args.resamples, args.method, args.block or None, args.max_offset, args.seed,
+                        args.periods_per_year, n_jobs=args.jobs or None)
+    table = confidence_intervals(samples, args.level, point_estimates(ret, args.periods_per_year))
+    os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+    samples.to_csv(args.out, index=False)
+    print(table.to_string())
+    print(f"✅ {len(samples)} resamples saved to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
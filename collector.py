@@ -0,0 +1,320 @@
+# collector.py
+# Multi-exchange, multi-process price collector.
+#
+# - A config of exchanges x symbols is split round-robin over worker processes;
+#   inside a worker each exchange runs as its own async logging task
+#   (price_tracker.log_prices_async), and each exchange's request rate is shared
+#   out in proportion to the symbols each worker holds for it.
+# - Every worker writes its own shards: <out_dir>/<exchange>/wNN.csv (+ wNN_gaps.csv).
+# - The supervisor restarts crashed workers, and collects per-worker throughput and
+#   lag into <out_dir>/_workers.json.
+# - merge_shards aligns all shards on a common time grid.
+
+import os
+import json
+import time
+import asyncio
+import argparse
+import multiprocessing as mp
+from queue import Empty
+from typing import Callable, Dict, List, Optional
+
+import pandas as pd
+
+from price_tracker import log_prices_async
+from scheduler import RequestScheduler
+
+STATUS_FILE = "_workers.json"
+
+
+def ccxt_exchange(name: str):
+    """Default exchange factory: an async ccxt client (the scheduler does the throttling)."""
+    import ccxt.async_support as ccxt_async
+    return getattr(ccxt_async, name)({"enableRateLimit": False})
+
+
+def load_config(path: str) -> dict:
+    """
+    JSON config, e.g.
+      {"interval": 30, "workers": 4, "out_dir": "shards",
+       "exchanges": {"binance": ["BTC/USDT", "ETH/USDT"], "kraken": ["BTC/USD"]}}
+    """
+    with open(path, encoding="utf-8") as f:
+        cfg = json.load(f)
+    if not cfg.get("exchanges"):
+        raise ValueError(f"No exchanges configured in {path}")
+    return cfg
+
+
+def shard_pairs(exchanges: Dict[str, List[str]], n_workers: int) -> List[Dict[str, List[str]]]:
+    """Deal (exchange, symbol) pairs round-robin -> one {exchange: [symbols]} per worker."""
+    shards: List[Dict[str, List[str]]] = [{} for _ in range(max(1, n_workers))]
+    i = 0
+    for name in sorted(exchanges):
+        for symbol in exchanges[name]:
+            shards[i % len(shards)].setdefault(name, []).append(symbol)
+            i += 1
+    return [s for s in shards if s]
+
+
+def shard_path(out_dir: str, exchange: str, worker_id: int) -> str:
+    return os.path.join(out_dir, exchange, f"w{worker_id:02d}.csv")
+
+
+# --------- Worker ---------
+async def _run_worker(spec: dict, status) -> None:
+    wid = spec["worker_id"]
+    t0 = time.time()
+    state = {"rows": 0, "prices": 0, "last_row": None}
+    schedulers: Dict[str, RequestScheduler] = {}
+
+    def snapshot(final: bool = False) -> dict:
+        now = time.time()
+        elapsed = max(now - t0, 1e-9)
+        return {
+            "worker": wid, "pid": os.getpid(), "pairs": spec["pairs"], "rows": state["rows"],
+            "rows_per_sec": state["rows"] / elapsed,
+            "prices_per_sec": state["prices"] / elapsed,
+            "lag_sec": None if state["last_row"] is None else now - state["last_row"],
+            "gaps": sum(sum(s.gap_counts.values()) for s in schedulers.values()),
+            "rate_limited": sum(s.stats["rate_limited"] for s in schedulers.values()),
+            "finished": final, "time": now,
+        }
+
+    def on_row(row: dict) -> None:
+        state["rows"] += 1
+        state["prices"] += sum(v is not None for k, v in row.items() if k != "timestamp")
+        state["last_row"] = time.time()
+
+    async def one(name: str, symbols: List[str]) -> None:
+        exchange = spec["factory"](name)
+        rate = None
+        if getattr(exchange, "rateLimit", None):
+            rate = 1000.0 / float(exchange.rateLimit) * spec["shares"][name]
+        schedulers[name] = RequestScheduler(exchange, rate=rate)
+        path = shard_path(spec["out_dir"], name, wid)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        try:
+            await log_prices_async(
+                spec["interval"], symbols, exchange=exchange, csv_path=path,
+                max_in_flight=spec["max_in_flight"], batch=spec["batch"], max_ticks=spec["max_ticks"],
+                fsync=spec["fsync"], on_row=on_row, scheduler=schedulers[name], verbose=False,
+                index=False,  # shards are only ever merged whole
+            )
+        finally:
+            close = getattr(exchange, "close", None)
+            if close is not None:
+                res = close()
+                if asyncio.iscoroutine(res):
+                    await res
+
+    async def report() -> None:
+        while True:
+            await asyncio.sleep(spec["report_every"])
+            status.put(snapshot())
+
+    reporter = asyncio.create_task(report())
+    try:
+        await asyncio.gather(*(one(n, s) for n, s in spec["assignments"].items()))
+    finally:
+        reporter.cancel()
+        status.put(snapshot(final=True))
+
+
+def _worker_main(spec: dict, status) -> None:
+    try:
+        asyncio.run(_run_worker(spec, status))
+    except KeyboardInterrupt:
+        pass
+
+
+# --------- Supervisor ---------
+class Collector:
+    """
+    Runs one process per shard and keeps them alive.
+    factory(name) -> exchange must be picklable (a module-level function) for
+    non-fork start methods. Crashed workers (non-zero exit) are restarted after
+    restart_delay seconds, at most max_restarts times each.
+    """
+
+    def __init__(
+        self,
+        exchanges: Dict[str, List[str]],
+        workers: Optional[int] = None,
+        interval: float = 30,
+        out_dir: str = "shards",
+        factory: Callable = ccxt_exchange,
+        batch: bool = True,
+        max_in_flight: int = 10,
+        fsync: str = "batch",
+        report_every: float = 5.0,
+        max_restarts: int = 5,
+        restart_delay: float = 1.0,
+    ):
+        self.out_dir = out_dir
+        self.interval = interval
+        self.max_restarts = max_restarts
+        self.restart_delay = restart_delay
+        totals = {name: len(symbols) for name, symbols in exchanges.items()}
+        shards = shard_pairs(exchanges, workers or os.cpu_count() or 1)
+        self.specs = [{
+            "worker_id": i, "assignments": a, "pairs": sum(len(s) for s in a.values()),
+            "shares": {name: len(s) / totals[name] for name, s in a.items()},
+            "interval": interval, "out_dir": out_dir, "factory": factory, "batch": batch,
+            "max_in_flight": max_in_flight, "fsync": fsync, "report_every": report_every,
+            "max_ticks": None,
+        } for i, a in enumerate(shards)]
+        self._ctx = mp.get_context()
+        self._status = self._ctx.Queue()
+        self._procs: Dict[int, mp.Process] = {}
+        self._restart_at: Dict[int, float] = {}
+        self.restarts = {s["worker_id"]: 0 for s in self.specs}
+        self.workers: Dict[int, dict] = {}
+
+    def _spawn(self, spec: dict) -> None:
+        p = self._ctx.Process(target=_worker_main, args=(spec, self._status),
+                              name=f"collector-w{spec['worker_id']:02d}", daemon=True)
+        p.start()
+        self._procs[spec["worker_id"]] = p
+
+    def start(self, max_ticks: Optional[int] = None) -> None:
+        os.makedirs(self.out_dir, exist_ok=True)
+        for spec in self.specs:
+            spec["max_ticks"] = max_ticks
+            self._spawn(spec)
+        print(f"🚀 {len(self.specs)} workers, {sum(s['pairs'] for s in self.specs)} pairs -> {self.out_dir}")
+
+    def _drain(self) -> None:
+        while True:
+            try:
+                st = self._status.get_nowait()
+            except Empty:
+                return
+            self.workers[st["worker"]] = st
+
+    def poll(self) -> bool:
+        """Collect status, restart crashed workers; True while any worker is still running."""
+        self._drain()
+        now = time.monotonic()
+        running = False
+        for spec in self.specs:
+            wid = spec["worker_id"]
+            p = self._procs.get(wid)
+            if p is not None and p.is_alive():
+                running = True
+                continue
+            if wid in self._restart_at:
+                running = True
+                if now >= self._restart_at[wid]:
+                    del self._restart_at[wid]
+                    self.restarts[wid] += 1
+                    self._spawn(spec)
+                continue
+            if p is not None and p.exitcode not in (0, None):
+                self._procs.pop(wid)
+                if self.restarts[wid] < self.max_restarts:
+                    print(f"♻️ Worker {wid} exited with {p.exitcode}; restarting")
+                    self._restart_at[wid] = now + self.restart_delay
+                    running = True
+                else:
+                    print(f"⚠️ Worker {wid} exited with {p.exitcode}; giving up after {self.restarts[wid]} restarts")
+        self._write_status()
+        return running
+
+    def metrics(self) -> Dict[int, dict]:
+        """Latest per-worker status (rows, rows/s, lag, gaps...) plus restarts/alive."""
+        out = {}
+        for spec in self.specs:
+            wid = spec["worker_id"]
+            p = self._procs.get(wid)
+            out[wid] = {**self.workers.get(wid, {"worker": wid}), "restarts": self.restarts[wid],
+                        "alive": bool(p is not None and p.is_alive())}
+        return out
+
+    def _write_status(self) -> None:
+        path = os.path.join(self.out_dir, STATUS_FILE)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(self.metrics(), f, indent=1)
+        os.replace(path + ".tmp", path)
+
+    def stop(self, timeout: float = 5.0) -> None:
+        for p in self._procs.values():
+            if p.is_alive():
+                p.terminate()  # SIGTERM -> workers flush their writers
+        for p in self._procs.values():
+            p.join(timeout)
+        self._drain()
+        self._write_status()
+
+    def run(self, max_ticks: Optional[int] = None, poll_every: float = 1.0) -> Dict[int, dict]:
+        self.start(max_ticks)
+        try:
+            while self.poll():
+                time.sleep(poll_every)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+        return self.metrics()
+
+
+# --------- Merge ---------
+def merge_shards(out_dir: str = "shards", freq: str = "1s", exchanges: Optional[List[str]] = None,
+                 prefix: bool = True) -> pd.DataFrame:
+    """
+    One time-aligned frame from all shards: timestamps are floored to `freq` and the
+    last price per bucket is kept. Columns are <exchange>_<SYMBOL> (or the plain
+    symbol columns when prefix=False, e.g. for a single exchange and load_prices).
+    """
+    from analysis import parse_timestamps
+
+    frames = []
+    names = exchanges or sorted(d for d in os.listdir(out_dir) if os.path.isdir(os.path.join(out_dir, d)))
+    for name in names:
+        d = os.path.join(out_dir, name)
+        for f in sorted(os.listdir(d)):
+            if not f.endswith(".csv") or f.endswith("_gaps.csv"):
+                continue
+            df = pd.read_csv(os.path.join(d, f))
+            if df.empty:
+                continue
+            ts = parse_timestamps(df.pop("timestamp")).dt.floor(freq)
+            if prefix:
+                df.columns = [f"{name}_{c}" for c in df.columns]
+            frames.append(df.set_index(ts).groupby(level=0).last())
+    if not frames:
+        return pd.DataFrame(columns=["timestamp"])
+    merged = pd.concat(frames, axis=1).sort_index()
+    return merged.rename_axis("timestamp").reset_index()
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Multi-exchange, multi-process price collector")
+    p.add_argument("--config", required=True, help="JSON config with exchanges -> symbols")
+    p.add_argument("--workers", type=int, default=None, help="Worker processes (default: config or CPU count)")
+    p.add_argument("--ticks", type=int, default=None, help="Stop after N ticks per worker (default: run forever)")
+    p.add_argument("--merge", default="", help="Only merge existing shards into this CSV and exit")
+    p.add_argument("--freq", default="", help="Merge grid (default: the config interval in seconds)")
+    return p.parse_args()
+
+
+def main():
+    args = parse_args()
+    cfg = load_config(args.config)
+    out_dir = cfg.get("out_dir", "shards")
+    interval = cfg.get("interval", 30)
+    if args.merge:
+        merged = merge_shards(out_dir, args.freq or f"{int(interval)}s")
+        merged.to_csv(args.merge, index=False)
+        print(f"✅ Merged {merged.shape[1] - 1} columns x {len(merged)} rows -> {args.merge}")
+        return
+    collector = Collector(cfg["exchanges"], workers=args.workers or cfg.get("workers"),
+                          interval=interval, out_dir=out_dir)
+    stats = collector.run(max_ticks=args.ticks)
+    for wid, st in stats.items():
+        print(f"📊 w{wid:02d}: {st.get('rows', 0)} rows, {st.get('rows_per_sec', 0):.2f} rows/s, "
+              f"lag {st.get('lag_sec')}, gaps {st.get('gaps', 0)}, restarts {st['restarts']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,435 @@
+# correlation.py
+# How the logged symbols move together: rolling correlation and beta against a
+# benchmark, spread z-scores for pairs, and correlation matrices.
+#
+# Batch: every rolling series comes from windowed sums (count, sum x, sum y,
+# sum x^2, sum y^2, sum xy) taken as differences of cumulative sums. That is
+# O(rows x columns) per window, with no pandas rolling object per pair. Cumsums
+# restart every few thousand rows and each block is centered, so rounding error
+# doesn't grow with the length of the log. Full N x N matrices are built only
+# at the rows asked for (a few matrix products over the window each).
+# Streaming: StreamingCorrelation keeps the same sums for the trailing windows
+# and adds/removes one row per tick: O(1) per symbol or pair (O(1) per cell for
+# the optional matrix), resynced from its ring buffer now and then.
+#
+# Conventions match pandas rolling: sample (ddof=1) moments, pairwise-complete
+# observations, NaN until `min_periods` (default: the window) valid pairs.
+
+import os
+import argparse
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from analysis import load_prices
+from portfolio import price_columns
+
+# Cap for one block of the windowed-sum temporaries
+MAX_BLOCK_BYTES = 64 * 1024 * 1024
+RESYNC_TICKS = 10_000
+
+
+# --------- Windowed moments ---------
+def _output_rows(n: int, step: int) -> np.ndarray:
+    """Every step-th row, always including the last one."""
+    step = max(1, int(step))
+    return np.arange((n - 1) % step, n, step) if n else np.arange(0)
+
+
+def _block_moments(x: np.ndarray, y: np.ndarray, window: int, rows: np.ndarray) -> Iterator[tuple]:
+    """
+    Windowed pair moments of the columns of x vs y (T x K, or T x 1 for a shared
+    y) at `rows`, one block of rows at a time: yields (positions in rows, moments)
+    with n, mean_x, mean_y, var_x, var_y, cov. A row counts for a column when
+    both values are finite.
+    """
+    T, K = x.shape
+    vx, vy = np.isfinite(x), np.isfinite(y)
+    block = max(2 * window, MAX_BLOCK_BYTES // (max(K, 1) * 8 * 8))
+    for b0 in range(0, T, block):
+        want = rows[(rows >= b0) & (rows < b0 + block)]
+        if not len(want):
+            continue
+        s0 = max(0, b0 - window + 1)
+        seg = slice(s0, int(want[-1]) + 1)
+        local = want - s0
+        lo = np.maximum(local + 1 - window, 0)
+
+        def wsum(a):
+            c = np.concatenate([np.zeros((1, a.shape[1])), np.cumsum(a, axis=0)])
+            return c[local + 1] - c[lo]
+
+        if vx[seg].all() and vy[seg].all():  # usual case: no masking, shared y summed once
+            cx, cy = x[seg].mean(axis=0), y[seg].mean(axis=0)
+            xs, ys = x[seg] - cx, y[seg] - cy
+            n = (local + 1 - lo).astype("float64")[:, None]
+        else:
+            v = vx[seg] & vy[seg]
+            cnt = np.maximum(v.sum(axis=0), 1)
+            cx = np.where(v, x[seg], 0.0).sum(axis=0) / cnt
+            cy = np.where(v, y[seg], 0.0).sum(axis=0) / cnt
+            xs = np.where(v, x[seg] - cx, 0.0)
+            ys = np.where(v, y[seg] - cy, 0.0)
+            n = wsum(v.astype("float64"))
+        sx, sy = wsum(xs), wsum(ys)
+        sxx, syy, sxy = wsum(xs * xs), wsum(ys * ys), wsum(xs * ys)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            yield np.searchsorted(rows, want), {
+                "n": n, "mean_x": sx / n + cx, "mean_y": sy / n + cy,
+                "var_x": np.maximum(sxx - sx * sx / n, 0.0) / (n - 1),
+                "var_y": np.maximum(syy - sy * sy / n, 0.0) / (n - 1),
+                "cov": (sxy - sx * sy / n) / (n - 1),
+            }
+
+
+def _rolling_pairs(x: np.ndarray, y: np.ndarray, window: int, rows: np.ndarray, min_periods: int,
+                   spread: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+    """(corr, beta) or, with spread=True, (hedge, z) per column of x at `rows`."""
+    first = np.full((len(rows), x.shape[1]), np.nan)
+    second = np.full((len(rows), x.shape[1]), np.nan)
+    for i, m in _block_moments(x, y, window, rows):
+        if spread:
+            first[i], second[i] = _spread(m, x[rows[i]], y[rows[i]], min_periods)
+        else:
+            st = _stats(m, min_periods)
+            first[i], second[i] = st["corr"], st["beta"]
+    return first, second
+
+
+def _stats(m: Dict[str, np.ndarray], min_periods: int) -> Dict[str, np.ndarray]:
+    """corr and beta (of x on y) from windowed moments; NaN below min_periods or for flat windows."""
+    with np.errstate(invalid="ignore", divide="ignore"):
+        denom = np.sqrt(m["var_x"] * m["var_y"])
+        corr = np.clip(m["cov"] / np.where(denom > 0, denom, np.nan), -1.0, 1.0)
+        beta = m["cov"] / np.where(m["var_y"] > 0, m["var_y"], np.nan)
+    short = np.broadcast_to(m["n"] < max(min_periods, 2), corr.shape)
+    corr[short] = np.nan
+    beta[short] = np.nan
+    return {"corr": corr, "beta": beta}
+
+
+def _spread(m: Dict[str, np.ndarray], x_now: np.ndarray, y_now: np.ndarray, min_periods: int):
+    """(hedge ratio, z-score of x - hedge * y) from windowed moments of log prices."""
+    st = _stats(m, min_periods)
+    hedge = st["beta"]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        var = np.maximum(m["var_x"] - m["cov"] * hedge, 0.0)
+        mean = m["mean_x"] - hedge * m["mean_y"]
+        z = (x_now - hedge * y_now - mean) / np.where(var > 0, np.sqrt(var), np.nan)
+    return hedge, z
+
+
+# --------- Batch ---------
+def returns_matrix(df: pd.DataFrame, symbols: Sequence[str]) -> np.ndarray:
+    """(rows x symbols) close-to-close returns; NaN for the first row and around missing prices."""
+    p = df[list(symbols)].to_numpy(dtype="float64")
+    r = np.full_like(p, np.nan)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        r[1:] = p[1:] / p[:-1] - 1
+    r[~np.isfinite(r)] = np.nan
+    return r
+
+
+def _sorted(df: pd.DataFrame) -> pd.DataFrame:
+    if df["timestamp"].is_monotonic_increasing:
+        return df.reset_index(drop=True)
+    return df.sort_values("timestamp", kind="stable").reset_index(drop=True)
+
+
+def rolling_beta(
+    df: pd.DataFrame,
+    benchmark: str = "BTC_USDT",
+    windows: Iterable[int] = (60,),
+    symbols: Optional[Sequence[str]] = None,
+    step: int = 1,
+    min_periods: Optional[int] = None,
+) -> pd.DataFrame:
+    """
+    Rolling correlation and beta of each symbol's returns vs the benchmark's,
+    for every window. Columns: timestamp, CORR_<sym>_<w>, BETA_<sym>_<w>.
+    step=k keeps every k-th row (the last row is always included).
+    """
+    df = _sorted(df)
+    symbols = [s for s in (symbols or price_columns(df)) if s != benchmark]
+    if not symbols:
+        raise ValueError(f"No symbols to compare with {benchmark}.")
+    r = returns_matrix(df, [benchmark, *symbols])
+    x, y = r[:, 1:], r[:, :1]
+    rows = _output_rows(len(df), step)
+    out = {"timestamp": df["timestamp"].to_numpy()[rows]}
+    for w in windows:
+        corr, beta = _rolling_pairs(x, y, int(w), rows, min_periods or int(w))
+        for j, s in enumerate(symbols):
+            out[f"CORR_{s}_{w}"] = corr[:, j]
+            out[f"BETA_{s}_{w}"] = beta[:, j]
+    return pd.DataFrame(out)
+
+
+def parse_pairs(spec: str) -> List[Tuple[str, str]]:
+    """'ETH_USDT:BTC_USDT,SOL_USDT:BTC_USDT' -> [(a, b), ...]."""
+    pairs = []
+    for p in spec.split(","):
+        if p.strip():
+            a, _, b = p.strip().partition(":")
+            if not b:
+                raise ValueError(f"Pair {p!r} must look like A:B")
+            pairs.append((a, b))
+    return pairs
+
+
+def spread_zscores(
+    df: pd.DataFrame,
+    pairs: Sequence[Tuple[str, str]],
+    windows: Iterable[int] = (60,),
+    step: int = 1,
+    min_periods: Optional[int] = None,
+) -> pd.DataFrame:
+    """
+    z-score of log(a) - hedge * log(b) within each trailing window, with the
+    hedge ratio fitted (OLS of log a on log b) over that same window.
+    Columns: timestamp, HEDGE_<a>_<b>_<w>, Z_<a>_<b>_<w>.
+    """
+    df = _sorted(df)
+    names = sorted({s for p in pairs for s in p})
+    with np.errstate(invalid="ignore", divide="ignore"):
+        lp = np.log(df[names].to_numpy(dtype="float64"))
+    ia = [names.index(a) for a, _ in pairs]
+    ib = [names.index(b) for _, b in pairs]
+    x, y = lp[:, ia], lp[:, ib]
+    rows = _output_rows(len(df), step)
+    out = {"timestamp": df["timestamp"].to_numpy()[rows]}
+    for w in windows:
+        hedge, z = _rolling_pairs(x, y, int(w), rows, min_periods or int(w), spread=True)
+        for j, (a, b) in enumerate(pairs):
+            out[f"HEDGE_{a}_{b}_{w}"] = hedge[:, j]
+            out[f"Z_{a}_{b}_{w}"] = z[:, j]
+    return pd.DataFrame(out)
+
+
+def correlation_matrices(r: np.ndarray, window: int, rows: Iterable[int], min_periods: Optional[int] = None) -> np.ndarray:
+    """
+    (len(rows) x N x N) return correlation matrices over the `window` rows ending
+    at each of `rows` (pairwise-complete, like DataFrame.corr()).
+    """
+    rows = list(rows)
+    N = r.shape[1]
+    out = np.full((len(rows), N, N), np.nan)
+    for k, t in enumerate(rows):
+        seg = r[max(0, t - window + 1):t + 1]
+        v = np.isfinite(seg)
+        mu = np.where(v, seg, 0.0).sum(axis=0) / np.maximum(v.sum(axis=0), 1)
+        x = np.where(v, seg - mu, 0.0)
+        vf = v.astype("float64")
+        n = vf.T @ vf
+        sx = x.T @ vf  # sx[i, j]: sum of x_i where x_i and x_j are both valid
+        sxx = (x * x).T @ vf
+        sxy = x.T @ x
+        with np.errstate(invalid="ignore", divide="ignore"):
+            cov = sxy - sx * sx.T / n
+            var_i = sxx - sx * sx / n
+            c = cov / np.sqrt(var_i * var_i.T)
+        c[(n < max(min_periods or 2, 2)) | ~(var_i * var_i.T > 0)] = np.nan
+        out[k] = np.clip(c, -1.0, 1.0)
+    return out
+
+
+def correlation_matrix(df: pd.DataFrame, window: Optional[int] = None, symbols: Optional[Sequence[str]] = None,
+                       at: int = -1) -> pd.DataFrame:
+    """Return correlations between symbols over the `window` rows ending at row `at` (None = whole log)."""
+    df = _sorted(df)
+    symbols = list(symbols or price_columns(df))
+    r = returns_matrix(df, symbols)
+    t = at % len(r) if len(r) else 0
+    m = correlation_matrices(r, window or len(r), [t])[0]
+    return pd.DataFrame(m, index=symbols, columns=symbols)
+
+
+# --------- Streaming ---------
+class StreamingCorrelation:
+    """
+    Live version of rolling_beta / spread_zscores (and optionally the matrix of
+    one window). update(row) takes a logger row and returns the latest values
+    under the same column names, e.g. {"CORR_ETH_USDT_60": ..., "Z_ETH_USDT_BTC_USDT_60": ...}.
+    """
+
+    def __init__(self, symbols: Sequence[str], benchmark: str = "BTC_USDT", windows: Iterable[int] = (60,),
+                 pairs: Sequence[Tuple[str, str]] = (), matrix_window: Optional[int] = None,
+                 min_periods: Optional[int] = None, resync: int = RESYNC_TICKS):
+        self.benchmark = benchmark
+        self.symbols = [s for s in symbols if s != benchmark]
+        self.pairs = list(pairs)
+        self.windows = [int(w) for w in windows]
+        self.matrix_window = matrix_window
+        self.min_periods = min_periods
+        self.resync = max(1, int(resync))
+        self.all_symbols = [benchmark, *self.symbols]
+        self._cols = list(dict.fromkeys([*self.all_symbols, *(s for p in self.pairs for s in p)]))
+        self._ia = [self._cols.index(a) for a, _ in self.pairs]
+        self._ib = [self._cols.index(b) for _, b in self.pairs]
+        self._cap = max(self.windows + [matrix_window or 0]) + 1
+        k = len(self.symbols) + len(self.pairs)
+        self._x = np.full((self._cap, k), np.nan)  # ring of per-tick (x, y) values
+        self._y = np.full((self._cap, k), np.nan)
+        self._r = np.full((self._cap, len(self.all_symbols)), np.nan)  # returns, for the matrix
+        self._anchor: Optional[np.ndarray] = None  # log prices are offset to keep sums small
+        self._last_price = np.full(len(self._cols), np.nan)
+        self.ticks = 0
+        self._sums = {w: np.zeros((6, k)) for w in self.windows}
+        n = len(self.all_symbols)
+        self._msums = np.zeros((4, n, n)) if matrix_window else None
+
+    @staticmethod
+    def _terms(x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        v = np.isfinite(x) & np.isfinite(y)
+        xs, ys = np.where(v, x, 0.0), np.where(v, y, 0.0)
+        return np.stack([v.astype("float64"), xs, ys, xs * xs, ys * ys, xs * ys])
+
+    @staticmethod
+    def _matrix_terms(r: np.ndarray) -> np.ndarray:
+        v = np.isfinite(r).astype("float64")
+        x = np.where(v > 0, r, 0.0)
+        return np.stack([np.outer(v, v), np.outer(x, v), np.outer(x * x, v), np.outer(x, x)])
+
+    def _row_values(self, row: dict) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(x, y) for the ring (returns vs benchmark, then anchored log prices of pairs) and all returns."""
+        p = np.full(len(self._cols), np.nan)
+        for i, s in enumerate(self._cols):
+            try:
+                p[i] = float(row.get(s))
+            except (TypeError, ValueError):
+                pass
+        p[~(np.isfinite(p) & (p > 0))] = np.nan
+        with np.errstate(invalid="ignore", divide="ignore"):
+            r = p / self._last_price - 1
+            lp = np.log(p)
+        self._last_price = p
+        n = len(self.all_symbols)
+        pair_x, pair_y = lp[self._ia], lp[self._ib]
+        if self._anchor is None and self.pairs:
+            self._anchor = np.where(np.isfinite(pair_x), pair_x, 0.0), np.where(np.isfinite(pair_y), pair_y, 0.0)
+        if self.pairs:
+            pair_x, pair_y = pair_x - self._anchor[0], pair_y - self._anchor[1]
+        x = np.concatenate([r[1:n], pair_x])
+        y = np.concatenate([np.full(n - 1, r[0]), pair_y])
+        return x, y, r[:n]
+
+    def update(self, row: dict) -> dict:
+        x, y, r = self._row_values(row)
+        slot = self.ticks % self._cap
+        self._x[slot], self._y[slot], self._r[slot] = x, y, r
+        self.ticks += 1
+        if self.ticks % self.resync == 0:
+            self._resync()
+        else:
+            add = self._terms(x, y)
+            for w, s in self._sums.items():
+                s += add
+                if self.ticks > w:
+                    old = (self.ticks - 1 - w) % self._cap
+                    s -= self._terms(self._x[old], self._y[old])
+            if self._msums is not None:
+                self._msums += self._matrix_terms(r)
+                if self.ticks > self.matrix_window:
+                    self._msums -= self._matrix_terms(self._r[(self.ticks - 1 - self.matrix_window) % self._cap])
+        return self.values()
+
+    def _resync(self) -> None:
+        """Recompute the running sums from the ring (drops accumulated rounding error)."""
+        for w in self._sums:
+            idx = [(self.ticks - 1 - i) % self._cap for i in range(min(w, self.ticks))]
+            self._sums[w] = self._terms(self._x[idx], self._y[idx]).sum(axis=1)
+        if self._msums is not None:
+            idx = [(self.ticks - 1 - i) % self._cap for i in range(min(self.matrix_window, self.ticks))]
+            self._msums = sum(self._matrix_terms(self._r[i]) for i in idx)
+
+    def _moments(self, w: int) -> Dict[str, np.ndarray]:
+        n, sx, sy, sxx, syy, sxy = self._sums[w]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return {"n": n, "mean_x": sx / n, "mean_y": sy / n,
+                    "var_x": np.maximum(sxx - sx * sx / n, 0.0) / (n - 1),
+                    "var_y": np.maximum(syy - sy * sy / n, 0.0) / (n - 1),
+                    "cov": (sxy - sx * sy / n) / (n - 1)}
+
+    def values(self) -> dict:
+        """Latest CORR_/BETA_/HEDGE_/Z_ values (NaN until each window has enough ticks)."""
+        out = {}
+        k = len(self.symbols)
+        last = (self.ticks - 1) % self._cap
+        for w in self.windows:
+            m = self._moments(w)
+            st = _stats(m, self.min_periods or w)
+            for j, s in enumerate(self.symbols):
+                out[f"CORR_{s}_{w}"] = float(st["corr"][j])
+                out[f"BETA_{s}_{w}"] = float(st["beta"][j])
+            if self.pairs:
+                pm = {key: v[k:] for key, v in m.items()}
+                hedge, z = _spread(pm, self._x[last, k:], self._y[last, k:], self.min_periods or w)
+                for j, (a, b) in enumerate(self.pairs):
+                    out[f"HEDGE_{a}_{b}_{w}"] = float(hedge[j])
+                    out[f"Z_{a}_{b}_{w}"] = float(z[j])
+        return out
+
+    def matrix(self) -> pd.DataFrame:
+        """Return correlation matrix over the last matrix_window ticks."""
+        if self._msums is None:
+            raise ValueError("StreamingCorrelation was created without matrix_window")
+        n, sx, sxx, sxy = self._msums
+        with np.errstate(invalid="ignore", divide="ignore"):
+            cov = sxy - sx * sx.T / n
+            var_i = sxx - sx * sx / n
+            c = cov / np.sqrt(var_i * var_i.T)
+        c[(n < max(self.min_periods or 2, 2)) | ~(var_i * var_i.T > 0)] = np.nan
+        return pd.DataFrame(np.clip(c, -1.0, 1.0), index=self.all_symbols, columns=self.all_symbols)
+
+
+# --------- Outputs ---------
+def save_correlation_csv(frame: pd.DataFrame, path: str = "outputs/correlation.csv") -> str:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    frame.to_csv(path, index=False)
+    return path
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Rolling cross-asset correlation, beta and spread z-scores")
+    p.add_argument("--csv", default="crypto_prices.csv", help="Path to CSV (default: crypto_prices.csv)")
+    p.add_argument("--benchmark", default="BTC_USDT", help="Beta/correlation benchmark column")
+    p.add_argument("--symbols", default="", help="Columns to compare, comma-separated (default: all)")
+    p.add_argument("--windows", default="60,240", help="Rolling windows in rows, comma-separated")
+    p.add_argument("--pairs", default="", help="Spread pairs A:B, comma-separated (default: each symbol:benchmark)")
+    p.add_argument("--step", type=int, default=1, help="Keep every k-th row in the outputs (default: 1)")
+    p.add_argument("--matrix-window", type=int, default=0, help="Rows for the correlation matrix (0 = all)")
+    p.add_argument("--out", default="outputs/correlation.csv", help="Rolling series CSV")
+    p.add_argument("--matrix-out", default="outputs/correlation_matrix.csv", help="Latest correlation matrix CSV")
+    p.add_argument("--chart", default="charts/correlation.png", help="Rolling series chart")
+    p.add_argument("--heatmap", default="charts/correlation_matrix.png", help="Correlation matrix chart")
+    p.add_argument("--no-downsample", action="store_true", help="Plot every row instead of fitting to the chart width")
+    return p.parse_args()
+
+
+def main():
+    from plotting import plot_correlation_matrix, plot_rolling_correlation
+
+    args = parse_args()
+    df = load_prices(args.csv)
+    symbols = [s.strip() for s in args.symbols.split(",") if s.strip()] or price_columns(df)
+    windows = [int(w) for w in args.windows.split(",") if w.strip()]
+    pairs = parse_pairs(args.pairs) or [(s, args.benchmark) for s in symbols if s != args.benchmark]
+    rolling = rolling_beta(df, args.benchmark, windows, symbols, step=args.step)
+    spreads = spread_zscores(df, pairs, windows, step=args.step)
+    frame = rolling.merge(spreads, on="timestamp")
+    matrix = correlation_matrix(df, args.matrix_window or None, sorted(set(symbols) | {args.benchmark}))
+
+    out = save_correlation_csv(frame, args.out)
+    os.makedirs(os.path.dirname(args.matrix_out) or ".", exist_ok=True)
+    matrix.to_csv(args.matrix_out)
+    downsample = False if args.no_downsample else None
+    chart = plot_rolling_correlation(frame, args.chart, downsample=downsample)
+    heat = plot_correlation_matrix(matrix, args.heatmap)
+    print("🔗 Correlation matrix:\n", matrix.round(3).to_string())
+    print("📈 Latest:", {k: round(float(v), 4) for k, v in frame.iloc[-1].drop("timestamp").items()})
+    print(f"✅ Saved: {out}, {args.matrix_out}, {chart} and {heat}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+# csv_index.py
+# Sparse time -> byte-offset index for the logger CSV, so time-range and last-N
+# reads seek to the right place instead of parsing the whole file.
+#
+# Sidecar files next to the CSV:
+#   <csv>.idx        int64 triples (timestamp ns, byte offset, row number), one per
+#                    `stride` data rows, append-only
+#   <csv>.idx.json   header, stride, entries, bytes/rows covered, sorted flag, and
+#                    the inode, first line and last indexed bytes (to notice a
+#                    replaced file)
+# update() indexes only what was appended since the last call; a truncated or
+# replaced CSV is re-indexed from scratch. The logger's CsvWriter calls update()
+# after each flush, and readers call it before seeking, so the index is never stale.
+
+import io
+import os
+import json
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+try:
+    import fcntl
+    HAS_FCNTL = True
+except ImportError:  # Windows: updates aren't serialized between processes
+    HAS_FCNTL = False
+
+VERSION = 2
+DEFAULT_STRIDE = 1024  # rows per index entry (~24 bytes per 1024 rows)
+SCAN_BYTES = 64 * 1024 * 1024
+PROBE_BYTES = 64  # bytes just before `covered`, re-read to check the file is the one indexed
+TS_FORMAT = "%Y-%m-%d %H:%M:%S"  # logger format; others go through the flexible parser
+
+
+def index_paths(csv_path: str) -> Tuple[str, str]:
+    return csv_path + ".idx", csv_path + ".idx.json"
+
+
+def _parse_ns(values) -> np.ndarray:
+    """Timestamp strings -> int64 ns (NaT as the int64 minimum)."""
+    s = pd.Series(values, dtype="object")
+    ts = pd.to_datetime(s, format=TS_FORMAT, errors="coerce")
+    bad = ts.isna() & s.notna()
+    if bad.any():
+        ts[bad] = pd.to_datetime(s[bad], format="mixed", errors="coerce")
+    return ts.to_numpy(dtype="datetime64[ns]").view("int64")
+
+
+class CsvIndex:
+    """
+    Index for one CSV. start/end/last_n reads go through byte_range()/read();
+    unsorted files (timestamps going backwards between entries) are flagged and
+    callers fall back to a full read.
+    """
+
+    def __init__(self, csv_path: str, stride: Optional[int] = None):
+        self.csv_path = csv_path
+        self.idx_path, self.meta_path = index_paths(csv_path)
+        self.stride = max(1, int(stride)) if stride else None  # None: keep the existing index's
+        self.meta: Optional[dict] = None
+        self._entries: Optional[np.ndarray] = None
+
+    # --------- Maintenance ---------
+    def _load_meta(self) -> Optional[dict]:
+        try:
+            with open(self.meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return meta if meta.get("version") == VERSION else None
+
+    @staticmethod
+    def _probe(f, covered: int) -> str:
+        f.seek(max(0, covered - PROBE_BYTES))
+        return f.read(min(covered, PROBE_BYTES)).decode("latin-1")
+
+    def _stale(self, meta: Optional[dict], f, size: int, first_line: bytes) -> bool:
+        """True when the CSV is not the file (or a prefix-preserving append of the file) that was indexed."""
+        if (meta is None or size < meta["covered"] or meta["first_line"] != first_line.decode("utf-8", "replace")
+                or meta["inode"] != os.fstat(f.fileno()).st_ino
+                or not os.path.exists(self.idx_path)
+                or os.path.getsize(self.idx_path) < meta["entries"] * 24):
+            return True
+        return self._probe(f, meta["covered"]) != meta["probe"]
+
+    def update(self) -> "CsvIndex":
+        """Index newly appended complete lines (or rebuild if the CSV was truncated/replaced)."""
+        lock = open(self.idx_path, "ab")
+        try:
+            if HAS_FCNTL:
+                fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+            with open(self.csv_path, "rb") as f:
+                first = f.readline()
+                size = os.fstat(f.fileno()).st_size
+                meta = self._load_meta()
+                if self._stale(meta, f, size, first):
+                    stride = self.stride or (meta["stride"] if meta else DEFAULT_STRIDE)
+                    header = first.decode("utf-8").strip().split(",")
+                    meta = {"version": VERSION, "stride": stride, "header": header,
+                            "first_line": first.decode("utf-8", "replace"), "covered": len(first),
+                            "rows": 0, "entries": 0, "sorted": True, "last_ts": None,
+                            "inode": os.fstat(f.fileno()).st_ino}
+                lock.truncate(meta["entries"] * 24)  # drop entries of an interrupted update
+                if size > meta["covered"]:
+                    self._scan(f, lock, meta)
+                meta["probe"] = self._probe(f, meta["covered"])
+            self._write_meta(meta)
+        finally:
+            lock.close()
+        self.meta, self._entries = meta, None
+        return self
+
+    def _scan(self, f, out, meta: dict) -> None:
+        header = meta["header"]
+        ts_col = header.index("timestamp") if "timestamp" in header else 0
+        stride = meta["stride"]
+        f.seek(meta["covered"])
+        while True:
+            buf = f.read(SCAN_BYTES)
+            if not buf:
+                break
+            nl = np.flatnonzero(np.frombuffer(buf, dtype=np.uint8) == 10)
+            if len(nl) == 0:
+                break  # partial last line: wait until it is complete
+            complete = int(nl[-1]) + 1
+            starts = np.r_[0, nl[:-1] + 1]
+            rows = meta["rows"] + np.arange(len(starts))
+            pick = starts[rows % stride == 0]
+            if len(pick):
+                fields = [buf[s:buf.index(b"\n", s)].decode("utf-8", "replace").split(",") for s in pick]
+                ts = _parse_ns([x[ts_col] if len(x) > ts_col else None for x in fields])
+                ok = ts != np.iinfo(np.int64).min
+                entries = np.column_stack([ts, meta["covered"] + pick, rows[rows % stride == 0]])[ok]
+                if len(entries):
+                    last = meta["last_ts"]
+                    if (last is not None and entries[0, 0] < last) or np.any(np.diff(entries[:, 0]) < 0):
+                        meta["sorted"] = False
+                    meta["last_ts"] = int(entries[-1, 0])
+                    out.write(entries.astype("<i8").tobytes())
+                    meta["entries"] += len(entries)
+            meta["covered"] += complete
+            meta["rows"] += len(starts)
+            if complete < len(buf):
+                f.seek(meta["covered"])
+        out.flush()
+
+    def _write_meta(self, meta: dict) -> None:
+        tmp = self.meta_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp, self.meta_path)
+
+    def rebuild(self) -> "CsvIndex":
+        for p in (self.idx_path, self.meta_path):
+            if os.path.exists(p):
+                os.remove(p)
+        return self.update()
+
+    # --------- Lookups ---------
+    @property
+    def entries(self) -> np.ndarray:
+        """(n, 3) int64: timestamp ns, byte offset, row number."""
+        if self._entries is None:
+            if self.meta is None:
+                self.update()
+            n = self.meta["entries"]
+            raw = np.fromfile(self.idx_path, dtype="<i8", count=n * 3) if n else np.empty(0, "<i8")
+            self._entries = raw.reshape(-1, 3)
+        return self._entries
+
+    @property
+    def sorted(self) -> bool:
+        if self.meta is None:
+            self.update()
+        return bool(self.meta["sorted"])
+
+    def byte_range(self, start=None, end=None, last_n: Optional[int] = None) -> Tuple[int, Optional[int]]:
+        """
+        Bytes [lo, hi) that hold every row in [start, end] (hi None = to EOF) and,
+        with last_n, at least the last last_n rows before `end`. Whole blocks are returned, so
+        callers still filter by time exactly.
+        """
+        e = self.entries
+        lo, hi = len(self.meta["first_line"].encode("utf-8")), None
+        if not len(e):
+            return lo, hi
+        if start is not None:
+            i = int(np.searchsorted(e[:, 0], pd.Timestamp(start).value, side="left")) - 1
+            if i >= 0:
+                lo = int(e[i, 1])
+        stop_row = self.meta["rows"]
+        if end is not None:
+            j = int(np.searchsorted(e[:, 0], pd.Timestamp(end).value, side="right"))
+            if j < len(e):
+                hi, stop_row = int(e[j, 1]), int(e[j, 2])
+        if last_n is not None:
+            first_row = stop_row - int(last_n)
+            k = int(np.searchsorted(e[:, 2], first_row, side="right")) - 2  # one spare block
+            lo = max(lo, int(e[k, 1])) if k >= 0 else lo
+        return lo, hi
+
+    def read(self, start=None, end=None, last_n: Optional[int] = None, dtype=None) -> pd.DataFrame:
+        """Raw rows (timestamps not parsed) from the byte range for start/end/last_n."""
+        self.update()
+        lo, hi = self.byte_range(start, end, last_n)
+        with open(self.csv_path, "rb") as f:
+            f.seek(lo)
+            body = f.read() if hi is None else f.read(max(0, hi - lo))
+        body = body[:body.rfind(b"\n") + 1]  # ignore a partially written last line
+        header = self.meta["header"]
+        if not body.strip():
+            return pd.DataFrame({c: pd.Series(dtype=(dtype or {}).get(c, "object")) for c in header})
+        return pd.read_csv(io.BytesIO(body), names=header, header=None, dtype=dtype)
@@ -0,0 +1,129 @@
+# downsample.py
+# Chart-side data reduction: a PNG is only a few thousand pixels wide, so there is
+# no point handing matplotlib millions of points.
+#
+# - minmax_indices: per pixel column keep first/last/min/max (M4) -> the rendered
+#   line looks the same as with every point, extremes included.
+# - lttb_indices: Largest-Triangle-Three-Buckets, for a fixed point budget.
+# - fit_to_width: pick rows for a chart (optionally always keeping marker rows,
+#   e.g. BUY/SELL), automatic only when there are more points than pixels.
+# - reuse_figure: one cached Agg Figure per size instead of a new pyplot figure per chart.
+
+from typing import Iterable, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+ENABLED = True  # module-wide default for plot_*(downsample=None)
+_FIGURES: dict = {}
+
+
+def set_enabled(on: bool) -> None:
+    global ENABLED
+    ENABLED = bool(on)
+
+
+def minmax_indices(y, n_buckets: int) -> np.ndarray:
+    """Sorted row indices: first, last, min and max of each of n_buckets equal slices."""
+    y = np.asarray(y, dtype="float64")
+    n = len(y)
+    if n_buckets <= 0 or n <= 4 * n_buckets:
+        return np.arange(n)
+    size = -(-n // n_buckets)
+    rows = -(-n // size)
+    pad = rows * size - n
+    lo = np.concatenate([np.where(np.isnan(y), np.inf, y), np.full(pad, np.inf)]).reshape(rows, size)
+    hi = np.concatenate([np.where(np.isnan(y), -np.inf, y), np.full(pad, -np.inf)]).reshape(rows, size)
+    start = np.arange(rows) * size
+    idx = np.concatenate([
+        start, np.minimum(start + size, n) - 1,
+        start + lo.argmin(axis=1), start + hi.argmax(axis=1),
+    ])
+    return np.unique(np.minimum(idx, n - 1))
+
+
+def lttb_indices(x, y, n_out: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets: n_out row indices (first and last included)."""
+    x = np.asarray(x, dtype="float64")
+    y = np.asarray(y, dtype="float64")
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    out = np.empty(n_out, dtype=np.int64)
+    out[0], out[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], max(edges[i + 1], edges[i] + 1)
+        nlo, nhi = edges[i + 1], (edges[i + 2] if i + 2 < len(edges) else n)
+        nhi = max(nhi, nlo + 1)
+        nxt = y[nlo:nhi]
+        avg_x = x[nlo:nhi].mean()
+        avg_y = np.nanmean(nxt) if np.isfinite(nxt).any() else y[a]
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        area = np.where(np.isnan(area), -1.0, area)
+        a = lo + int(area.argmax())
+        out[i + 1] = a
+    return out
+
+
+def fit_to_width(
+    df: pd.DataFrame,
+    cols: Sequence[str],
+    width: int,
+    method: str = "minmax",
+    keep: Optional[Iterable[bool]] = None,
+    x: str = "timestamp",
+    enabled: Optional[bool] = None,
+) -> pd.DataFrame:
+    """
+    Rows of df needed to draw `cols` at `width` pixels. A no-op when disabled or
+    when there are no more rows than pixels. keep (bool mask) rows are always kept.
+    """
+    enabled = ENABLED if enabled is None else enabled
+    if not enabled or len(df) <= width:
+        return df
+    cols = [c for c in cols if c in df.columns]
+    parts = []
+    for c in cols:
+        y = df[c].to_numpy(dtype="float64")
+        if method == "minmax":
+            parts.append(minmax_indices(y, width))
+        elif method == "lttb":
+            xs = pd.to_datetime(df[x]).to_numpy(dtype="datetime64[ns]").view("int64") if x in df.columns \
+                else np.arange(len(df))
+            parts.append(lttb_indices(xs, y, 2 * width))
+        else:
+            raise ValueError(f"Unknown downsampling method {method!r} (use 'minmax' or 'lttb')")
+    if keep is not None:
+        parts.append(np.flatnonzero(np.asarray(keep, dtype=bool)))
+    if not parts:
+        return df
+    return df.iloc[np.unique(np.concatenate(parts))]
+
+
+def pixel_width(fig) -> int:
+    return int(fig.get_size_inches()[0] * fig.dpi)
+
+
+def reuse_figure(figsize: tuple, nrows: int = 1):
+    """
+    (fig, ax) on a cached Agg Figure of this size, cleared for the next chart;
+    with nrows > 1, ax is an array of stacked axes sharing the x axis.
+    """
+    fig = _FIGURES.get(figsize)
+    if fig is None:
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        fig = Figure(figsize=figsize)
+        FigureCanvasAgg(fig)
+        _FIGURES[figsize] = fig
+    else:
+        fig.clear()
+    if nrows > 1:
+        return fig, fig.subplots(nrows, 1, sharex=True)
+    return fig, fig.subplots()
+
+
+def release_figures() -> None:
+    _FIGURES.clear()
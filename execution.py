@@ -0,0 +1,225 @@
+# execution.py
+# Execution simulation for the long-only backtest: when orders fill, what they
+# cost, and protective exits.
+#
+# - fill="close": trade at the close of the bar that produced the signal (what
+#   backtest_long_only has always done); fill="next": trade at the next bar.
+# - latency: extra bars (ticks) between the decision and the fill.
+# - slippage: FixedSlippage (bps), VolatilitySlippage (k x rolling std of returns)
+#   or SpreadSlippage (half the quoted spread), charged with the fee on every fill.
+# - stop_loss / take_profit: fractions of the entry price, checked on each bar's
+#   price; after a protective exit the strategy waits for the next BUY.
+# Everything is array math except the stop/take-profit pass, which loops over
+# trades (not bars) and scans each trade's bars in growing NumPy slices.
+
+from typing import Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from strategy import BUY, positions_from_codes
+
+FILLS = ("close", "next")
+# exit_reason codes / labels
+NO_EXIT, EXIT_SIGNAL, EXIT_STOP, EXIT_TAKE = 0, 1, 2, 3
+EXIT_LABELS = ["", "signal", "stop_loss", "take_profit"]
+
+
+# --------- Slippage models ---------
+# cost(price, fills) -> fraction of the traded value lost on each fill bar
+# (a scalar or one value per index in `fills`); only fill bars are ever priced.
+class FixedSlippage:
+    """Constant cost per fill, in bps of the price."""
+
+    def __init__(self, bps: float = 5.0):
+        self.bps = float(bps)
+
+    def cost(self, price: np.ndarray, fills: np.ndarray) -> Union[float, np.ndarray]:
+        return self.bps / 10000.0
+
+
+class VolatilitySlippage:
+    """k x the std of the last `window` bar returns: fills cost more when the market moves fast."""
+
+    def __init__(self, k: float = 0.5, window: int = 20):
+        self.k = float(k)
+        self.window = int(window)
+
+    def cost(self, price: np.ndarray, fills: np.ndarray) -> np.ndarray:
+        w = self.window
+        padded = np.r_[np.full(w, np.nan), price]
+        rows = np.lib.stride_tricks.sliding_window_view(padded, w + 1)[fills]  # price[i-w .. i]
+        ret = rows[:, 1:] / rows[:, :-1] - 1
+        ok = np.isfinite(ret)
+        n = ok.sum(axis=1)
+        ret = np.where(ok, ret, 0.0)
+        mean = ret.sum(axis=1) / np.maximum(n, 1)
+        var = (np.where(ok, ret - mean[:, None], 0.0) ** 2).sum(axis=1) / np.maximum(n - 1, 1)
+        return self.k * np.where(n >= 2, np.sqrt(var), 0.0)
+
+
+class SpreadSlippage:
+    """
+    Half the bid/ask spread per fill. spread is in price units (a scalar or one
+    value per bar, e.g. an ask - bid column); bps gives a constant spread instead.
+    """
+
+    def __init__(self, spread=None, bps: Optional[float] = None):
+        if (spread is None) == (bps is None):
+            raise ValueError("SpreadSlippage needs exactly one of spread or bps")
+        self.spread = None if spread is None else np.asarray(spread, dtype="float64")
+        self.bps = bps
+
+    def cost(self, price: np.ndarray, fills: np.ndarray) -> Union[float, np.ndarray]:
+        if self.bps is not None:
+            return self.bps / 2 / 10000.0
+        spread = self.spread[fills] if self.spread.ndim else self.spread
+        return np.nan_to_num(spread / 2 / price[fills], nan=0.0)
+
+
+def parse_slippage(spec: str):
+    """CLI spec -> model: 'fixed:5', 'vol:0.5:20', 'spread:2' (bps); '' -> None."""
+    if not spec:
+        return None
+    kind, *args = spec.split(":")
+    args = [float(a) for a in args]
+    if kind == "fixed":
+        return FixedSlippage(*args)
+    if kind == "vol":
+        return VolatilitySlippage(args[0] if args else 0.5, int(args[1]) if len(args) > 1 else 20)
+    if kind == "spread":
+        return SpreadSlippage(bps=args[0] if args else 2.0)
+    raise ValueError(f"Unknown slippage model {spec!r} (use fixed:BPS, vol:K:WINDOW or spread:BPS)")
+
+
+# --------- Helpers ---------
+def _first_cross(price: np.ndarray, start: int, stop: int, lo: float, hi: float) -> int:
+    """First i in [start, stop) with price <= lo or >= hi, else -1 (scans in doubling slices)."""
+    step = 256
+    while start < stop:
+        end = min(stop, start + step)
+        seg = price[start:end]
+        hit = np.flatnonzero((seg <= lo) | (seg >= hi))
+        if len(hit):
+            return start + int(hit[0])
+        start, step = end, step * 2
+    return -1
+
+
+def _apply_stops(price: np.ndarray, held: np.ndarray, codes: np.ndarray, reason: np.ndarray,
+                 stop_loss: Optional[float], take_profit: Optional[float]) -> None:
+    """Cut trades at their stop/take-profit level in place; one iteration per trade."""
+    buys = np.flatnonzero(codes == BUY)
+    edges = np.diff(np.r_[np.int8(0), held, np.int8(0)])
+    for start, end in zip(np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)):
+        entry = start
+        while entry < end:
+            ref = price[entry]
+            lo = ref * (1 - stop_loss) if stop_loss else -np.inf
+            hi = ref * (1 + take_profit) if take_profit else np.inf
+            hit = _first_cross(price, entry + 1, end, lo, hi)
+            if hit < 0:
+                break
+            reason[hit] = EXIT_STOP if price[hit] <= lo else EXIT_TAKE
+            k = np.searchsorted(buys, hit, side="right")
+            entry = int(buys[k]) if k < len(buys) and buys[k] < end else end
+            held[hit:entry] = 0
+
+
+# --------- Simulation ---------
+def simulate(
+    price,
+    codes,
+    fee_bps: float = 10.0,
+    fill: str = "close",
+    latency: int = 0,
+    slippage=None,
+    stop_loss: Optional[float] = None,
+    take_profit: Optional[float] = None,
+) -> dict:
+    """
+    Long-only execution of HOLD/BUY/SELL codes over a price series.
+    Returns arrays (one value per bar):
+      - held: position actually held after each bar's fill (int8)
+      - ret: close-to-close price return
+      - cost: fee + slippage charged on that bar's fill (fraction of equity)
+      - strategy_ret, equity
+      - exit_reason: EXIT_* code on bars where a trade was closed
+    """
+    if fill not in FILLS:
+        raise ValueError(f"fill must be one of {FILLS}, got {fill!r}")
+    price = np.asarray(price, dtype="float64")
+    codes = np.asarray(codes, dtype=np.int8)
+    n = len(price)
+    delay = int(latency) + (fill == "next")
+    if delay:
+        delayed = np.zeros_like(codes)
+        if delay < n:
+            delayed[delay:] = codes[:n - delay]
+        codes = delayed
+
+    held = positions_from_codes(codes)
+    reason = np.zeros(n, dtype=np.int8)
+    if stop_loss or take_profit:
+        _apply_stops(price, held, codes, reason, stop_loss, take_profit)
+
+    ret = np.zeros(n)
+    if n > 1:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ret[1:] = price[1:] / price[:-1] - 1
+        ret[~np.isfinite(ret)] = 0.0
+    turnover = np.zeros(n, dtype=bool)
+    turnover[1:] = held[1:] != held[:-1]  # like backtest_long_only: no fee on bar 0
+    exits = np.zeros(n, dtype=bool)
+    exits[1:] = (held[1:] == 0) & (held[:-1] == 1)
+    reason[exits & (reason == NO_EXIT)] = EXIT_SIGNAL
+
+    fills = np.flatnonzero(turnover)
+    cost = np.zeros(n)
+    cost[fills] = fee_bps / 10000.0 + (slippage.cost(price, fills) if slippage is not None else 0.0)
+    strat = -cost
+    strat[1:] += held[:-1] * ret[1:]
+    return {"held": held, "ret": ret, "cost": cost, "strategy_ret": strat,
+            "equity": np.cumprod(1.0 + strat), "exit_reason": reason}
+
+
+class ExecutionModel:
+    """
+    Fill timing, latency, slippage and protective exits for backtest_long_only:
+      backtest_long_only(df, execution=ExecutionModel(fill="next", latency=2,
+                         slippage=FixedSlippage(5), stop_loss=0.02))
+    """
+
+    def __init__(self, fill: str = "close", latency: int = 0, slippage=None,
+                 stop_loss: Optional[float] = None, take_profit: Optional[float] = None):
+        if fill not in FILLS:
+            raise ValueError(f"fill must be one of {FILLS}, got {fill!r}")
+        if latency < 0:
+            raise ValueError(f"latency must be >= 0 ticks, got {latency}")
+        self.fill = fill
+        self.latency = int(latency)
+        self.slippage = slippage
+        self.stop_loss = stop_loss
+        self.take_profit = take_profit
+
+    def simulate(self, price, codes, fee_bps: float = 10.0) -> dict:
+        return simulate(price, codes, fee_bps, self.fill, self.latency, self.slippage,
+                        self.stop_loss, self.take_profit)
+
+
+def trade_log(df_bt: pd.DataFrame, col: str = "BTC_USDT") -> pd.DataFrame:
+    """One row per round trip of a backtest frame with a 'held' column (entry/exit time, price, reason)."""
+    held = df_bt["held"].to_numpy(dtype=np.int8)
+    edges = np.diff(np.r_[np.int8(0), held, np.int8(0)])
+    entries, exits = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+    ts, price = df_bt["timestamp"].to_numpy(), df_bt[col].to_numpy(dtype="float64")
+    still_open = exits == len(held)
+    last = np.minimum(exits, len(held) - 1)
+    reason = df_bt["exit_reason"].astype(str).to_numpy()[last] if len(held) else np.array([], dtype=object)
+    return pd.DataFrame({
+        "entry_time": ts[entries], "entry_price": price[entries],
+        "exit_time": ts[last], "exit_price": price[last],
+        "reason": np.where(still_open, "open", reason),
+        "return": price[last] / price[entries] - 1 if len(held) else np.array([]),
+        "bars": last - entries,
+    })
@@ -0,0 +1,188 @@
+# indicator_cache.py
+# Memoized SMA/RSI series.
+#
+# - Entries are keyed by (indicator, parameters, column, first row) and store the
+#   values, the number of rows they cover, a fingerprint of those rows and the
+#   chunked-indicator state at the last row.
+# - Same data again -> the stored values (after a hash check).
+#   Data that only grew -> only the new rows are computed, from the saved state.
+#   Anything else -> full recompute.
+# - In-memory LRU bounded by bytes, plus an optional on-disk tier (evicts the
+#   least recently used files once it exceeds its byte budget).
+
+import os
+import json
+import math
+import hashlib
+from collections import OrderedDict
+from typing import Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+from streaming import ChunkedRSI, ChunkedSMA, restore_indicator
+
+
+def _arrays(df: pd.DataFrame, col: str):
+    x = df[col].to_numpy(dtype="float64")
+    if "timestamp" in df.columns:
+        ts = pd.to_datetime(df["timestamp"]).to_numpy(dtype="datetime64[ns]").view("int64")
+    else:
+        ts = np.empty(0, dtype="int64")
+    return ts, x
+
+
+def fingerprint(ts: np.ndarray, x: np.ndarray, n: int) -> str:
+    """Hash of the first n rows (timestamps + values)."""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(np.ascontiguousarray(ts[:n]).tobytes())
+    h.update(np.ascontiguousarray(x[:n]).tobytes())
+    h.update(str(n).encode())
+    return h.hexdigest()
+
+
+class IndicatorCache:
+    """
+    LRU cache for indicator series.
+    max_bytes bounds the in-memory tier; disk_dir enables the on-disk tier,
+    bounded by max_disk_bytes. stats counts hits / extended / misses.
+    """
+
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024, disk_dir: Optional[str] = None,
+                 max_disk_bytes: int = 1024 * 1024 * 1024):
+        self.max_bytes = int(max_bytes)
+        self.disk_dir = disk_dir
+        self.max_disk_bytes = int(max_disk_bytes)
+        self._mem: "OrderedDict[str, dict]" = OrderedDict()
+        self._mem_bytes = 0
+        self.stats = {"hits": 0, "extended": 0, "misses": 0}
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    # --------- Public API ---------
+    def sma(self, df: pd.DataFrame, col: str = "BTC_USDT", window: int = 20) -> np.ndarray:
+        return self._series(df, col, f"sma:{int(window)}", lambda: ChunkedSMA(window))
+
+    def rsi(self, df: pd.DataFrame, col: str = "BTC_USDT", period: int = 14) -> np.ndarray:
+        return self._series(df, col, f"rsi:{int(period)}", lambda: ChunkedRSI(period))
+
+    def add_sma(self, df: pd.DataFrame, col="BTC_USDT", windows: Iterable[int] = (5, 20)) -> pd.DataFrame:
+        """Cached analysis.add_sma."""
+        out = df.copy()
+        for w in windows:
+            out[f"SMA_{w}"] = self.sma(df, col, w)
+        return out
+
+    def add_rsi(self, df: pd.DataFrame, col="BTC_USDT", period: int = 14) -> pd.DataFrame:
+        """Cached analysis.add_rsi."""
+        out = df.copy()
+        out[f"RSI_{period}"] = self.rsi(df, col, period)
+        return out
+
+    def clear(self) -> None:
+        self._mem.clear()
+        self._mem_bytes = 0
+
+    # --------- Lookup / extend ---------
+    def _series(self, df: pd.DataFrame, col: str, params: str, make) -> np.ndarray:
+        ts, x = _arrays(df, col)
+        n_new = len(x)
+        anchor = fingerprint(ts, x, min(n_new, 1))
+        key = hashlib.blake2b(f"{params}|{col}|{anchor}".encode(), digest_size=16).hexdigest()
+
+        entry = self._get(key)
+        if entry is not None:
+            n = entry["n"]
+            if n <= n_new and fingerprint(ts, x, n) == entry["hash"]:
+                if n == n_new:
+                    self.stats["hits"] += 1
+                    return entry["values"].copy()
+                # Extending past a trailing gap would need the EWM's aged weight: recompute
+                if n and math.isfinite(x[n - 1]):
+                    ind = restore_indicator(entry["state"])
+                    values = np.concatenate([entry["values"], ind.update(x[n:])])
+                    self.stats["extended"] += 1
+                    self._put(key, values, ts, x, ind)
+                    return values.copy()
+
+        self.stats["misses"] += 1
+        ind = make()
+        values = ind.update(x)
+        self._put(key, values, ts, x, ind)
+        return values.copy()
+
+    def _put(self, key: str, values: np.ndarray, ts, x, ind) -> None:
+        entry = {"n": len(values), "hash": fingerprint(ts, x, len(values)),
+                 "state": ind.snapshot(), "values": values}
+        self._remember(key, entry)
+        if self.disk_dir:
+            self._save(key, entry)
+
+    def _get(self, key: str) -> Optional[dict]:
+        entry = self._mem.get(key)
+        if entry is not None:
+            self._mem.move_to_end(key)
+            return entry
+        if self.disk_dir:
+            entry = self._load(key)
+            if entry is not None:
+                self._remember(key, entry)
+        return entry
+
+    def _remember(self, key: str, entry: dict) -> None:
+        old = self._mem.pop(key, None)
+        if old is not None:
+            self._mem_bytes -= old["values"].nbytes
+        if entry["values"].nbytes > self.max_bytes:
+            return
+        self._mem[key] = entry
+        self._mem_bytes += entry["values"].nbytes
+        while self._mem_bytes > self.max_bytes:
+            _, evicted = self._mem.popitem(last=False)
+            self._mem_bytes -= evicted["values"].nbytes
+
+    # --------- Disk tier ---------
+    def _paths(self, key: str):
+        base = os.path.join(self.disk_dir, key)
+        return base + ".npy", base + ".json"
+
+    def _save(self, key: str, entry: dict) -> None:
+        npy, meta = self._paths(key)
+        with open(npy + ".tmp", "wb") as f:
+            np.save(f, entry["values"])
+        with open(meta + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({k: entry[k] for k in ("n", "hash", "state")}, f)
+        os.replace(npy + ".tmp", npy)
+        os.replace(meta + ".tmp", meta)
+        self._evict_disk()
+
+    def _load(self, key: str) -> Optional[dict]:
+        npy, meta = self._paths(key)
+        try:
+            with open(meta, encoding="utf-8") as f:
+                entry = json.load(f)
+            entry["values"] = np.load(npy)
+        except (OSError, ValueError):
+            return None
+        if len(entry["values"]) != entry["n"]:
+            return None
+        os.utime(npy)  # mtime doubles as the disk tier's LRU clock
+        return entry
+
+    def _evict_disk(self) -> None:
+        files = []
+        for name in os.listdir(self.disk_dir):
+            if name.endswith(".npy"):
+                path = os.path.join(self.disk_dir, name)
+                st = os.stat(path)
+                files.append((st.st_mtime, st.st_size, path))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_disk_bytes:
+                break
+            for p in (path, path[:-4] + ".json"):
+                try:
+                    os.remove(p)
+                except OSError:
+                    pass
+            total -= size
@@ -0,0 +1,224 @@
+# instrument.py
+# Lightweight timers/counters for the hot paths, plus a cProfile hook for the CLIs.
+#
+# Disabled by default: timer() then hands back one shared no-op context manager
+# and count()/record() return after a single flag check, so instrumented code
+# costs next to nothing in normal runs. Enable with enable() (or a CLI flag, see
+# add_cli_flags/cli_session) and export with write_jsonl / write_prometheus.
+
+import os
+import re
+import json
+import time
+import cProfile
+import pstats
+import functools
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+_enabled = os.environ.get("CML_INSTRUMENT", "") not in ("", "0")
+_timers: Dict[str, list] = {}  # name -> [count, total, min, max] (seconds)
+_counters: Dict[str, float] = {}
+_export: Optional[dict] = None  # set by cli_session: paths + interval for periodic_export
+
+
+def enable(on: bool = True) -> None:
+    global _enabled
+    _enabled = bool(on)
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+def reset() -> None:
+    _timers.clear()
+    _counters.clear()
+
+
+def record(name: str, seconds: float) -> None:
+    """Add one timing sample."""
+    if not _enabled:
+        return
+    t = _timers.get(name)
+    if t is None:
+        _timers[name] = [1, seconds, seconds, seconds]
+    else:
+        t[0] += 1
+        t[1] += seconds
+        if seconds < t[2]:
+            t[2] = seconds
+        if seconds > t[3]:
+            t[3] = seconds
+
+
+def count(name: str, n: float = 1) -> None:
+    if _enabled:
+        _counters[name] = _counters.get(name, 0) + n
+
+
+class _Timer:
+    __slots__ = ("name", "t0")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        record(self.name, time.perf_counter() - self.t0)
+        return False
+
+
+class _NoopTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP = _NoopTimer()
+
+
+def timer(name: str):
+    """`with timer("fetch"): ...` records the block's wall time when enabled."""
+    return _Timer(name) if _enabled else _NOOP
+
+
+def timed(name: Optional[str] = None):
+    """Decorator version of timer(); defaults to the function's qualified name."""
+    def wrap(fn):
+        label = name or f"{fn.__module__}.{fn.__qualname__}"
+
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            t0 = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                record(label, time.perf_counter() - t0)
+        return inner
+    return wrap
+
+
+# --------- Export ---------
+def snapshot() -> dict:
+    return {
+        "timers": {k: {"count": c, "total": tot, "min": lo, "max": hi, "mean": tot / c}
+                   for k, (c, tot, lo, hi) in _timers.items()},
+        "counters": dict(_counters),
+    }
+
+
+def write_jsonl(path: str, **labels) -> str:
+    """Append one JSON line per metric (with a timestamp and any labels)."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    now = time.time()
+    snap = snapshot()
+    with open(path, "a", encoding="utf-8") as f:
+        for name, t in snap["timers"].items():
+            f.write(json.dumps({"time": now, "metric": name, "type": "timer", **labels, **t}) + "\n")
+        for name, v in snap["counters"].items():
+            f.write(json.dumps({"time": now, "metric": name, "type": "counter", **labels, "value": v}) + "\n")
+    return path
+
+
+def _prom_name(prefix: str, name: str) -> str:
+    return re.sub(r"[^a-zA-Z0-9_]", "_", f"{prefix}_{name}")
+
+
+def prometheus_text(prefix: str = "cml") -> str:
+    """Prometheus text exposition: timers as summaries (+ max gauge), counters as counters."""
+    lines = []
+    for name, (c, tot, _lo, hi) in sorted(_timers.items()):
+        m = _prom_name(prefix, name) + "_seconds"
+        lines += [f"# TYPE {m} summary", f"{m}_count {c}", f"{m}_sum {tot:.9f}",
+                  f"# TYPE {m}_max gauge", f"{m}_max {hi:.9f}"]
+    for name, v in sorted(_counters.items()):
+        m = _prom_name(prefix, name) + "_total"
+        lines += [f"# TYPE {m} counter", f"{m} {v:g}"]
+    return "\n".join(lines) + "\n"
+
+
+def write_prometheus(path: str, prefix: str = "cml") -> str:
+    """Write the current metrics for a node_exporter textfile collector (atomic replace)."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        f.write(prometheus_text(prefix))
+    os.replace(path + ".tmp", path)
+    return path
+
+
+def periodic_export() -> None:
+    """For long-running loops: rewrite the CLI's metrics files every `every` seconds."""
+    if _export is None:
+        return
+    now = time.monotonic()
+    if now - _export["last"] < _export["every"]:
+        return
+    _export["last"] = now
+    if _export["prom"]:
+        write_prometheus(_export["prom"])
+    if _export["metrics"]:
+        write_jsonl(_export["metrics"], run=_export["run"])
+
+
+# --------- Profiling / CLI ---------
+@contextmanager
+def profile(path: Optional[str] = None, top: int = 25):
+    """cProfile the block; dump pstats to `path` (if given) and print the top entries."""
+    prof = cProfile.Profile()
+    prof.enable()
+    try:
+        yield prof
+    finally:
+        prof.disable()
+        if path:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            prof.dump_stats(path)
+            print(f"🧪 Profile saved: {path} (python -m pstats {path})")
+        pstats.Stats(prof).sort_stats("cumulative").print_stats(top)
+
+
+def add_cli_flags(p) -> None:
+    """--profile / --metrics / --prom for an argparse parser."""
+    p.add_argument("--profile", nargs="?", const="outputs/profile.pstats", default=None,
+                   help="cProfile the run and dump pstats (default path: outputs/profile.pstats)")
+    p.add_argument("--metrics", default=None, help="Enable timers/counters and append them to this JSONL file")
+    p.add_argument("--prom", default=None, help="Enable timers/counters and write Prometheus text to this file")
+    p.add_argument("--metrics-every", type=float, default=60.0,
+                   help="Seconds between metric exports in long-running loops (default: 60)")
+
+
+@contextmanager
+def cli_session(args, name: str):
+    """Apply add_cli_flags options around a CLI run; metrics are written even on Ctrl+C."""
+    global _export
+    want_metrics = bool(getattr(args, "metrics", None) or getattr(args, "prom", None))
+    if want_metrics:
+        enable()
+        _export = {"metrics": args.metrics, "prom": args.prom, "run": name,
+                   "every": getattr(args, "metrics_every", 60.0), "last": time.monotonic()}
+    prof = profile(args.profile) if getattr(args, "profile", None) else None
+    try:
+        if prof is None:
+            yield
+        else:
+            with prof:
+                yield
+    finally:
+        _export = None
+        if getattr(args, "metrics", None):
+            write_jsonl(args.metrics, run=name)
+        if getattr(args, "prom", None):
+            write_prometheus(args.prom)
+        if want_metrics:
+            for k, t in sorted(snapshot()["timers"].items()):
+                print(f"⏱️ {k}: {t['count']}x, total {t['total']:.4f}s, max {t['max']:.4f}s")
@@ -0,0 +1,187 @@
+# metrics.py
+# Performance metrics on plain NumPy arrays.
+#
+# - batch_metrics: Sharpe, Sortino, max drawdown (+ duration), Calmar, win rate
+#   and turnover for every column of a (time x curve) array, sharing the
+#   intermediates (finite mask, mean, deviations, running peak) between metrics.
+# - summarize / sharpe / sortino / drawdown: the same for a single curve.
+# - rolling_*: trailing-window versions for live monitoring.
+#
+# Conventions match the original analysis.calculate_sharpe/calculate_drawdown:
+# non-finite returns are ignored, and a Sharpe/Sortino with fewer than two
+# returns or a (near-)zero denominator is NaN.
+
+import math
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+EPS = 1e-9  # std below this counts as zero (avoids astronomical ratios)
+
+
+def _as_2d(a) -> np.ndarray:
+    a = np.asarray(a, dtype="float64")
+    return a[:, None] if a.ndim == 1 else a
+
+
+def _ratio_columns(r: np.ndarray, periods_per_year: float, risk_free: float):
+    """(sharpe, sortino) per column of a finite returns array."""
+    k = r.shape[1]
+    if r.shape[0] < 2:
+        return np.full(k, np.nan), np.full(k, np.nan)
+    excess = r - risk_free / periods_per_year if risk_free else r
+    mu = excess.mean(axis=0)
+    sigma = excess.std(axis=0, ddof=1)
+    downside = np.sqrt((np.minimum(excess, 0.0) ** 2).mean(axis=0))
+    scale = math.sqrt(periods_per_year)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        sharpe = mu / np.where(sigma < EPS, np.nan, sigma) * scale
+        sortino = mu / np.where(downside < EPS, np.nan, downside) * scale
+    return sharpe, sortino
+
+
+def _drawdown_columns(equity: np.ndarray):
+    """(dd array, max drawdown, longest underwater stretch in bars) per column."""
+    n, k = equity.shape
+    if n == 0:
+        return equity.copy(), np.zeros(k), np.zeros(k, dtype=np.int64)
+    peak = np.fmax.accumulate(equity, axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        dd = equity / peak - 1.0
+    valid = ~np.isnan(dd)
+    max_dd = np.where(valid.any(axis=0), np.min(np.where(valid, dd, np.inf), axis=0), np.nan)
+    t = np.arange(n)[:, None]
+    last_peak = np.maximum.accumulate(np.where(dd >= 0, t, -1), axis=0)
+    # Bars since the last peak (a curve that starts under water counts from bar 0)
+    duration = (t - np.maximum(last_peak, 0) + (last_peak < 0)).max(axis=0)
+    duration = np.where((dd < 0).any(axis=0), duration, 0)
+    return dd, max_dd, duration
+
+
+def batch_metrics(
+    returns,
+    equity=None,
+    positions=None,
+    periods_per_year: float = 252.0,
+    risk_free: float = 0.0,
+) -> dict:
+    """
+    Metrics for every column of a (time x curve) returns array.
+    equity defaults to cumprod(1 + returns) (non-finite returns count as 0);
+    positions, if given, feed turnover (mean |position change| per bar, first bar
+    measured from flat). Returns a dict of 1-D arrays:
+      sharpe, sortino, max_drawdown, max_dd_duration, calmar, win_rate, turnover
+    """
+    r = _as_2d(returns)
+    n, k = r.shape
+    finite = np.isfinite(r)
+    all_finite = bool(finite.all())
+
+    if all_finite:
+        sharpe, sortino = _ratio_columns(r, periods_per_year, risk_free)
+    else:
+        sharpe, sortino = np.full(k, np.nan), np.full(k, np.nan)
+        for j in range(k):
+            col = r[finite[:, j], j][:, None]
+            sharpe[j], sortino[j] = (v[0] for v in _ratio_columns(col, periods_per_year, risk_free))
+
+    if equity is None:
+        equity = np.cumprod(1.0 + (r if all_finite else np.where(finite, r, 0.0)), axis=0)
+    eq = _as_2d(equity)
+    _, max_dd, duration = _drawdown_columns(eq)
+
+    # Calmar: annualized growth of the curve over |max drawdown|
+    with np.errstate(invalid="ignore", divide="ignore"):
+        growth = eq[-1] if n else np.ones(k)
+        cagr = np.power(growth, periods_per_year / max(n, 1)) - 1.0
+        calmar = cagr / np.where(max_dd < 0, -max_dd, np.nan)
+
+    nonzero = finite & (r != 0)
+    wins = (nonzero & (r > 0)).sum(axis=0)
+    trades = nonzero.sum(axis=0)
+    win_rate = np.where(trades > 0, wins / np.maximum(trades, 1), np.nan)
+
+    if positions is not None:
+        pos = _as_2d(positions)
+        changes = np.abs(np.diff(pos, axis=0, prepend=0.0))
+        turnover = changes.mean(axis=0) if len(pos) else np.zeros(pos.shape[1])
+    else:
+        turnover = np.full(k, np.nan)
+
+    return {
+        "sharpe": sharpe, "sortino": sortino, "max_drawdown": max_dd,
+        "max_dd_duration": duration, "calmar": calmar, "win_rate": win_rate,
+        "turnover": turnover,
+    }
+
+
+def summarize(returns, equity=None, positions=None, periods_per_year: float = 252.0,
+              risk_free: float = 0.0) -> dict:
+    """batch_metrics for a single curve, as plain floats."""
+    res = batch_metrics(returns, equity, positions, periods_per_year, risk_free)
+    out = {k: float(v[0]) for k, v in res.items()}
+    out["max_dd_duration"] = int(res["max_dd_duration"][0])
+    return out
+
+
+def sharpe(returns, periods_per_year: float = 252.0, risk_free: float = 0.0) -> float:
+    r = np.asarray(returns, dtype="float64").ravel()
+    r = r[np.isfinite(r)][:, None]
+    return float(_ratio_columns(r, periods_per_year, risk_free)[0][0])
+
+
+def sortino(returns, periods_per_year: float = 252.0, risk_free: float = 0.0) -> float:
+    r = np.asarray(returns, dtype="float64").ravel()
+    r = r[np.isfinite(r)][:, None]
+    return float(_ratio_columns(r, periods_per_year, risk_free)[1][0])
+
+
+def drawdown(equity) -> dict:
+    """max_drawdown (<= 0), dd_series, and max_dd_duration (bars below the running peak)."""
+    dd, max_dd, duration = _drawdown_columns(_as_2d(np.asarray(equity, dtype="float64").ravel()))
+    return {"max_drawdown": float(max_dd[0]), "dd_series": dd[:, 0], "max_dd_duration": int(duration[0])}
+
+
+# --------- Rolling (live monitoring) ---------
+def _window_sums(x: np.ndarray, window: int) -> np.ndarray:
+    c = np.concatenate([np.zeros((1,) + x.shape[1:]), np.cumsum(x, axis=0)])
+    lo = np.maximum(np.arange(1, len(x) + 1) - window, 0)
+    return c[1:] - c[lo]
+
+
+def _rolling_ratio(returns, window: int, periods_per_year: float, downside: bool) -> np.ndarray:
+    r = np.asarray(returns, dtype="float64")
+    finite = np.isfinite(r)
+    x = np.where(finite, r, 0.0)
+    center = x[finite].mean() if finite.any() else 0.0  # keeps the cumsums well conditioned
+    y = x - center * finite
+    n = _window_sums(finite.astype("float64"), window)
+    s = _window_sums(y, window)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = s / n + center
+        if downside:
+            neg = np.minimum(x, 0.0)
+            denom = np.sqrt(_window_sums(neg * neg, window) / n)
+        else:
+            denom = np.sqrt(np.maximum(_window_sums(y * y, window) - s * s / n, 0.0) / (n - 1))
+        out = mean / np.where(denom < EPS, np.nan, denom) * math.sqrt(periods_per_year)
+    out[n < 2] = np.nan
+    return out
+
+
+def rolling_sharpe(returns, window: int, periods_per_year: float = 252.0) -> np.ndarray:
+    """Sharpe of each trailing `window` of returns (NaN until two finite returns)."""
+    return _rolling_ratio(returns, window, periods_per_year, downside=False)
+
+
+def rolling_sortino(returns, window: int, periods_per_year: float = 252.0) -> np.ndarray:
+    """Sortino of each trailing `window` of returns."""
+    return _rolling_ratio(returns, window, periods_per_year, downside=True)
+
+
+def rolling_drawdown(equity, window: Optional[int] = None) -> np.ndarray:
+    """Drawdown from the peak of the trailing `window` bars (None = since inception)."""
+    eq = pd.Series(np.asarray(equity, dtype="float64"))
+    peak = eq.cummax() if window is None else eq.rolling(window, min_periods=1).max()
+    return (eq / peak - 1.0).to_numpy()
@@ -0,0 +1,179 @@
+# paper_trader.py
+# Live paper trading: each new logged row updates indicators, the BUY/SELL
+# state machine and paper equity in O(1), mirroring strategy.generate_signals
+# + backtest_long_only. Runs against the live logger or a replayed CSV feed.
+
+import os
+import csv
+import time
+import argparse
+from collections import deque
+from typing import Iterable, Iterator, Optional
+
+from analysis import REQUIRED_COLS
+from price_tracker import CsvWriter
+from streaming import StreamingSMA, StreamingRSI
+
+SIGNAL_COLUMNS = ["timestamp", "BTC_USDT", "SMA_20", "RSI_14", "signal", "position", "strategy_ret", "equity"]
+
+
+class PaperTrader:
+    """
+    Incremental version of the strategy module's long-only logic:
+      - BUY when RSI_14 < 30 and price > SMA_20, SELL when RSI_14 > 70 (SELL wins)
+      - close-to-close returns while in position, fee_bps charged on position changes
+    Feeding rows in time order yields the same signal/position/strategy_ret/equity
+    values as backtest_long_only(generate_signals(df)).
+    """
+
+    def __init__(self, col: str = "BTC_USDT", fee_bps: float = 10.0,
+                 out_path: Optional[str] = None, latency_window: int = 10000):
+        self.col = col
+        self.required = list(dict.fromkeys(["timestamp", *REQUIRED_COLS, col]))
+        self.fee = fee_bps / 10000.0
+        self.sma = StreamingSMA(20)
+        self.rsi = StreamingRSI(14)
+        self.position = 0
+        self.equity = 1.0
+        self.trades = 0
+        self.rows = 0
+        self._last_price: Optional[float] = None
+        self._latencies = deque(maxlen=latency_window)
+        self._writer = None
+        if out_path:
+            d = os.path.dirname(out_path)
+            if d:
+                os.makedirs(d, exist_ok=True)
+            columns = [col if c == "BTC_USDT" else c for c in SIGNAL_COLUMNS]
+            self._writer = CsvWriter(out_path, columns=columns)
+
+    def on_tick(self, row: dict) -> Optional[dict]:
+        """
+        Process one logger row; returns the signal row, or None for rows that
+        load_prices drops (an empty timestamp or required price, e.g. a partial tick).
+        """
+        t0 = time.perf_counter()
+        for c in self.required:
+            v = row.get(c, 0.0 if c != self.col else None)  # absent column: only our own price matters
+            if v is None or v == "" or v != v:
+                return None
+        price = float(row[self.col])
+
+        sma = self.sma.update(price)
+        rsi = self.rsi.update(price)
+        signal = ""
+        if rsi > 70:
+            signal = "SELL"
+        elif rsi < 30 and price > sma:
+            signal = "BUY"
+
+        prev_pos = self.position
+        if signal == "BUY":
+            self.position = 1
+        elif signal == "SELL":
+            self.position = 0
+
+        ret = 0.0 if self._last_price is None else price / self._last_price - 1
+        change = 0 if self._last_price is None else abs(self.position - prev_pos)
+        strategy_ret = prev_pos * ret - change * self.fee
+        self.equity *= 1.0 + strategy_ret
+        self.trades += change
+        self._last_price = price
+        self.rows += 1
+
+        out = {
+            "timestamp": row.get("timestamp"), self.col: price, "SMA_20": sma, "RSI_14": rsi,
+            "signal": signal, "position": self.position,
+            "strategy_ret": strategy_ret, "equity": self.equity,
+        }
+        self._latencies.append(time.perf_counter() - t0)
+        if self._writer is not None:
+            self._writer.write(out)
+        return out
+
+    def latency_stats(self) -> dict:
+        """Tick-to-signal latency over the last `latency_window` ticks, in microseconds."""
+        if not self._latencies:
+            return {"count": 0}
+        lat = sorted(self._latencies)
+
+        def pick(q):
+            return lat[min(len(lat) - 1, int(q * len(lat)))] * 1e6
+
+        return {
+            "count": len(lat),
+            "mean_us": sum(lat) / len(lat) * 1e6,
+            "p50_us": pick(0.50),
+            "p99_us": pick(0.99),
+            "max_us": lat[-1] * 1e6,
+        }
+
+    def summary(self) -> dict:
+        return {"rows": self.rows, "trades": self.trades, "position": self.position,
+                "equity": self.equity, "latency": self.latency_stats()}
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+
+
+def replay_csv(csv_path: str, speed: float = 0.0) -> Iterator[dict]:
+    """
+    Yield logger rows from a CSV as if they were arriving live.
+    speed=0 replays as fast as possible; otherwise sleeps interval/speed between rows.
+    """
+    with open(csv_path, newline="", encoding="utf-8") as f:
+        prev_ts = None
+        for row in csv.DictReader(f):
+            if speed > 0:
+                ts = time.mktime(time.strptime(row["timestamp"], "%Y-%m-%d %H:%M:%S"))
+                if prev_ts is not None and ts > prev_ts:
+                    time.sleep((ts - prev_ts) / speed)
+                prev_ts = ts
+            yield row
+
+
+def run_replay(rows: Iterable[dict], trader: PaperTrader) -> dict:
+    """Drive a trader from any row iterable; returns its summary."""
+    try:
+        for row in rows:
+            trader.on_tick(row)
+    finally:
+        trader.close()
+    return trader.summary()
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Live paper trading on logged prices")
+    p.add_argument("--replay", default=None, help="Replay this CSV instead of logging live")
+    p.add_argument("--speed", type=float, default=0.0, help="Replay speed multiplier (0 = as fast as possible)")
+    p.add_argument("--out", default="outputs/signals_live.csv", help="Signal rows are appended here")
+    p.add_argument("--fee-bps", type=float, default=10.0, help="Fee per position change in bps (default: 10)")
+    p.add_argument("--interval", type=int, default=30, help="Live logger interval in seconds (default: 30)")
+    return p.parse_args()
+
+
+def main():
+    args = parse_args()
+    trader = PaperTrader(fee_bps=args.fee_bps, out_path=args.out)
+    if args.replay:
+        summary = run_replay(replay_csv(args.replay, args.speed), trader)
+    else:
+        from price_tracker import log_prices
+        try:
+            log_prices(args.interval, on_row=trader.on_tick)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            trader.close()
+        summary = trader.summary()
+    lat = summary["latency"]
+    print(f"📈 Rows: {summary['rows']} | Trades: {summary['trades']} | Equity: {summary['equity']:.6f}")
+    if lat["count"]:
+        print(f"⏱️ Tick→signal latency: mean {lat['mean_us']:.1f}µs | p50 {lat['p50_us']:.1f}µs "
+              f"| p99 {lat['p99_us']:.1f}µs | max {lat['max_us']:.1f}µs")
+    print(f"✅ Signals appended to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+# plotting.py
+# Chart rendering for analysis.py (matplotlib, optional mplfinance).
+# Kept out of analysis.py so loading data and computing indicators never pulls in
+# the plotting stack; analysis re-exports these names on first access.
+
+import os
+from typing import Optional
+
+import pandas as pd
+
+from bars import resample_ohlc
+from instrument import timed
+from downsample import fit_to_width, pixel_width, reuse_figure
+
+# Headless backend so it works in CI/terminal
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.dates as mdates
+from matplotlib.artist import setp
+
+# Candles are optional (we'll warn if missing)
+try:
+    import mplfinance as mpf  # type: ignore
+    HAS_MPF = True
+except Exception:
+    HAS_MPF = False
+
+
+def _ensure_dir(out_file: str) -> None:
+    d = os.path.dirname(str(out_file)) or "."
+    os.makedirs(d, exist_ok=True)
+
+def _format_time_axis(ax):
+    ax.xaxis.set_major_formatter(mdates.DateFormatter("%H:%M\n%d-%b"))
+    ax.xaxis.set_major_locator(mdates.AutoDateLocator(minticks=3, maxticks=8))
+    setp(ax.get_xticklabels(), rotation=0, ha="center")
+
+@timed("plot.price_ma")
+def plot_price_with_mas(df: pd.DataFrame, out_file: str = "charts/day3_price_ma.png",
+                        col: str = "BTC_USDT", downsample: Optional[bool] = None) -> str:
+    """downsample: None = automatic (more rows than pixels), False = plot every row."""
+    _ensure_dir(out_file)
+    fig, ax = reuse_figure((11, 6))
+    cols = [col] + [f"SMA_{w}" for w in (5, 20)]
+    df = fit_to_width(df, cols, pixel_width(fig), enabled=downsample)
+    ax.plot(df["timestamp"], df[col], label=col.split("_")[0], linewidth=1.2)
+    for w in (5, 20):
+        sma_col = f"SMA_{w}"
+        if sma_col in df.columns:
+            ax.plot(df["timestamp"], df[sma_col], label=sma_col, linewidth=1.0)
+    ax.set_title(f"{col.replace('_', '/')} with SMA(5, 20)")
+    ax.set_xlabel("Time")
+    ax.set_ylabel("Price (USDT)")
+    ax.legend()
+    _format_time_axis(ax)
+    fig.tight_layout()
+    fig.savefig(out_file)
+    return out_file
+
+@timed("plot.rsi")
+def plot_rsi(df: pd.DataFrame, out_file: str = "charts/day3_rsi.png", period: int = 14,
+             downsample: Optional[bool] = None) -> str:
+    _ensure_dir(out_file)
+    rsi_col = f"RSI_{period}"
+    if rsi_col not in df.columns:
+        raise ValueError(f"{rsi_col} not found. Did you run add_rsi(period={period})?")
+    fig, ax = reuse_figure((11, 3))
+    df = fit_to_width(df, [rsi_col], pixel_width(fig), enabled=downsample)
+    ax.plot(df["timestamp"], df[rsi_col], label=rsi_col, linewidth=1.2)
+    ax.axhline(70, linestyle="--")
+    ax.axhline(30, linestyle="--")
+    ax.set_ylim(0, 100)
+    ax.set_title(f"RSI({period})")
+    ax.set_xlabel("Time")
+    ax.set_ylabel("RSI")
+    _format_time_axis(ax)
+    fig.tight_layout()
+    fig.savefig(out_file)
+    return out_file
+
+# Day-2 compatibility wrappers (so old tests still pass)
+@timed("plot.line")
+def plot_prices(df: pd.DataFrame, output_file: str = "charts/day2_line.png",
+                downsample: Optional[bool] = None) -> str:
+    _ensure_dir(output_file)
+    fig, ax = reuse_figure((10, 5))
+    df = fit_to_width(df, ["BTC_USDT", "ETH_USDT"], pixel_width(fig), enabled=downsample)
+    ax.plot(df["timestamp"], df["BTC_USDT"], label="BTC", linewidth=1.2)
+    ax.plot(df["timestamp"], df["ETH_USDT"], label="ETH", linewidth=1.2)
+    ax.set_xlabel("Time")
+    ax.set_ylabel("Price (USDT)")
+    ax.set_title("BTC vs ETH over time")
+    ax.legend()
+    _format_time_axis(ax)
+    fig.tight_layout()
+    fig.savefig(output_file)
+    return output_file
+
+@timed("plot.candles")
+def plot_candles(df: pd.DataFrame, output_file: str = "charts/day2_btc_candles.png",
+                 interval: str = "1m", col: str = "BTC_USDT") -> str:
+    """
+    Candlestick chart. df is either OHLC bars (Open/High/Low/Close columns) or the
+    raw tick log, which is resampled into real `interval` bars of `col` first.
+    """
+    if not HAS_MPF:
+        raise RuntimeError("mplfinance is required for plot_candles; install with: pip install mplfinance")
+    _ensure_dir(output_file)
+    if {"Open", "High", "Low", "Close"}.issubset(df.columns):
+        bars = df
+    else:
+        bars = resample_ohlc(df, col, interval)
+    ohlc = bars[["timestamp", "Open", "High", "Low", "Close"]].set_index("timestamp")
+    mpf.plot(ohlc, type="candle", style="charles", savefig=output_file)
+    return output_file
+
+@timed("plot.portfolio")
+def plot_portfolio_equity(result: dict, out_file: str = "charts/portfolio_equity.png",
+                          downsample: Optional[bool] = None) -> str:
+    """Equity curve of a portfolio.portfolio_backtest result."""
+    _ensure_dir(out_file)
+    fig, ax = reuse_figure((11, 5))
+    eq = fit_to_width(result["equity"], ["equity"], pixel_width(fig), enabled=downsample)
+    ax.plot(eq["timestamp"], eq["equity"], label="Portfolio", linewidth=1.2)
+    ax.set_title(f"Portfolio equity | Sharpe {result['sharpe']:.2f} | MaxDD {result['max_drawdown']:.2%}")
+    ax.set_xlabel("Time")
+    ax.set_ylabel("Equity")
+    ax.legend()
+    _format_time_axis(ax)
+    fig.tight_layout()
+    fig.savefig(out_file)
+    return out_file
+
+@timed("plot.correlation")
+def plot_rolling_correlation(frame: pd.DataFrame, out_file: str = "charts/correlation.png",
+                             downsample: Optional[bool] = None) -> str:
+    """
+    correlation.py output over time: one panel each for the CORR_, BETA_ and Z_
+    columns present in the frame.
+    """
+    _ensure_dir(out_file)
+    groups = [(p, [c for c in frame.columns if c.startswith(p)]) for p in ("CORR_", "BETA_", "Z_")]
+    groups = [(p, cols) for p, cols in groups if cols]
+    if not groups:
+        raise ValueError("No CORR_/BETA_/Z_ columns to plot. Did you run correlation.rolling_beta?")
+    fig, axes = reuse_figure((11, 3 * len(groups)), nrows=len(groups))
+    axes = [axes] if len(groups) == 1 else list(axes)
+    df = fit_to_width(frame, [c for _, cols in groups for c in cols], pixel_width(fig), enabled=downsample)
+    titles = {"CORR_": "Rolling correlation", "BETA_": "Rolling beta", "Z_": "Spread z-score"}
+    for ax, (prefix, cols) in zip(axes, groups):
+        for c in cols:
+            ax.plot(df["timestamp"], df[c], label=c[len(prefix):], linewidth=1.0)
+        if prefix == "CORR_":
+            ax.set_ylim(-1.05, 1.05)
+        if prefix == "Z_":
+            for level in (-2, 2):
+                ax.axhline(level, linestyle="--")
+        ax.set_title(titles[prefix])
+        ax.legend(fontsize="small")
+    axes[-1].set_xlabel("Time")
+    _format_time_axis(axes[-1])
+    fig.tight_layout()
+    fig.savefig(out_file)
+    return out_file
+
+@timed("plot.correlation_matrix")
+def plot_correlation_matrix(matrix: pd.DataFrame, out_file: str = "charts/correlation_matrix.png") -> str:
+    """Heatmap of a symbol x symbol correlation matrix (values written in when it is small)."""
+    _ensure_dir(out_file)
+    n = len(matrix)
+    size = min(4 + 0.4 * n, 20)
+    fig, ax = reuse_figure((size, size))
+    im = ax.imshow(matrix.to_numpy(dtype="float64"), vmin=-1, vmax=1, cmap="RdBu_r")
+    labels = [str(c).replace("_USDT", "") for c in matrix.columns]
+    if n <= 40:
+        ax.set_xticks(range(n), labels, rotation=90)
+        ax.set_yticks(range(n), labels)
+    if n <= 12:
+        for i in range(n):
+            for j in range(n):
+                v = matrix.iat[i, j]
+                if v == v:
+                    ax.text(j, i, f"{v:.2f}", ha="center", va="center", fontsize=8)
+    fig.colorbar(im, ax=ax, fraction=0.046, pad=0.04)
+    ax.set_title("Return correlation")
+    fig.tight_layout()
+    fig.savefig(out_file)
+    return out_file
@@ -0,0 +1,138 @@
+# portfolio.py
+# Multi-asset version of the long-only RSI/SMA strategy.
+# All symbols are processed together as (time x asset) arrays: indicators come
+# from one DataFrame-wide rolling/ewm call, signals and positions from NumPy
+# broadcasting, and the weighted per-asset returns are combined into a single
+# portfolio equity curve.
+
+import os
+import argparse
+from typing import Dict, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from analysis import load_prices, calculate_sharpe, calculate_drawdown
+from strategy import positions_from_codes, signal_codes
+
+
+def price_columns(df: pd.DataFrame) -> list:
+    """Every logged symbol column (everything numeric except the timestamp)."""
+    return [c for c in df.columns if c != "timestamp" and pd.api.types.is_numeric_dtype(df[c])]
+
+
+def _weights(symbols: Sequence[str], weights) -> np.ndarray:
+    if weights is None:
+        return np.full(len(symbols), 1.0 / len(symbols))
+    if isinstance(weights, dict):
+        missing = [s for s in symbols if s not in weights]
+        if missing:
+            raise ValueError(f"No weight given for {missing}")
+        weights = [weights[s] for s in symbols]
+    w = np.asarray(weights, dtype=float)
+    if w.shape != (len(symbols),):
+        raise ValueError(f"Expected {len(symbols)} weights, got {w.shape}")
+    return w
+
+
+def portfolio_backtest(
+    df: pd.DataFrame,
+    symbols: Optional[Sequence[str]] = None,
+    weights: Union[None, Sequence[float], Dict[str, float]] = None,
+    fee_bps: float = 10.0,
+    rsi_period: int = 14,
+    sma_window: int = 20,
+    rsi_buy: float = 30.0,
+    rsi_sell: float = 70.0,
+    periods_per_year: float = 252.0,
+) -> dict:
+    """
+    Run the generate_signals/backtest_long_only rules on every symbol and combine
+    the per-asset strategy returns with fixed weights (rebalanced every bar;
+    default: equal weights). Each column matches the single-asset backtest exactly.
+    Returns dict with:
+      - equity: DataFrame(timestamp, portfolio_ret, equity)
+      - positions: DataFrame(timestamp, <symbol>...) of int8 positions
+      - assets: per-symbol weight, trades and final equity
+      - sharpe, max_drawdown: portfolio metrics via calculate_sharpe/calculate_drawdown
+    """
+    symbols = list(symbols) if symbols is not None else price_columns(df)
+    if not symbols:
+        raise ValueError("No symbol columns to backtest.")
+    w = _weights(symbols, weights)
+    data = df.sort_values("timestamp").reset_index(drop=True)
+    prices = data[symbols].astype("float64")
+
+    # Indicators for all assets at once (same kernels as add_sma/add_rsi)
+    sma = prices.rolling(window=sma_window, min_periods=1).mean().to_numpy()
+    delta = prices.diff()
+    gain = delta.clip(lower=0.0)
+    loss = -delta.clip(upper=0.0)
+    ewm = dict(alpha=1 / rsi_period, adjust=False, min_periods=rsi_period)
+    avg_gain = gain.ewm(**ewm).mean().to_numpy()
+    avg_loss = loss.ewm(**ewm).mean().to_numpy()
+    rs = avg_gain / np.where(avg_loss == 0, 1e-12, avg_loss)
+    rsi = 100 - (100 / (1 + rs))
+    if len(data) < 2:
+        rsi[:] = np.nan
+
+    p = prices.to_numpy()
+    pos = positions_from_codes(signal_codes(p, sma, rsi, rsi_buy, rsi_sell))
+
+    # Per-asset close-to-close strategy returns, fees on position changes
+    ret = np.zeros_like(p)
+    ret[1:] = p[1:] / p[:-1] - 1
+    ret[~np.isfinite(ret)] = 0.0
+    posf = pos.astype("float64")
+    strat = np.zeros_like(p)
+    strat[1:] = posf[:-1] * ret[1:]
+    changes = np.zeros_like(p)
+    changes[1:] = np.abs(np.diff(posf, axis=0))
+    strat -= changes * (fee_bps / 10000.0)
+
+    port_ret = strat @ w
+    equity = np.cumprod(1.0 + port_ret)
+    asset_equity = np.cumprod(1.0 + strat, axis=0)
+
+    ts = data["timestamp"]
+    return {
+        "equity": pd.DataFrame({"timestamp": ts, "portfolio_ret": port_ret, "equity": equity}),
+        "positions": pd.concat([ts, pd.DataFrame(pos, columns=symbols)], axis=1),
+        "assets": pd.DataFrame({
+            "symbol": symbols, "weight": w,
+            "trades": changes.sum(axis=0).astype(int),
+            "final_equity": asset_equity[-1] if len(p) else np.ones(len(symbols)),
+        }),
+        "sharpe": calculate_sharpe(pd.Series(port_ret), periods_per_year=periods_per_year),
+        "max_drawdown": calculate_drawdown(pd.Series(equity))["max_drawdown"],
+    }
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Multi-asset portfolio backtest")
+    p.add_argument("--csv", default="crypto_prices.csv", help="Path to CSV (default: crypto_prices.csv)")
+    p.add_argument("--symbols", default="", help="Columns to trade, comma-separated (default: all)")
+    p.add_argument("--weights", default="", help="Weights in --symbols order (default: equal)")
+    p.add_argument("--fee-bps", type=float, default=10.0, help="Fee per position change in bps (default: 10)")
+    p.add_argument("--out", default="outputs/portfolio_equity.csv", help="Equity curve CSV")
+    p.add_argument("--chart", default="charts/portfolio_equity.png", help="Equity chart PNG")
+    return p.parse_args()
+
+
+def main():
+    args = parse_args()
+    df = load_prices(args.csv)
+    symbols = [s.strip() for s in args.symbols.split(",") if s.strip()] or None
+    weights = [float(w) for w in args.weights.split(",") if w.strip()] or None
+    res = portfolio_backtest(df, symbols, weights, fee_bps=args.fee_bps)
+    os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+    res["equity"].to_csv(args.out, index=False)
+    from plotting import plot_portfolio_equity
+    chart = plot_portfolio_equity(res, args.chart)
+    print(res["assets"].to_string(index=False))
+    print(f"📊 Sharpe: {res['sharpe']:.3f} | Max drawdown: {res['max_drawdown']:.2%}")
+    print(f"✅ Saved: {args.out} and {chart}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,35 @@
 import os
 import time
+import signal
+import asyncio
+import argparse
+import threading
+from contextlib import contextmanager
 from datetime import datetime
+from typing import Callable, Iterable, Optional
 
-import ccxt
-import pandas as pd
+from storage import ColumnarWriter
+from tickfile import TickWriter
+from csv_index import CsvIndex
+from scheduler import GAP_COLUMNS, RequestScheduler, gap_rows
+from instrument import add_cli_flags, cli_session, count, periodic_export, timer
 
 # Always resolve CSV path relative to this script's folder
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 CSV_PATH = os.path.join(BASE_DIR, "crypto_prices.csv")
 
+DEFAULT_SYMBOLS = ("BTC/USDT", "ETH/USDT")
+
+
+def gaps_path_for(csv_path: str) -> str:
+    """Where unfilled ticks are recorded ('prices.csv' -> 'prices_gaps.csv')."""
+    return os.path.splitext(csv_path)[0] + "_gaps.csv"
+
+
+def symbol_column(symbol: str) -> str:
+    """CSV column name for an exchange symbol ('BTC/USDT' -> 'BTC_USDT')."""
+    return symbol.replace("/", "_")
+
 
 def fetch_prices(exchange):
     """Fetch the latest BTC and ETH prices in USDT from Binance."""
@@ -21,32 +42,429 @@ def fetch_prices(exchange):
     }
 
 
-def append_row(row: dict):
+def _format_value(v) -> str:
+    """Render one CSV cell the way DataFrame.to_csv does (None/NaN -> empty)."""
+    if v is None or (isinstance(v, float) and v != v):
+        return ""
+    return str(v)
+
+
+def format_row(row: dict, columns) -> str:
+    """Format one CSV line (with newline) without going through pandas."""
+    return ",".join(_format_value(row.get(c)) for c in columns) + "\n"
+
+
+class CsvWriter:
+    """
+    Persistent, buffered CSV appender.
+    Keeps the file open, formats rows as plain text and writes them in batches:
+    a batch is flushed when `flush_rows` rows are buffered or the oldest buffered
+    row is `flush_interval` seconds old (checked on each write).
+    fsync policy: "never" (leave it to the OS), "batch" (fsync every flush),
+    "always" (flush + fsync every row).
+    The header is written only when the file is new/empty.
+    index=True keeps the time -> byte-offset sidecar (csv_index.py) current after
+    every flush, so range/last-N readers never have to rescan the log.
+    """
+
+    FSYNC_POLICIES = ("never", "batch", "always")
+
+    def __init__(
+        self,
+        path: str = CSV_PATH,
+        columns: Optional[Iterable[str]] = None,
+        flush_rows: int = 64,
+        flush_interval: float = 5.0,
+        fsync: str = "batch",
+        index: bool = False,
+    ):
+        if fsync not in self.FSYNC_POLICIES:
+            raise ValueError(f"fsync must be one of {self.FSYNC_POLICIES}, got {fsync!r}")
+        self.path = path
+        self.columns = list(columns) if columns is not None else None
+        self.flush_rows = max(1, int(flush_rows))
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self._buf = []
+        self._pending = 0
+        self._first_buffered = 0.0
+        self._fh = open(path, "a", encoding="utf-8", newline="")
+        self._needs_header = self._fh.tell() == 0
+        self._index = CsvIndex(path) if index else None
+
+    def write(self, row: dict) -> None:
+        if self._fh is None:
+            raise ValueError(f"CsvWriter for {self.path} is closed")
+        if self.columns is None:
+            self.columns = list(row.keys())
+        if self._needs_header:
+            self._buf.append(",".join(self.columns) + "\n")
+            self._needs_header = False
+        if not self._pending:
+            self._first_buffered = time.monotonic()
+        self._buf.append(format_row(row, self.columns))
+        self._pending += 1
+        if (
+            self.fsync == "always"
+            or self._pending >= self.flush_rows
+            or time.monotonic() - self._first_buffered >= self.flush_interval
+        ):
+            self.flush()
+
+    def flush_due(self) -> Optional[float]:
+        """Monotonic time at which the buffered rows are due to be flushed (None if nothing is buffered)."""
+        return self._first_buffered + self.flush_interval if self._pending else None
+
+    def flush(self) -> None:
+        if self._fh is None:
+            return
+        if self._buf:
+            self._fh.write("".join(self._buf))
+            self._buf.clear()
+            self._pending = 0
+        self._fh.flush()
+        if self.fsync != "never":
+            os.fsync(self._fh.fileno())
+        if self._index is not None:
+            self._index.update()
+
+    def close(self) -> None:
+        if self._fh is None:
+            return
+        self.flush()
+        self._fh.close()
+        self._fh = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def append_row(row: dict, csv_path: str = CSV_PATH):
     """Append one row of prices to crypto_prices.csv inside project root."""
-    df = pd.DataFrame([row], columns=["timestamp", "BTC_USDT", "ETH_USDT"])
-    df.to_csv(
-        CSV_PATH,
-        mode="a",
-        header=not os.path.exists(CSV_PATH),
-        index=False,
-    )
+    with CsvWriter(csv_path, columns=["timestamp", "BTC_USDT", "ETH_USDT"], fsync="never") as w:
+        w.write(row)
+
+
+class TeeWriter:
+    """Sends every row to several writers (e.g. the CSV plus a tick file for dashboards)."""
+
+    def __init__(self, *writers):
+        self.writers = writers
+
+    def write(self, row: dict) -> None:
+        for w in self.writers:
+            w.write(row)
+
+    def flush_due(self) -> Optional[float]:
+        due = [d for w in self.writers if hasattr(w, "flush_due") and (d := w.flush_due()) is not None]
+        return min(due, default=None)
+
+    def flush(self) -> None:
+        for w in self.writers:
+            w.flush()
+
+    def close(self) -> None:
+        """Close every writer, even if an earlier one raises (the first error is re-raised)."""
+        error = None
+        for w in self.writers:
+            try:
+                w.close()
+            except Exception as e:
+                error = error or e
+        if error is not None:
+            raise error
+
+    def __enter__(self):
+        return self
 
+    def __exit__(self, *exc):
+        self.close()
 
-def log_prices(interval_sec: int = 30):
-    """Continuously log prices every N seconds."""
-    exchange = ccxt.binance()
-    print(f"📈 Logging to {CSV_PATH} (Ctrl+C to stop)")
 
-    while True:
+def open_writer(csv_path: str, columns, fsync: str = "batch", store: Optional[str] = None,
+                partition: str = "hour", tickfile: Optional[str] = None, index: bool = True,
+                flush_interval: float = 5.0):
+    """
+    CsvWriter for csv_path, or a ColumnarWriter when a store directory is given;
+    with a tickfile, rows are also appended to that memory-mapped tick file.
+    index keeps the CSV's byte-offset index (csv_index.py) current as rows are flushed.
+    """
+    if store:
+        writer = ColumnarWriter(store, columns, partition=partition, fsync=fsync, flush_interval=flush_interval)
+    else:
+        writer = CsvWriter(csv_path, columns=columns, fsync=fsync, index=index, flush_interval=flush_interval)
+    if tickfile:
         try:
-            row = fetch_prices(exchange)
-            append_row(row)
-            print(f"✅ {row['timestamp']} | BTC: {row['BTC_USDT']} | ETH: {row['ETH_USDT']}")
-            time.sleep(interval_sec)
-        except Exception as e:
-            print("⚠️ Error:", e)
-            time.sleep(10)  # backoff before retrying
+            return TeeWriter(writer, TickWriter(tickfile, columns, fsync=fsync))
+        except BaseException:
+            writer.close()  # e.g. another logger holds the tick file's lock
+            raise
+    return writer
+
+
+class GapLog:
+    """Gap records CSV; the file is only created once there is a gap to record."""
+
+    def __init__(self, path: str, fsync: str = "batch"):
+        self.path = path
+        self.fsync = fsync
+        self._writer: Optional[CsvWriter] = None
+
+    def write(self, gaps, timestamp: str) -> None:
+        for g in gap_rows(gaps, timestamp):
+            if self._writer is None:
+                self._writer = CsvWriter(self.path, GAP_COLUMNS, flush_rows=1, fsync=self.fsync)
+            self._writer.write(g)
+            print(f"🕳️ Gap {g['symbol']} @ {timestamp}: {g['reason']} ({g['attempts']} attempts)")
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+@contextmanager
+def _sigterm_as_interrupt():
+    """Turn SIGTERM into KeyboardInterrupt while logging, so the writer is flushed on exit."""
+    if threading.current_thread() is not threading.main_thread():
+        yield
+        return
+
+    def handler(signum, frame):
+        raise KeyboardInterrupt
+
+    previous = signal.signal(signal.SIGTERM, handler)
+    try:
+        yield
+    finally:
+        signal.signal(signal.SIGTERM, previous)
+
+
+def _wait_for_tick(writer, until: float) -> None:
+    """Sleep until `until`, flushing on the way if the writer's buffered rows come due first."""
+    due = writer.flush_due()
+    if due is not None and due < until:
+        time.sleep(max(0.0, due - time.monotonic()))
+        writer.flush()
+    time.sleep(max(0.0, until - time.monotonic()))
+
+
+async def _await_tick(writer, until: float) -> None:
+    """Async _wait_for_tick; the flush (and its fsync) runs in a worker thread, off the event loop."""
+    due = writer.flush_due()
+    if due is not None and due < until:
+        await asyncio.sleep(max(0.0, due - time.monotonic()))
+        await asyncio.to_thread(writer.flush)
+    await asyncio.sleep(max(0.0, until - time.monotonic()))
+
+
+def log_prices(interval_sec: int = 30, csv_path: str = CSV_PATH, fsync: str = "batch",
+               store: Optional[str] = None, partition: str = "hour",
+               on_row: Optional[Callable[[dict], None]] = None, exchange=None,
+               gaps_path: Optional[str] = None, max_ticks: Optional[int] = None,
+               tickfile: Optional[str] = None, flush_interval: float = 5.0):
+    """
+    Continuously log prices every N seconds (to CSV, or to a columnar store if given).
+    Ticks follow a monotonic grid like log_prices_async, so retries don't add drift.
+    tickfile, if given, also receives every row (see tickfile.py) for live readers.
+    Requests go through a RequestScheduler (rate limit + backoff by error class);
+    symbols that can't be fetched before the next tick are recorded in gaps_path
+    (default: <csv>_gaps.csv) and left empty in the row.
+    on_row, if given, is called with each row right after it is written.
+    Buffered rows are flushed between ticks once the oldest is flush_interval
+    seconds old, so readers see each tick within that delay.
+    """
+    if exchange is None:
+        import ccxt
+        exchange = ccxt.binance({"enableRateLimit": False})  # the scheduler throttles
+    scheduler = RequestScheduler(exchange)
+    symbols = ["BTC/USDT", "ETH/USDT"]
+    print(f"📈 Logging to {store or csv_path} (Ctrl+C to stop)")
+
+    columns = ["timestamp", "BTC_USDT", "ETH_USDT"]
+    ticks = 0
+    next_tick = time.monotonic()
+    with _sigterm_as_interrupt(), open_writer(csv_path, columns, fsync, store, partition, tickfile,
+                                              flush_interval=flush_interval) as writer, \
+            GapLog(gaps_path or gaps_path_for(csv_path), fsync) as gap_log:
+        while max_ticks is None or ticks < max_ticks:
+            ticks += 1
+            try:
+                prices, gaps = scheduler.fetch_prices_sync(symbols, deadline=next_tick + interval_sec)
+                ts = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                gap_log.write(gaps, ts)
+                if any(v is not None for v in prices.values()):
+                    row = {"timestamp": ts, **{symbol_column(s): v for s, v in prices.items()}}
+                    with timer("write"):
+                        writer.write(row)
+                    count("rows")
+                    if on_row is not None:
+                        on_row(row)
+                    print(f"✅ {row['timestamp']} | BTC: {row['BTC_USDT']} | ETH: {row['ETH_USDT']}")
+            except Exception as e:
+                print("⚠️ Error:", e)
+            periodic_export()
+            if max_ticks is not None and ticks >= max_ticks:
+                break
+            next_tick += interval_sec
+            now = time.monotonic()
+            if now > next_tick and interval_sec > 0:
+                # Overran one or more slots: realign to the next slot on the grid
+                next_tick += (int((now - next_tick) // interval_sec) + 1) * interval_sec
+            _wait_for_tick(writer, next_tick)
+
+
+# --------- Async (concurrent multi-symbol) mode ---------
+async def fetch_prices_async(
+    exchange,
+    symbols: Iterable[str] = DEFAULT_SYMBOLS,
+    max_in_flight: int = 10,
+    batch: bool = True,
+    scheduler: Optional[RequestScheduler] = None,
+    gaps: Optional[list] = None,
+    deadline: Optional[float] = None,
+) -> dict:
+    """
+    Fetch the latest price of every symbol at once.
+    Uses a single fetch_tickers call when the exchange supports it (and batch=True),
+    otherwise one fetch_ticker per symbol with at most max_in_flight requests open.
+    Calls go through `scheduler` (a fresh RequestScheduler if None); symbols that
+    could not be fetched are logged as None and their gap records appended to `gaps`.
+    """
+    symbols = list(symbols)
+    scheduler = scheduler or RequestScheduler(exchange)
+    prices, missed = await scheduler.fetch_prices(symbols, max_in_flight, batch, deadline)
+    if gaps is not None:
+        gaps.extend(missed)
+
+    row = {"timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
+    for s in symbols:
+        row[symbol_column(s)] = prices[s]
+    return row
+
+
+async def log_prices_async(
+    interval_sec: float = 30,
+    symbols: Iterable[str] = DEFAULT_SYMBOLS,
+    exchange=None,
+    csv_path: str = CSV_PATH,
+    max_in_flight: int = 10,
+    batch: bool = True,
+    max_ticks: Optional[int] = None,
+    fsync: str = "batch",
+    store: Optional[str] = None,
+    partition: str = "hour",
+    on_row: Optional[Callable[[dict], None]] = None,
+    gaps_path: Optional[str] = None,
+    scheduler: Optional[RequestScheduler] = None,
+    verbose: bool = True,
+    tickfile: Optional[str] = None,
+    index: bool = True,
+    flush_interval: float = 5.0,
+):
+    """
+    Log many symbols per tick, fetched concurrently.
+    Ticks are scheduled on a monotonic clock (t0, t0+interval, ...) so fetch time
+    does not add drift; if a tick overruns, the missed slots are skipped.
+    `exchange` may be any object with async fetch_ticker/fetch_tickers (e.g. a stub);
+    by default a ccxt.async_support.binance() is created and closed.
+    Requests are rate limited and retried by a RequestScheduler until the next tick;
+    symbols still missing then are written to gaps_path (default: <csv>_gaps.csv).
+    If `store` is given, rows go to that columnar store instead of csv_path;
+    `tickfile` additionally receives every row (memory-mapped, for live readers).
+    on_row, if given, is called with each row right after it is written.
+    verbose=False silences the per-tick lines (e.g. inside collector workers).
+    index=False skips the CSV's byte-offset index (csv_index.py).
+    Buffered rows are flushed between ticks once the oldest is flush_interval
+    seconds old (many rows per flush at sub-second intervals, each row within
+    flush_interval seconds at slow ones).
+    """
+    symbols = list(symbols)
+    own_exchange = exchange is None
+    if own_exchange:
+        import ccxt.async_support as ccxt_async
+        exchange = ccxt_async.binance({"enableRateLimit": False})  # the scheduler throttles
+    scheduler = scheduler or RequestScheduler(exchange)
+    if verbose:
+        print(f"📈 Logging {len(symbols)} symbols to {store or csv_path} (Ctrl+C to stop)")
+
+    columns = ["timestamp"] + [symbol_column(s) for s in symbols]
+    ticks = 0
+    next_tick = time.monotonic()
+    try:
+        with _sigterm_as_interrupt(), open_writer(csv_path, columns, fsync, store, partition, tickfile, index,
+                                                  flush_interval) as writer, \
+                GapLog(gaps_path or gaps_path_for(csv_path), fsync) as gap_log:
+            while max_ticks is None or ticks < max_ticks:
+                try:
+                    gaps = []
+                    row = await fetch_prices_async(exchange, symbols, max_in_flight, batch, scheduler,
+                                                   gaps, deadline=next_tick + interval_sec)
+                    gap_log.write(gaps, row["timestamp"])
+                    with timer("write"):
+                        writer.write(row)
+                    count("rows")
+                    if on_row is not None:
+                        on_row(row)
+                    if verbose:
+                        print(f"✅ {row['timestamp']} | {len(symbols)} symbols")
+                except Exception as e:
+                    print("⚠️ Error:", e)
+                periodic_export()
+                ticks += 1
+                if max_ticks is not None and ticks >= max_ticks:
+                    break
+                next_tick += interval_sec
+                now = time.monotonic()
+                if now > next_tick and interval_sec > 0:
+                    # Overran one or more slots: realign to the next slot on the grid
+                    next_tick += (int((now - next_tick) // interval_sec) + 1) * interval_sec
+                await _await_tick(writer, next_tick)
+    finally:
+        if own_exchange:
+            await exchange.close()
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Log crypto prices to CSV")
+    p.add_argument("--interval", type=float, default=30, help="Seconds between ticks (default: 30)")
+    p.add_argument("--async", dest="use_async", action="store_true",
+                   help="Concurrent multi-symbol logger (asyncio + ccxt.async_support)")
+    p.add_argument("--symbols", default=",".join(DEFAULT_SYMBOLS),
+                   help="Symbols for --async, comma-separated (default: BTC/USDT,ETH/USDT)")
+    p.add_argument("--max-in-flight", type=int, default=10, help="Max concurrent requests (default: 10)")
+    p.add_argument("--fsync", choices=CsvWriter.FSYNC_POLICIES, default="batch",
+                   help="When to fsync the CSV: never | batch | always (default: batch)")
+    p.add_argument("--store", default=None, help="Write to this columnar store directory instead of the CSV")
+    p.add_argument("--partition", choices=("day", "hour"), default="hour",
+                   help="Store partition size (default: hour)")
+    p.add_argument("--tickfile", default=None, help="Also append rows to this memory-mapped tick file (see tickfile.py)")
+    add_cli_flags(p)
+    return p.parse_args()
 
 
 if __name__ == "__main__":
-    log_prices()
+    args = parse_args()
+    with cli_session(args, "price_tracker"):
+        if args.use_async:
+            syms = [s.strip() for s in args.symbols.split(",") if s.strip()]
+            try:
+                asyncio.run(log_prices_async(args.interval, syms, max_in_flight=args.max_in_flight,
+                                             fsync=args.fsync, store=args.store, partition=args.partition,
+                                             tickfile=args.tickfile))
+            except KeyboardInterrupt:
+                pass
+        else:
+            try:
+                log_prices(int(args.interval), fsync=args.fsync, store=args.store, partition=args.partition,
+                           tickfile=args.tickfile)
+            except KeyboardInterrupt:
+                pass
@@ -0,0 +1,230 @@
+# report.py
+# Batch chart rendering for nightly reports.
+#
+# - A report is a list of (symbol, window, chart) jobs, e.g. BTC_USDT:1d:ma.
+# - The CSV is loaded once; per symbol, SMA/RSI and signals are computed once on the
+#   full history (so a window never starts with indicator warm-up) and shared by
+#   every job for that symbol.
+# - Jobs render in a process pool (matplotlib is not thread-safe); workers get the
+#   prepared frames once through the pool initializer, not per job.
+# - Each job reports its own timing; failures are recorded, not fatal.
+# Usage:
+#   python report.py --symbols BTC_USDT,ETH_USDT --windows 6h,1d,all --charts ma,rsi,signals
+#   python report.py --plan jobs.json --jobs 4      # [{"symbol":..., "window":..., "chart":...}]
+
+import os
+import csv
+import json
+import time
+import argparse
+import itertools
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional
+
+import pandas as pd
+
+from analysis import load_prices, plot_price_with_mas, plot_rsi, plot_candles
+from strategy import generate_signals, plot_price_with_signals
+from indicator_cache import IndicatorCache
+from instrument import add_cli_flags, cli_session
+
+# Candle sizes tried (smallest first) so a window renders at most MAX_CANDLES bars
+CANDLE_INTERVALS = ("1min", "5min", "15min", "1h", "4h", "1D")
+MAX_CANDLES = 200
+TIMING_COLUMNS = ["symbol", "window", "chart", "path", "rows", "seconds", "error"]
+
+
+class Job(NamedTuple):
+    symbol: str
+    window: str  # pandas offset ("6h", "1d", "7d") or "all"
+    chart: str   # key of CHARTS
+
+
+def _candle_interval(span: pd.Timedelta) -> str:
+    for iv in CANDLE_INTERVALS:
+        if span / pd.Timedelta(iv) <= MAX_CANDLES:
+            return iv
+    return CANDLE_INTERVALS[-1]
+
+
+def _candles(df: pd.DataFrame, sym: str, out: str) -> str:
+    span = df["timestamp"].iloc[-1] - df["timestamp"].iloc[0] if len(df) else pd.Timedelta(0)
+    return plot_candles(df, out, interval=_candle_interval(span), col=sym)
+
+
+# chart name -> fn(window frame, symbol, out_file)
+CHARTS: Dict[str, Callable[[pd.DataFrame, str, str], str]] = {
+    "ma": lambda df, sym, out: plot_price_with_mas(df, out, col=sym),
+    "rsi": lambda df, sym, out: plot_rsi(df, out, period=14),
+    "signals": lambda df, sym, out: plot_price_with_signals(df, out, col=sym),
+    "candles": _candles,
+}
+
+
+def parse_jobs(specs: Iterable) -> List[Job]:
+    """Jobs from "SYMBOL:window:chart" strings, dicts or tuples; unknown charts raise."""
+    jobs = []
+    for s in specs:
+        if isinstance(s, str):
+            job = Job(*s.split(":"))
+        elif isinstance(s, dict):
+            job = Job(s["symbol"], s.get("window", "all"), s["chart"])
+        else:
+            job = Job(*s)
+        if job.chart not in CHARTS:
+            raise ValueError(f"Unknown chart {job.chart!r}; choose from {list(CHARTS)}")
+        if job.window != "all":
+            pd.Timedelta(job.window)  # fail early on a bad window
+        jobs.append(job)
+    return jobs
+
+
+def job_grid(symbols: Iterable[str], windows: Iterable[str], charts: Iterable[str]) -> List[Job]:
+    return parse_jobs(itertools.product(symbols, windows, charts))
+
+
+def prepare(df: pd.DataFrame, symbols: Iterable[str], cache: Optional[IndicatorCache] = None) -> Dict[str, pd.DataFrame]:
+    """One frame per symbol: its price, SMA_5/SMA_20, RSI_14 and signals."""
+    frames = {}
+    for sym in symbols:
+        if sym not in df.columns:
+            raise ValueError(f"{sym} not in the data; columns: {list(df.columns)}")
+        base = df[["timestamp", sym]].dropna().reset_index(drop=True)
+        frames[sym] = generate_signals(base, sym, cache)
+    return frames
+
+
+def window(df: pd.DataFrame, spec: str) -> pd.DataFrame:
+    """Rows within `spec` of the last timestamp ("all" = everything)."""
+    if spec == "all" or df.empty:
+        return df
+    start = df["timestamp"].iloc[-1] - pd.Timedelta(spec)
+    return df.iloc[int(df["timestamp"].searchsorted(start, side="left")):]
+
+
+def chart_path(out_dir: str, job: Job) -> str:
+    return os.path.join(out_dir, job.symbol, f"{job.window}_{job.chart}.png")
+
+
+# --------- Rendering ---------
+_FRAMES: Dict[str, pd.DataFrame] = {}
+
+
+def _init(frames: Dict[str, pd.DataFrame]) -> None:
+    """Pool initializer: the prepared frames, once per worker."""
+    _FRAMES.clear()
+    _FRAMES.update(frames)
+
+
+def _render(job: Job, out_dir: str, frames: Optional[Dict[str, pd.DataFrame]] = None) -> dict:
+    """One chart; frames default to the pool worker's (set by _init)."""
+    t0 = time.perf_counter()
+    path = chart_path(out_dir, job)
+    rows, error = 0, ""
+    try:
+        df = window((_FRAMES if frames is None else frames)[job.symbol], job.window)
+        rows = len(df)
+        CHARTS[job.chart](df, job.symbol, path)
+    except Exception as e:  # one bad job shouldn't sink the report
+        error = f"{type(e).__name__}: {e}"
+    return {"symbol": job.symbol, "window": job.window, "chart": job.chart, "path": path,
+            "rows": rows, "seconds": time.perf_counter() - t0, "error": error}
+
+
+def _progress(i: int, n: int, r: dict) -> None:
+    what = f"{r['symbol']} {r['window']} {r['chart']}"
+    if r["error"]:
+        print(f"⚠️ [{i}/{n}] {what} failed after {r['seconds']:.2f}s: {r['error']}")
+    else:
+        print(f"🖼️ [{i}/{n}] {what}: {r['rows']} rows, {r['seconds']:.2f}s -> {r['path']}")
+
+
+def render(
+    frames: Dict[str, pd.DataFrame],
+    jobs: List[Job],
+    out_dir: str = "charts/report",
+    n_jobs: Optional[int] = None,
+    verbose: bool = True,
+) -> List[dict]:
+    """
+    Render every job; returns one timing row per job, in job order.
+    n_jobs=1 renders in-process; None uses one worker per CPU.
+    """
+    n_jobs = min(n_jobs or os.cpu_count() or 1, max(1, len(jobs)))
+    results: List[Optional[dict]] = [None] * len(jobs)
+    if n_jobs == 1:
+        for i, job in enumerate(jobs):
+            results[i] = _render(job, out_dir, frames)
+            if verbose:
+                _progress(i + 1, len(jobs), results[i])
+        return results
+    with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init, initargs=(frames,)) as pool:
+        futures = {pool.submit(_render, job, out_dir): i for i, job in enumerate(jobs)}
+        for done, fut in enumerate(as_completed(futures), 1):
+            results[futures[fut]] = fut.result()
+            if verbose:
+                _progress(done, len(jobs), results[futures[fut]])
+    return results
+
+
+def write_timings(results: List[dict], path: str) -> str:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        w = csv.DictWriter(f, fieldnames=TIMING_COLUMNS)
+        w.writeheader()
+        w.writerows(results)
+    return path
+
+
+def build_report(
+    csv_path: str,
+    jobs: List[Job],
+    out_dir: str = "charts/report",
+    n_jobs: Optional[int] = None,
+    cache_dir: str = "",
+    verbose: bool = True,
+) -> List[dict]:
+    """Load once, prepare each symbol once, render all jobs, write <out_dir>/timings.csv."""
+    df = load_prices(csv_path)
+    cache = IndicatorCache(disk_dir=cache_dir) if cache_dir else None
+    frames = prepare(df, sorted({j.symbol for j in jobs}), cache)
+    results = render(frames, jobs, out_dir, n_jobs, verbose)
+    write_timings(results, os.path.join(out_dir, "timings.csv"))
+    return results
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Render a batch of charts in parallel")
+    p.add_argument("--csv", default="crypto_prices.csv", help="Path to CSV (default: crypto_prices.csv)")
+    p.add_argument("--plan", default="", help="JSON list of jobs ({symbol, window, chart}) or SYMBOL:window:chart strings")
+    p.add_argument("--symbols", default="BTC_USDT", help="Symbols, comma-separated (ignored with --plan)")
+    p.add_argument("--windows", default="all", help="Windows, e.g. 6h,1d,7d,all (ignored with --plan)")
+    p.add_argument("--charts", default=",".join(CHARTS), help=f"Charts from {','.join(CHARTS)} (ignored with --plan)")
+    p.add_argument("--outdir", default="charts/report", help="Output directory (one subdirectory per symbol)")
+    p.add_argument("--jobs", type=int, default=None, help="Worker processes (default: CPU count)")
+    p.add_argument("--cache-dir", default="", help="On-disk indicator cache directory, e.g. .indicators (default: off)")
+    add_cli_flags(p)
+    return p.parse_args()
+
+
+def main():
+    args = parse_args()
+    if args.plan:
+        with open(args.plan, encoding="utf-8") as f:
+            jobs = parse_jobs(json.load(f))
+    else:
+        split = lambda s: [x.strip() for x in s.split(",") if x.strip()]  # noqa: E731
+        jobs = job_grid(split(args.symbols), split(args.windows), split(args.charts))
+    t0 = time.perf_counter()
+    with cli_session(args, "report"):
+        results = build_report(args.csv, jobs, args.outdir, args.jobs, args.cache_dir)
+    failed = [r for r in results if r["error"]]
+    busy = sum(r["seconds"] for r in results)
+    print(f"✅ {len(results) - len(failed)}/{len(results)} charts in {time.perf_counter() - t0:.2f}s "
+          f"({busy:.2f}s of rendering) -> {os.path.join(args.outdir, 'timings.csv')}")
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
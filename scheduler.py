@@ -0,0 +1,284 @@
+# scheduler.py
+# Rate-limit-aware request scheduling for the logger.
+#
+# - TokenBucket: requests per second with a small burst; waiters are served in order.
+# - RequestScheduler: every exchange call goes through the bucket and is retried
+#   with capped exponential backoff + full jitter, chosen by ccxt error class:
+#     rate limited (429/418, DDoS protection) -> long backoff, and the request
+#                                                rate is halved (AIMD; it creeps back
+#                                                up on successes)
+#     network / timeout / exchange down      -> short backoff
+#     exchange errors (bad symbol, auth...)  -> no retry
+# - Whatever still fails within the tick's deadline becomes an explicit gap record
+#   (timestamp, symbol, reason, attempts) instead of silently missing data.
+
+import sys
+import time
+import random
+import asyncio
+from collections import Counter
+from datetime import datetime
+from typing import Callable, Iterable, List, Optional, Tuple
+
+from instrument import count, timer
+
+GAP_COLUMNS = ["timestamp", "symbol", "reason", "attempts"]
+DEFAULT_BACKOFF = (0.5, 10.0, True)  # anything else (e.g. a stub raising OSError)
+_BACKOFF: Optional[tuple] = None
+
+
+def backoff_table() -> tuple:
+    """
+    (error classes, base delay s, max delay s, retryable) rows; first match wins.
+    ccxt is only imported once something else has loaded it: before that no ccxt
+    error can have been raised, and stub exchanges get DEFAULT_BACKOFF.
+    """
+    global _BACKOFF
+    if _BACKOFF is None:
+        if "ccxt" not in sys.modules:
+            return ()
+        import ccxt
+        _BACKOFF = (
+            ((ccxt.RateLimitExceeded, ccxt.DDoSProtection), 2.0, 60.0, True),
+            ((ccxt.RequestTimeout, ccxt.ExchangeNotAvailable, ccxt.NetworkError), 0.5, 10.0, True),
+            ((ccxt.ExchangeError,), 0.0, 0.0, False),
+        )
+    return _BACKOFF
+
+
+def classify(error: BaseException) -> Tuple[str, float, float, bool]:
+    """(reason, base delay, max delay, retryable) for an exception."""
+    for classes, base, cap, retry in backoff_table():
+        if isinstance(error, classes):
+            return type(error).__name__, base, cap, retry
+    return (type(error).__name__, *DEFAULT_BACKOFF)
+
+
+def is_rate_limit(error: BaseException) -> bool:
+    table = backoff_table()
+    return bool(table) and isinstance(error, table[0][0])
+
+
+class TokenBucket:
+    """`rate` tokens per second, holding at most `burst`; a call may overdraw into debt."""
+
+    def __init__(self, rate: float, burst: float = 1.0, clock: Callable[[], float] = time.monotonic):
+        if rate <= 0:
+            raise ValueError(f"rate must be > 0, got {rate}")
+        self.rate = float(rate)
+        self.burst = max(1.0, float(burst))
+        self.tokens = self.burst
+        self._clock = clock
+        self._t = clock()
+        self._lock: Optional[asyncio.Lock] = None
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self.tokens = min(self.burst, self.tokens + (now - self._t) * self.rate)
+        self._t = now
+
+    def wait_time(self, cost: float = 1.0) -> float:
+        """Seconds until `cost` tokens (capped at burst) are available."""
+        self._refill()
+        need = min(cost, self.burst) - self.tokens
+        return need / self.rate if need > 1e-9 else 0.0  # ignore float dust from the refill
+
+    def take(self, cost: float = 1.0) -> None:
+        self.tokens -= cost
+
+    async def acquire(self, cost: float = 1.0, sleep=asyncio.sleep) -> None:
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            while (wait := self.wait_time(cost)) > 0:
+                await sleep(wait)
+            self.take(cost)
+
+    def acquire_sync(self, cost: float = 1.0, sleep=time.sleep) -> None:
+        while (wait := self.wait_time(cost)) > 0:
+            sleep(wait)
+        self.take(cost)
+
+
+class GaveUp(Exception):
+    """A request that failed for good; carries the reason and attempt count."""
+
+    def __init__(self, reason: str, attempts: int, error: Optional[BaseException] = None):
+        super().__init__(f"{reason} after {attempts} attempt(s): {error}")
+        self.reason = reason
+        self.attempts = attempts
+        self.error = error
+
+
+class RequestScheduler:
+    """
+    Rate limiting + retries for one exchange.
+    rate defaults to the exchange's ccxt rateLimit (ms per request); None/0 and no
+    rateLimit means unthrottled. On rate-limit errors the rate is halved (not below
+    min_rate) and recovers by max_rate/20 per success.
+    clock/sleep/rng are injectable so tests can run on fake time.
+    """
+
+    def __init__(
+        self,
+        exchange,
+        rate: Optional[float] = None,
+        burst: float = 1.0,
+        max_retries: int = 4,
+        min_rate: float = 0.2,
+        clock: Callable[[], float] = time.monotonic,
+        sleep=None,
+        rng: Optional[random.Random] = None,
+    ):
+        self.exchange = exchange
+        if rate is None and getattr(exchange, "rateLimit", None):
+            rate = 1000.0 / float(exchange.rateLimit)
+        self.max_rate = rate or None
+        self.min_rate = min(min_rate, rate) if rate else min_rate
+        self.bucket = TokenBucket(rate, burst, clock) if rate else None
+        self.max_retries = int(max_retries)
+        self.clock = clock
+        self.sleep = sleep
+        self.rng = rng or random.Random()
+        self.stats = Counter()
+        self.gap_counts = Counter()
+
+    @property
+    def rate(self) -> Optional[float]:
+        return self.bucket.rate if self.bucket else None
+
+    # --------- Backoff ---------
+    def _delay(self, error: BaseException, attempt: int, deadline: Optional[float]) -> Optional[float]:
+        """Seconds to wait before retrying, or None to give up."""
+        reason, base, cap, retry = classify(error)
+        self.stats[f"error:{reason}"] += 1
+        count(f"fetch_errors.{reason}")
+        if is_rate_limit(error):
+            self.stats["rate_limited"] += 1
+            if self.bucket:
+                self.bucket.rate = max(self.min_rate, self.bucket.rate / 2)
+        if not retry or attempt > self.max_retries:
+            return None
+        delay = self.rng.uniform(0, min(cap, base * 2 ** (attempt - 1)))
+        if deadline is not None and self.clock() + delay >= deadline:
+            return None
+        self.stats["retries"] += 1
+        return delay
+
+    def _ok(self) -> None:
+        self.stats["ok"] += 1
+        if self.bucket and self.bucket.rate < self.max_rate:
+            self.bucket.rate = min(self.max_rate, self.bucket.rate + self.max_rate / 20)
+
+    def _give_up(self, error: BaseException, attempt: int) -> GaveUp:
+        reason, _, _, retry = classify(error)
+        if retry and attempt <= self.max_retries:
+            reason = f"deadline:{reason}"  # still had retries left, but not the time
+        return GaveUp(reason, attempt, error)
+
+    # --------- Calls ---------
+    async def call(self, fn, *args, cost: float = 1.0, deadline: Optional[float] = None):
+        """await fn(*args) under the rate limit, retrying; raises GaveUp."""
+        sleep = self.sleep or asyncio.sleep
+        attempt = 0
+        while True:
+            attempt += 1
+            if self.bucket:
+                await self.bucket.acquire(cost, sleep)
+            self.stats["requests"] += 1
+            try:
+                with timer("fetch"):
+                    result = await fn(*args)
+            except Exception as e:
+                delay = self._delay(e, attempt, deadline)
+                if delay is None:
+                    raise self._give_up(e, attempt) from e
+                await sleep(delay)
+                continue
+            self._ok()
+            return result
+
+    def call_sync(self, fn, *args, cost: float = 1.0, deadline: Optional[float] = None):
+        """Blocking version of call() for the sync logger."""
+        sleep = self.sleep or time.sleep
+        attempt = 0
+        while True:
+            attempt += 1
+            if self.bucket:
+                self.bucket.acquire_sync(cost, sleep)
+            self.stats["requests"] += 1
+            try:
+                with timer("fetch"):
+                    result = fn(*args)
+            except Exception as e:
+                delay = self._delay(e, attempt, deadline)
+                if delay is None:
+                    raise self._give_up(e, attempt) from e
+                sleep(delay)
+                continue
+            self._ok()
+            return result
+
+    # --------- Rows + gaps ---------
+    def _gap(self, gaps: list, symbol: str, reason: str, attempts: int) -> None:
+        self.gap_counts[symbol] += 1
+        count("gaps")
+        gaps.append({"symbol": symbol, "reason": reason, "attempts": attempts})
+
+    async def fetch_prices(
+        self,
+        symbols: Iterable[str],
+        max_in_flight: int = 10,
+        batch: bool = True,
+        deadline: Optional[float] = None,
+    ) -> Tuple[dict, List[dict]]:
+        """
+        Latest price per symbol -> ({symbol: price or None}, gap records).
+        One fetch_tickers call when supported (and batch=True), else one
+        fetch_ticker per symbol with at most max_in_flight open.
+        """
+        symbols = list(symbols)
+        prices, gaps = {}, []
+        ex = self.exchange
+        if batch and getattr(ex, "has", {}).get("fetchTickers"):
+            try:
+                tickers = await self.call(ex.fetch_tickers, symbols, deadline=deadline)
+            except GaveUp as g:
+                for s in symbols:
+                    self._gap(gaps, s, g.reason, g.attempts)
+                return {s: None for s in symbols}, gaps
+            for s in symbols:
+                prices[s] = (tickers.get(s) or {}).get("last")
+                if prices[s] is None:
+                    self._gap(gaps, s, "missing", 1)
+            return prices, gaps
+
+        sem = asyncio.Semaphore(max(1, max_in_flight))
+
+        async def one(symbol):
+            async with sem:
+                try:
+                    prices[symbol] = (await self.call(ex.fetch_ticker, symbol, deadline=deadline))["last"]
+                except GaveUp as g:
+                    prices[symbol] = None
+                    self._gap(gaps, symbol, g.reason, g.attempts)
+
+        await asyncio.gather(*(one(s) for s in symbols))
+        return {s: prices[s] for s in symbols}, gaps
+
+    def fetch_prices_sync(self, symbols: Iterable[str], deadline: Optional[float] = None):
+        """Blocking fetch_prices (one fetch_ticker per symbol)."""
+        prices, gaps = {}, []
+        for s in symbols:
+            try:
+                prices[s] = self.call_sync(self.exchange.fetch_ticker, s, deadline=deadline)["last"]
+            except GaveUp as g:
+                prices[s] = None
+                self._gap(gaps, s, g.reason, g.attempts)
+        return prices, gaps
+
+
+def gap_rows(gaps: List[dict], timestamp: Optional[str] = None) -> List[dict]:
+    """Stamp gap records with the tick's timestamp for the gaps CSV."""
+    ts = timestamp or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    return [{"timestamp": ts, **g} for g in gaps]
@@ -0,0 +1,447 @@
+# service.py
+# Local HTTP/JSON query service next to the logger.
+#
+# - LiveWindow: the last `capacity` ticks in preallocated NumPy columns, with
+#   SMA_5/SMA_20/RSI_14, signal, position and paper equity updated in O(1) per
+#   row (streaming.py / paper_trader.PaperTrader), so the values match
+#   strategy.generate_signals + backtest_long_only on the same rows.
+# - QueryService: asyncio HTTP server answering from that window only:
+#     GET /latest                                  newest row
+#     GET /range?start=&end=&limit=&columns=       columnar rows in [start, end]
+#     GET /indicator/<SMA_20|RSI_14|...>?start=&end=&limit=
+#     GET /chart/<price|rsi|signals>.png?start=&end=&limit=
+#     GET /health
+#   JSON bodies are cached per data version, so any number of dashboards polling
+#   the same query between ticks cost one encode. Charts render in one background
+#   thread, at most once per `chart_interval` seconds per query, and concurrent
+#   requests for the same chart share one render.
+# - Feeds: the async logger in the same event loop (log_prices_async on_row), or
+#   a replayed CSV for testing. Nothing is read from disk after warm-up.
+# Usage:
+#   python service.py --port 8765                       # live logger + service
+#   python service.py --replay crypto_prices.csv --speed 60
+#   curl 'http://127.0.0.1:8765/range?start=2025-09-03%2010:00&columns=BTC_USDT,RSI_14'
+
+import io
+import json
+import time
+import asyncio
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, List, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import numpy as np
+import pandas as pd
+
+from paper_trader import PaperTrader, replay_csv
+from streaming import StreamingSMA
+from strategy import BUY, SELL, HOLD, SIGNAL_LABELS
+
+DEFAULT_CAPACITY = 100_000
+CHARTS = ("price", "rsi", "signals")
+INDICATORS = ("SMA_5", "SMA_20", "RSI_14", "signal", "position", "equity")
+MAX_CACHED = 256  # cached JSON bodies / charts (distinct queries) per data version
+_CODES = {"": HOLD, "BUY": BUY, "SELL": SELL}
+
+
+# --------- In-memory window ---------
+class LiveWindow:
+    """
+    Rolling window of the newest `capacity` rows. Columns live in arrays of twice
+    the capacity; when the end is reached the newest rows slide to the front, so
+    appends are amortized O(1) and every query reads one contiguous slice.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY, columns: Iterable[str] = ("BTC_USDT", "ETH_USDT"),
+                 col: str = "BTC_USDT", fee_bps: float = 10.0):
+        if capacity < 1:
+            raise ValueError(f"capacity must be >= 1, got {capacity}")
+        self.capacity = int(capacity)
+        self.columns = list(columns)
+        self.col = col
+        self.trader = PaperTrader(col, fee_bps)
+        self._sma5 = StreamingSMA(5)
+        self.fields = ["timestamp", *self.columns, *INDICATORS]
+        dtypes = {"timestamp": "int64", "signal": "int8", "position": "int8"}
+        self._data = {f: np.empty(2 * self.capacity, dtype=dtypes.get(f, "float64")) for f in self.fields}
+        self._start = self._end = 0
+        self.version = 0  # bumped on every accepted row
+
+    def __len__(self) -> int:
+        return self._end - self._start
+
+    def update(self, row: dict) -> Optional[dict]:
+        """Add one logger row (usable as log_prices on_row); rows without a price for `col` are skipped."""
+        out = self.trader.on_tick(row)
+        if out is None:
+            return None
+        if self._end == len(self._data["timestamp"]):
+            keep = self.capacity - 1
+            for a in self._data.values():
+                a[:keep] = a[self._end - keep:self._end]
+            self._start, self._end = 0, keep
+        i = self._end
+        d = self._data
+        d["timestamp"][i] = pd.Timestamp(row["timestamp"]).value
+        for c in self.columns:
+            v = row.get(c)
+            d[c][i] = float(v) if v not in (None, "") else np.nan
+        d["SMA_5"][i] = self._sma5.update(out[self.col])
+        d["SMA_20"][i], d["RSI_14"][i] = out["SMA_20"], out["RSI_14"]
+        d["signal"][i], d["position"][i], d["equity"][i] = _CODES[out["signal"]], out["position"], out["equity"]
+        self._end += 1
+        self._start = max(self._start, self._end - self.capacity)
+        self.version += 1
+        return out
+
+    def column(self, name: str) -> np.ndarray:
+        """View of one column over the window (valid until the next update)."""
+        return self._data[name][self._start:self._end]
+
+    def bounds(self, start=None, end=None, limit: Optional[int] = None) -> Tuple[int, int]:
+        """Window positions [lo, hi) of rows in [start, end], keeping the last `limit`."""
+        ts = self.column("timestamp")
+        lo = int(np.searchsorted(ts, pd.Timestamp(start).value, "left")) if start is not None else 0
+        hi = int(np.searchsorted(ts, pd.Timestamp(end).value, "right")) if end is not None else len(ts)
+        if limit:
+            lo = max(lo, hi - int(limit))
+        return lo, max(lo, hi)
+
+    def latest(self) -> Optional[dict]:
+        if not len(self):
+            return None
+        return {k: v[0] for k, v in self.records(self.fields, limit=1).items()}
+
+    def records(self, columns: List[str], start=None, end=None, limit: Optional[int] = None) -> dict:
+        """JSON-ready {column: [values]} (timestamps as logger strings, NaN as None)."""
+        lo, hi = self.bounds(start, end, limit)
+        if lo == hi:
+            return {c: [] for c in columns}
+        out = {}
+        for c in columns:
+            a = self.column(c)[lo:hi]
+            if c == "timestamp":
+                out[c] = np.char.replace(np.datetime_as_string(a.view("datetime64[ns]"), unit="s"), "T", " ").tolist()
+            elif c == "signal":
+                out[c] = np.asarray(SIGNAL_LABELS, dtype=object)[a].tolist()
+            elif c == "position":
+                out[c] = a.tolist()
+            else:
+                out[c] = np.where(np.isnan(a), None, a).tolist()
+        return out
+
+    def frame(self, start=None, end=None, limit: Optional[int] = None) -> pd.DataFrame:
+        """Copy of the rows as a DataFrame shaped like generate_signals output (for charts)."""
+        lo, hi = self.bounds(start, end, limit)
+        df = pd.DataFrame({c: self.column(c)[lo:hi].copy() for c in self.fields})
+        df["timestamp"] = df["timestamp"].to_numpy().view("datetime64[ns]")
+        df["signal"] = pd.Categorical.from_codes(df["signal"], categories=SIGNAL_LABELS)
+        return df
+
+
+# --------- Charts ---------
+def _render_png(kind: str, df: pd.DataFrame, col: str) -> bytes:
+    """One chart as PNG bytes (plotting is imported on the first chart)."""
+    buf = io.BytesIO()
+    if kind == "price":
+        from plotting import plot_price_with_mas
+        plot_price_with_mas(df, buf, col)
+    elif kind == "rsi":
+        from plotting import plot_rsi
+        plot_rsi(df, buf, period=14)
+    else:
+        from strategy import plot_price_with_signals
+        plot_price_with_signals(df, buf, col)
+    return buf.getvalue()
+
+
+class ChartCache:
+    """
+    PNGs per (chart, start, end, limit). A cached chart is served while the data is
+    unchanged or younger than min_interval seconds; renders run one at a time in a
+    worker thread (the plotting module reuses its figures).
+    """
+
+    def __init__(self, window: LiveWindow, min_interval: float = 1.0):
+        self.window = window
+        self.min_interval = min_interval
+        self.renders = 0
+        self.hits = 0
+        self._cache = {}  # key -> (version, rendered_at, png)
+        self._pending = {}  # key -> future of an in-flight render
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="charts")
+
+    async def get(self, kind: str, start=None, end=None, limit: Optional[int] = None) -> bytes:
+        if kind not in CHARTS:
+            raise KeyError(kind)
+        key = (kind, start, end, limit)
+        hit = self._cache.get(key)
+        if hit and (hit[0] == self.window.version or time.monotonic() - hit[1] < self.min_interval):
+            self.hits += 1
+            return hit[2]
+        fut = self._pending.get(key)
+        if fut is None:
+            if not len(self.window):
+                raise ValueError("no data yet")
+            df = self.window.frame(start, end, limit)  # snapshot taken in the event loop
+            version = self.window.version
+            fut = asyncio.get_running_loop().run_in_executor(self._pool, _render_png, kind, df, self.window.col)
+            fut.add_done_callback(lambda f: self._store(key, version, f))
+            self._pending[key] = fut
+            self.renders += 1
+        else:
+            self.hits += 1
+        return await asyncio.shield(fut)
+
+    def _store(self, key, version: int, fut) -> None:
+        self._pending.pop(key, None)
+        if fut.cancelled() or fut.exception() is not None:
+            return
+        if len(self._cache) >= MAX_CACHED:
+            self._cache.pop(next(iter(self._cache)))
+        self._cache[key] = (version, time.monotonic(), fut.result())
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=True)
+
+
+# --------- HTTP ---------
+class BadRequest(ValueError):
+    pass
+
+
+def _query(qs: dict):
+    """(start, end, limit) from query parameters."""
+    def one(name):
+        v = qs.get(name)
+        return v[-1] if v else None
+
+    start, end, limit = one("start"), one("end"), one("limit")
+    try:
+        if start is not None:
+            pd.Timestamp(start)
+        if end is not None:
+            pd.Timestamp(end)
+        limit = int(limit) if limit is not None else None
+    except ValueError as e:
+        raise BadRequest(f"bad start/end/limit: {e}")
+    if limit is not None and limit < 0:
+        raise BadRequest("limit must be >= 0")
+    return start, end, limit
+
+
+class QueryService:
+    """asyncio HTTP/1.1 server (GET only, keep-alive) over a LiveWindow."""
+
+    STATUS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 503: "Service Unavailable"}
+
+    def __init__(self, window: LiveWindow, host: str = "127.0.0.1", port: int = 8765, chart_interval: float = 1.0):
+        self.window = window
+        self.host = host
+        self.port = port
+        self.charts = ChartCache(window, chart_interval)
+        self.requests = 0
+        self.started = time.monotonic()
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._bodies = {}
+        self._bodies_version = -1
+
+    async def start(self) -> int:
+        """Start listening; returns the bound port (useful with port=0)."""
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self.port
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        self.charts.close()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                parts = line.decode("latin-1").split()
+                headers = {}
+                while True:
+                    h = await reader.readline()
+                    if h in (b"\r\n", b"\n", b""):
+                        break
+                    k, _, v = h.decode("latin-1").partition(":")
+                    headers[k.strip().lower()] = v.strip()
+                if len(parts) != 3:
+                    await self._send(writer, 400, _json({"error": "malformed request line"}), "application/json", False)
+                    break
+                method, target, version = parts
+                keep = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                status, ctype, body = await self.respond(method, target)
+                await self._send(writer, status, body, ctype, keep)
+                if not keep:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _send(self, writer, status: int, body: bytes, ctype: str, keep: bool) -> None:
+        head = (f"HTTP/1.1 {status} {self.STATUS[status]}\r\n"
+                f"Content-Type: {ctype}\r\nContent-Length: {len(body)}\r\n"
+                f"Cache-Control: no-cache\r\nAccess-Control-Allow-Origin: *\r\n"
+                f"X-Data-Version: {self.window.version}\r\n"
+                f"Connection: {'keep-alive' if keep else 'close'}\r\n\r\n")
+        writer.write(head.encode("latin-1") + body)
+        await writer.drain()
+
+    async def respond(self, method: str, target: str) -> Tuple[int, str, bytes]:
+        """(status, content type, body) for one request."""
+        self.requests += 1
+        if method != "GET":
+            return 405, "application/json", _json({"error": "only GET is supported"})
+        url = urlsplit(target)
+        path = unquote(url.path).rstrip("/") or "/"
+        try:
+            if path.startswith("/chart/"):
+                kind = path[len("/chart/"):].removesuffix(".png")
+                if kind not in CHARTS:
+                    return 404, "application/json", _json({"error": f"unknown chart {kind!r}", "charts": CHARTS})
+                png = await self.charts.get(kind, *_query(parse_qs(url.query)))
+                return 200, "image/png", png
+            if self._bodies_version != self.window.version:
+                self._bodies.clear()
+                self._bodies_version = self.window.version
+            body = self._bodies.get(target) if path != "/health" else None
+            if body is None:
+                status, payload = self._payload(path, parse_qs(url.query))
+                body = _json(payload)
+                if status != 200:
+                    return status, "application/json", body
+                if path != "/health" and len(self._bodies) < MAX_CACHED:
+                    self._bodies[target] = body
+            return 200, "application/json", body
+        except BadRequest as e:
+            return 400, "application/json", _json({"error": str(e)})
+        except ValueError as e:  # e.g. a chart before the first tick
+            return 503, "application/json", _json({"error": str(e)})
+
+    def _payload(self, path: str, qs: dict) -> Tuple[int, object]:
+        w = self.window
+        if path == "/latest":
+            latest = w.latest()
+            return (200, latest) if latest is not None else (503, {"error": "no data yet"})
+        if path == "/range":
+            start, end, limit = _query(qs)
+            columns = [c for c in ",".join(qs.get("columns", [])).split(",") if c] or w.fields
+            unknown = [c for c in columns if c not in w.fields]
+            if unknown:
+                raise BadRequest(f"unknown columns {unknown}; available: {w.fields}")
+            if "timestamp" not in columns:
+                columns = ["timestamp", *columns]
+            return 200, w.records(columns, start, end, limit)
+        if path.startswith("/indicator/"):
+            name = path[len("/indicator/"):]
+            if name not in INDICATORS:
+                return 404, {"error": f"unknown indicator {name!r}", "indicators": INDICATORS}
+            rec = w.records(["timestamp", name], *_query(qs))
+            return 200, {"name": name, "timestamp": rec["timestamp"], "values": rec[name]}
+        if path == "/health":
+            ts = w.column("timestamp")
+            first, last = (_ts_str(ts[0]), _ts_str(ts[-1])) if len(ts) else (None, None)
+            return 200, {"rows": len(ts), "capacity": w.capacity, "version": w.version,
+                         "first": first, "last": last, "requests": self.requests,
+                         "chart_renders": self.charts.renders, "chart_hits": self.charts.hits,
+                         "uptime_sec": round(time.monotonic() - self.started, 3)}
+        return 404, {"error": f"unknown path {path!r}",
+                     "paths": ["/latest", "/range", "/indicator/<name>", "/chart/<kind>.png", "/health"]}
+
+
+def _ts_str(ns) -> str:
+    return pd.Timestamp(int(ns)).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _json(obj) -> bytes:
+    return json.dumps(obj, separators=(",", ":"), allow_nan=False).encode("utf-8")
+
+
+# --------- Feeds ---------
+async def replay(window: LiveWindow, rows: Iterable[dict], speed: float = 0.0, batch: int = 1000) -> int:
+    """
+    Feed rows into the window from inside the event loop. speed=0 replays as fast
+    as possible (yielding to requests every `batch` rows); otherwise sleeps
+    interval/speed between rows like paper_trader.replay_csv.
+    """
+    n, prev = 0, None
+    for row in rows:
+        if speed > 0:
+            ts = pd.Timestamp(row["timestamp"])
+            if prev is not None and ts > prev:
+                await asyncio.sleep((ts - prev).total_seconds() / speed)
+            prev = ts
+        window.update(row)
+        n += 1
+        if speed <= 0 and n % batch == 0:
+            await asyncio.sleep(0)
+    return n
+
+
+def warm_start(window: LiveWindow, csv_path: str, rows: int) -> int:
+    """Prime the window with the last `rows` logged rows (seeks via the CSV index)."""
+    from analysis import load_prices
+
+    df = load_prices(csv_path, last_n=rows)
+    df = df.assign(timestamp=df["timestamp"].dt.strftime("%Y-%m-%d %H:%M:%S"))
+    for row in df.to_dict("records"):
+        window.update(row)
+    return len(df)
+
+
+# --------- CLI ---------
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="HTTP/JSON query service over an in-memory window of ticks")
+    p.add_argument("--host", default="127.0.0.1", help="Bind address (default: 127.0.0.1)")
+    p.add_argument("--port", type=int, default=8765, help="Port (default: 8765, 0 = any free port)")
+    p.add_argument("--window", type=int, default=DEFAULT_CAPACITY, help="Rows kept in memory")
+    p.add_argument("--csv", default="crypto_prices.csv", help="Logger CSV (warm start and live logging)")
+    p.add_argument("--warm", type=int, default=0, help="Preload the last N rows of --csv")
+    p.add_argument("--replay", default=None, help="Replay this CSV instead of logging live")
+    p.add_argument("--speed", type=float, default=0.0, help="Replay speed multiplier (0 = as fast as possible)")
+    p.add_argument("--interval", type=int, default=30, help="Live logger interval in seconds (default: 30)")
+    p.add_argument("--chart-interval", type=float, default=1.0, help="Min seconds between renders of one chart")
+    return p.parse_args()
+
+
+async def serve(args: argparse.Namespace) -> None:
+    window = LiveWindow(args.window)
+    if args.warm:
+        from analysis import resolve_path
+        print(f"🔥 Warm start: {warm_start(window, resolve_path(args.csv), args.warm)} rows")
+    service = QueryService(window, args.host, args.port, args.chart_interval)
+    port = await service.start()
+    print(f"🌐 Serving on http://{args.host}:{port} (Ctrl+C to stop)")
+    try:
+        if args.replay:
+            n = await replay(window, replay_csv(args.replay), args.speed)
+            print(f"📼 Replayed {n} rows; still serving")
+            await asyncio.Event().wait()
+        else:
+            from analysis import resolve_path
+            from price_tracker import log_prices_async
+            await log_prices_async(args.interval, csv_path=resolve_path(args.csv), on_row=window.update,
+                                   verbose=False)
+    finally:
+        await service.close()
+
+
+def main():
+    args = parse_args()
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
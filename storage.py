@@ -0,0 +1,278 @@
+# storage.py
+# Columnar, time-partitioned storage for logged prices.
+#
+# Layout (one directory per partition, one raw little-endian file per column):
+#   <root>/_schema.json
+#   <root>/date=2025-08-31/hour=12/timestamp.i8   int64 ns since epoch
+#   <root>/date=2025-08-31/hour=12/BTC_USDT.f8    float64
+# Column files are append-only, so the logger can add rows without rewriting
+# anything, and readers memory-map only the partitions/columns they need.
+
+import os
+import json
+import time
+import argparse
+import calendar
+from datetime import datetime, timezone
+from typing import Iterable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+SCHEMA_FILE = "_schema.json"
+TS_COL = "timestamp"
+TS_FORMAT = "%Y-%m-%d %H:%M:%S"
+PARTITIONS = ("day", "hour")
+_NS_PER_HOUR = 3600 * 10**9
+_NS_PER_DAY = 24 * _NS_PER_HOUR
+
+
+def is_store(path: str) -> bool:
+    """True if path is a columnar store directory."""
+    return os.path.isfile(os.path.join(path, SCHEMA_FILE))
+
+
+def _load_schema(root: str) -> dict:
+    with open(os.path.join(root, SCHEMA_FILE), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _init_store(root: str, columns: Sequence[str], partition: str) -> dict:
+    """Create the store (or open it and check it matches columns/partition)."""
+    if partition not in PARTITIONS:
+        raise ValueError(f"partition must be one of {PARTITIONS}, got {partition!r}")
+    if is_store(root):
+        schema = _load_schema(root)
+        if list(columns) != schema["columns"]:
+            raise ValueError(f"Store {root} has columns {schema['columns']}, got {list(columns)}")
+        return schema
+    os.makedirs(root, exist_ok=True)
+    schema = {"columns": list(columns), "partition": partition}
+    with open(os.path.join(root, SCHEMA_FILE), "w", encoding="utf-8") as f:
+        json.dump(schema, f)
+    return schema
+
+
+def _partition_dir(root: str, key_ns: int, partition: str) -> str:
+    t = datetime.fromtimestamp(key_ns // 10**9, tz=timezone.utc)
+    parts = [f"date={t:%Y-%m-%d}"]
+    if partition == "hour":
+        parts.append(f"hour={t:%H}")
+    return os.path.join(root, *parts)
+
+
+def _list_partitions(root: str, partition: str) -> List[tuple]:
+    """Sorted [(start_ns, dir)] of all partitions in the store."""
+    out = []
+    for d in os.listdir(root):
+        if not d.startswith("date="):
+            continue
+        day = calendar.timegm(datetime.strptime(d[5:], "%Y-%m-%d").timetuple()) * 10**9
+        ddir = os.path.join(root, d)
+        if partition == "day":
+            out.append((day, ddir))
+            continue
+        for h in os.listdir(ddir):
+            if h.startswith("hour="):
+                out.append((day + int(h[5:]) * _NS_PER_HOUR, os.path.join(ddir, h)))
+    return sorted(out)
+
+
+def _col_file(pdir: str, col: str) -> str:
+    return os.path.join(pdir, f"{col}.i8" if col == TS_COL else f"{col}.f8")
+
+
+def parse_timestamp_ns(ts) -> int:
+    """'YYYY-mm-dd HH:MM:SS' (or datetime/Timestamp) -> int64 ns, naive wall clock."""
+    if isinstance(ts, str):
+        ts = datetime.strptime(ts, TS_FORMAT)
+    if isinstance(ts, pd.Timestamp):
+        return int(ts.value)
+    return calendar.timegm(ts.timetuple()) * 10**9 + ts.microsecond * 1000
+
+
+def _to_ns(t) -> Optional[int]:
+    if t is None:
+        return None
+    return int(pd.Timestamp(t).value)
+
+
+# --------- Writing ---------
+def _append_arrays(root: str, partition: str, columns: Sequence[str],
+                   ts: np.ndarray, values: dict, fsync: bool = False) -> None:
+    """Append typed arrays to their partitions (ts must be int64 ns)."""
+    if len(ts) == 0:
+        return
+    keys = ts - ts % (_NS_PER_HOUR if partition == "hour" else _NS_PER_DAY)
+    # Split into runs of equal partition key (ts is usually sorted, so few runs)
+    bounds = np.flatnonzero(np.diff(keys)) + 1
+    for lo, hi in zip(np.r_[0, bounds], np.r_[bounds, len(ts)]):
+        pdir = _partition_dir(root, int(keys[lo]), partition)
+        os.makedirs(pdir, exist_ok=True)
+        for col in (TS_COL, *columns):
+            arr = ts[lo:hi] if col == TS_COL else values[col][lo:hi]
+            with open(_col_file(pdir, col), "ab") as f:
+                f.write(np.ascontiguousarray(arr).astype("<i8" if col == TS_COL else "<f8").tobytes())
+                if fsync:
+                    f.flush()
+                    os.fsync(f.fileno())
+
+
+def write_frame(root: str, df: pd.DataFrame, partition: str = "hour") -> int:
+    """Append a DataFrame (timestamp + float columns) to the store. Returns rows written."""
+    columns = [c for c in df.columns if c != TS_COL]
+    schema = _init_store(root, columns, partition)
+    ts = pd.to_datetime(df[TS_COL]).to_numpy(dtype="datetime64[ns]").view("int64")
+    values = {c: df[c].to_numpy(dtype="float64") for c in schema["columns"]}
+    _append_arrays(root, schema["partition"], schema["columns"], ts, values)
+    return len(df)
+
+
+class ColumnarWriter:
+    """
+    Row-at-a-time writer with the same write/flush/close interface as
+    price_tracker.CsvWriter, so the logger can target either backend.
+    Rows are buffered and appended to their partition every `flush_rows` rows,
+    or once the oldest buffered row is `flush_interval` seconds old (checked on
+    each write).
+    """
+
+    def __init__(self, root: str, columns: Iterable[str], partition: str = "hour",
+                 flush_rows: int = 64, fsync: str = "batch", flush_interval: float = 5.0):
+        self.root = root
+        self.columns = [c for c in columns if c != TS_COL]
+        self.partition = _init_store(root, self.columns, partition)["partition"]
+        self.flush_rows = max(1, int(flush_rows))
+        self.fsync = fsync
+        self.flush_interval = flush_interval
+        self._first_buffered = 0.0
+        self._ts: List[int] = []
+        self._vals = {c: [] for c in self.columns}
+
+    def write(self, row: dict) -> None:
+        if not self._ts:
+            self._first_buffered = time.monotonic()
+        self._ts.append(parse_timestamp_ns(row[TS_COL]))
+        for c in self.columns:
+            v = row.get(c)
+            self._vals[c].append(float("nan") if v is None else float(v))
+        if (
+            self.fsync == "always"
+            or len(self._ts) >= self.flush_rows
+            or time.monotonic() - self._first_buffered >= self.flush_interval
+        ):
+            self.flush()
+
+    def flush_due(self) -> Optional[float]:
+        """Monotonic time at which the buffered rows are due to be flushed (None if nothing is buffered)."""
+        return self._first_buffered + self.flush_interval if self._ts else None
+
+    def flush(self) -> None:
+        if not self._ts:
+            return
+        ts = np.asarray(self._ts, dtype="int64")
+        values = {c: np.asarray(v, dtype="float64") for c, v in self._vals.items()}
+        _append_arrays(self.root, self.partition, self.columns, ts, values,
+                       fsync=self.fsync != "never")
+        self._ts.clear()
+        for v in self._vals.values():
+            v.clear()
+
+    def close(self) -> None:
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# --------- Reading ---------
+def read_store(
+    root: str,
+    start=None,
+    end=None,
+    columns: Optional[Sequence[str]] = None,
+) -> pd.DataFrame:
+    """
+    Read [start, end] (inclusive, anything pd.Timestamp accepts) from the store.
+    Only partitions overlapping the range and only the requested columns are opened;
+    column files are memory-mapped, and edge partitions are trimmed with a binary search.
+    """
+    schema = _load_schema(root)
+    partition = schema["partition"]
+    cols = list(schema["columns"]) if columns is None else [c for c in columns if c != TS_COL]
+    missing = [c for c in cols if c not in schema["columns"]]
+    if missing:
+        raise ValueError(f"Columns {missing} not in store. Columns present: {schema['columns']}")
+    lo_ns, hi_ns = _to_ns(start), _to_ns(end)
+    size = _NS_PER_HOUR if partition == "hour" else _NS_PER_DAY
+
+    ts_parts, val_parts = [], {c: [] for c in cols}
+    for key, pdir in _list_partitions(root, partition):
+        if (lo_ns is not None and key + size <= lo_ns) or (hi_ns is not None and key > hi_ns):
+            continue
+        ts = _map(_col_file(pdir, TS_COL), "<i8")
+        n = len(ts)
+        arrays = {}
+        for c in cols:
+            arrays[c] = _map(_col_file(pdir, c), "<f8")
+            n = min(n, len(arrays[c]))  # ignore a torn trailing row
+        ts = ts[:n]
+        if n and np.all(ts[1:] >= ts[:-1]):
+            i = 0 if lo_ns is None else int(np.searchsorted(ts, lo_ns, "left"))
+            j = n if hi_ns is None else int(np.searchsorted(ts, hi_ns, "right"))
+            sel = slice(i, j)
+        else:
+            mask = np.ones(n, dtype=bool)
+            if lo_ns is not None:
+                mask &= ts >= lo_ns
+            if hi_ns is not None:
+                mask &= ts <= hi_ns
+            sel = mask
+        ts_parts.append(ts[sel])
+        for c in cols:
+            val_parts[c].append(arrays[c][:n][sel])
+
+    out = {TS_COL: (np.concatenate(ts_parts) if ts_parts else np.empty(0, "int64")).view("datetime64[ns]")}
+    for c in cols:
+        out[c] = np.concatenate(val_parts[c]) if val_parts[c] else np.empty(0, "float64")
+    return pd.DataFrame(out)
+
+
+def _map(path: str, dtype: str) -> np.ndarray:
+    if not os.path.exists(path) or os.path.getsize(path) < np.dtype(dtype).itemsize:
+        return np.empty(0, dtype=dtype)
+    n = os.path.getsize(path) // np.dtype(dtype).itemsize
+    return np.memmap(path, dtype=dtype, mode="r", shape=(n,))
+
+
+# --------- CSV -> columnar converter ---------
+def convert_csv(csv_path: str, root: str, partition: str = "hour",
+                chunksize: int = 1_000_000) -> int:
+    """One-shot conversion of a logger CSV into a columnar store. Returns rows written."""
+    total = 0
+    for chunk in pd.read_csv(csv_path, chunksize=chunksize):
+        chunk[TS_COL] = pd.to_datetime(chunk[TS_COL], format=TS_FORMAT, errors="coerce")
+        chunk = chunk.dropna(subset=[TS_COL])
+        for c in chunk.columns:
+            if c != TS_COL:
+                chunk[c] = pd.to_numeric(chunk[c], errors="coerce").astype("float64")
+        total += write_frame(root, chunk, partition)
+    return total
+
+
+def main():
+    p = argparse.ArgumentParser(description="Convert a price CSV into a columnar store")
+    p.add_argument("csv", help="Source CSV (e.g. crypto_prices.csv)")
+    p.add_argument("root", help="Destination store directory")
+    p.add_argument("--partition", choices=PARTITIONS, default="hour", help="Partition size (default: hour)")
+    p.add_argument("--chunksize", type=int, default=1_000_000, help="CSV rows per chunk")
+    args = p.parse_args()
+    n = convert_csv(args.csv, args.root, args.partition, args.chunksize)
+    print(f"✅ Wrote {n} rows to {args.root}")
+
+
+if __name__ == "__main__":
+    main()
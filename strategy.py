@@ -1,124 +1,195 @@
 import os
-from typing import Tuple
+import argparse
+from typing import Optional, Tuple
+import numpy as np
 import pandas as pd
 
 # Reuse analysis helpers
-from analysis import (
-    load_prices, add_sma, add_rsi,
-    plot_price_with_mas,  # optional reuse
-)
-
-def prepare_indicators(df: pd.DataFrame) -> pd.DataFrame:
-    """Ensure SMA(20) and RSI(14) exist."""
-    out = add_sma(df, "BTC_USDT", windows=(5, 20))
-    out = add_rsi(out, "BTC_USDT", period=14)
+from analysis import load_prices, add_sma, add_rsi, resolve_path
+from bars import load_bars, bars_to_prices
+from instrument import add_cli_flags, cli_session, timed
+
+def prepare_indicators(df: pd.DataFrame, col: str = "BTC_USDT", cache=None) -> pd.DataFrame:
+    """Ensure SMA(20) and RSI(14) of `col` exist (memoized when an IndicatorCache is given)."""
+    if cache is not None:
+        out = cache.add_sma(df, col, windows=(5, 20))
+        return cache.add_rsi(out, col, period=14)
+    out = add_sma(df, col, windows=(5, 20))
+    out = add_rsi(out, col, period=14)
     return out
 
-def generate_signals(df: pd.DataFrame) -> pd.DataFrame:
+# Signal codes (int8); string labels only appear via the categorical 'signal' column
+HOLD, BUY, SELL = 0, 1, 2
+SIGNAL_LABELS = ["", "BUY", "SELL"]
+
+def signal_codes(price, sma, rsi, rsi_buy: float = 30.0, rsi_sell: float = 70.0) -> np.ndarray:
+    """int8 signal codes; SELL wins when both conditions hold (NaN compares False)."""
+    price, sma, rsi = np.asarray(price, float), np.asarray(sma, float), np.asarray(rsi, float)
+    codes = np.where((rsi < rsi_buy) & (price > sma), BUY, HOLD).astype(np.int8)
+    codes[rsi > rsi_sell] = SELL
+    return codes
+
+def positions_from_codes(codes: np.ndarray) -> np.ndarray:
+    """
+    Long-only position (1 after BUY, 0 after SELL, unchanged otherwise) as int8.
+    Forward-fills the last BUY/SELL along axis 0, so 2-D (time x combo) input works too.
     """
-    Simple long-only logic:
+    codes = np.asarray(codes)
+    state = np.where(codes == BUY, 1, 0).astype(np.int8)
+    t = np.arange(codes.shape[0]).reshape((-1,) + (1,) * (codes.ndim - 1))
+    last = np.where(codes != HOLD, t, -1)
+    np.maximum.accumulate(last, axis=0, out=last)
+    pos = np.take_along_axis(state, np.maximum(last, 0), axis=0)
+    pos[last < 0] = 0
+    return pos
+
+def codes_from_signal(signal: pd.Series) -> np.ndarray:
+    """int8 HOLD/BUY/SELL codes back from a 'signal' column (categorical or plain strings)."""
+    if isinstance(signal.dtype, pd.CategoricalDtype) and list(signal.cat.categories) == SIGNAL_LABELS:
+        return signal.cat.codes.to_numpy(dtype=np.int8)
+    s = signal.astype("string").fillna("")
+    return np.select([s == "BUY", s == "SELL"], [BUY, SELL], HOLD).astype(np.int8)
+
+@timed("signals")
+def generate_signals(df: pd.DataFrame, col: str = "BTC_USDT", cache=None) -> pd.DataFrame:
+    """
+    Simple long-only logic on `col`:
       - BUY when RSI < 30 and price > SMA_20
       - SELL when RSI > 70
       - HOLD otherwise
-    Outputs a 'signal' column in { 'BUY', 'SELL', '' } and a 'position' in {0,1}.
+    Outputs a categorical 'signal' column in { 'BUY', 'SELL', '' } and an int8 'position' in {0,1}.
+    Existing SMA_20/RSI_14 columns are assumed to belong to `col`.
     """
     out = df.copy()
     if "SMA_20" not in out.columns or "RSI_14" not in out.columns:
-        out = prepare_indicators(out)
-
-    out["signal"] = ""
-    buy_cond  = (out["RSI_14"] < 30) & (out["BTC_USDT"] > out["SMA_20"])
-    sell_cond = (out["RSI_14"] > 70)
-
-    out.loc[buy_cond, "signal"]  = "BUY"
-    out.loc[sell_cond, "signal"] = "SELL"
+        out = prepare_indicators(out, col, cache)
 
+    codes = signal_codes(out[col], out["SMA_20"], out["RSI_14"])
+    out["signal"] = pd.Categorical.from_codes(codes, categories=SIGNAL_LABELS)
     # Position (long-only, flip on signals)
-    position = []
-    pos = 0
-    for s in out["signal"]:
-        if s == "BUY":
-            pos = 1
-        elif s == "SELL":
-            pos = 0
-        position.append(pos)
-    out["position"] = position
+    out["position"] = positions_from_codes(codes)
     return out
 
-def backtest_long_only(df: pd.DataFrame, fee_bps: float = 10.0) -> pd.DataFrame:
+@timed("backtest")
+def backtest_long_only(df: pd.DataFrame, fee_bps: float = 10.0, col: str = "BTC_USDT",
+                       execution=None) -> pd.DataFrame:
     """
     Long-only backtest using close-to-close returns when in position.
     fee_bps: per-trade fee in basis points (10 bps = 0.10% per entry/exit).
-    Assumes fills at next bar's close after signal (simplification).
+    By default a signal fills at the close of its own bar, with no slippage.
+    execution: an execution.ExecutionModel for next-bar fills, latency, slippage
+    and stop-loss/take-profit; adds 'held', 'cost' and 'exit_reason' columns.
     """
     out = df.copy()
     if "position" not in out.columns:
-        out = generate_signals(out)
+        out = generate_signals(out, col)
 
     out = out.sort_values("timestamp").reset_index(drop=True)
-    price = out["BTC_USDT"].astype(float)
+    if execution is not None:
+        from execution import EXIT_LABELS
+        res = execution.simulate(out[col].to_numpy(dtype="float64"), codes_from_signal(out["signal"]), fee_bps)
+        for k in ("held", "ret", "cost", "strategy_ret", "equity"):
+            out[k] = res[k]
+        out["exit_reason"] = pd.Categorical.from_codes(res["exit_reason"], categories=EXIT_LABELS)
+        return out
+
+    price = out[col].astype(float)
     out["ret"] = price.pct_change().fillna(0.0)
 
-    # Apply returns only when in position
-    out["strategy_ret"] = out["position"].shift(1).fillna(0) * out["ret"]
+    # Apply returns only when in position (float64 so int8 positions don't downcast fees)
+    pos = out["position"].astype("float64")
+    out["strategy_ret"] = pos.shift(1).fillna(0) * out["ret"]
 
     # Fees on position changes (entry/exit)
-    pos_change = out["position"].diff().fillna(0).abs()
+    pos_change = pos.diff().fillna(0).abs()
     fee = fee_bps / 10000.0
     out["strategy_ret"] -= pos_change * fee
 
     out["equity"] = (1.0 + out["strategy_ret"]).cumprod()
     return out
 
-def save_signals_csv(df_bt: pd.DataFrame, path: str = "outputs/signals.csv") -> str:
+@timed("write.signals")
+def save_signals_csv(df_bt: pd.DataFrame, path: str = "outputs/signals.csv", col: str = "BTC_USDT") -> str:
     os.makedirs(os.path.dirname(path), exist_ok=True)
-    cols = ["timestamp", "BTC_USDT", "SMA_20", "RSI_14", "signal", "position", "strategy_ret", "equity"]
+    cols = ["timestamp", col, "SMA_20", "RSI_14", "signal", "position", "held", "cost", "exit_reason",
+            "strategy_ret", "equity"]
     have = [c for c in cols if c in df_bt.columns]
     df_bt[have].to_csv(path, index=False)
     return path
 
-def plot_price_with_signals(df_bt: pd.DataFrame, out_file: str = "charts/day4_price_signals.png") -> str:
+@timed("plot.signals")
+def plot_price_with_signals(df_bt: pd.DataFrame, out_file: str = "charts/day4_price_signals.png",
+                            col: str = "BTC_USDT", downsample: Optional[bool] = None) -> str:
     """
     Overlay BUY/SELL markers on price with SMA(20).
+    Long series are fitted to the chart width; every BUY/SELL row is kept and drawn.
+    out_file may also be a binary file object (the PNG is written into it).
     """
-    import matplotlib
-    matplotlib.use("Agg")
-    import matplotlib.pyplot as plt
     import matplotlib.dates as mdates
+    from downsample import fit_to_width, pixel_width, reuse_figure
 
-    os.makedirs(os.path.dirname(out_file), exist_ok=True)
+    if isinstance(out_file, (str, os.PathLike)):
+        os.makedirs(os.path.dirname(out_file) or ".", exist_ok=True)
     dfp = df_bt.sort_values("timestamp")
-    t = dfp["timestamp"]
-    p = dfp["BTC_USDT"]
-    sma = dfp["SMA_20"] if "SMA_20" in dfp.columns else None
+    label = col.split("_")[0]
+    marked = dfp["signal"].isin(("BUY", "SELL")).to_numpy()
 
-    fig, ax = plt.subplots(figsize=(12,6))
-    ax.plot(t, p, label="BTC", linewidth=1.2)
-    if sma is not None:
-        ax.plot(t, sma, label="SMA_20", linewidth=1.0)
+    fig, ax = reuse_figure((12, 6))
+    line = fit_to_width(dfp, [col, "SMA_20"], pixel_width(fig), keep=marked, enabled=downsample)
+    ax.plot(line["timestamp"], line[col], label=label, linewidth=1.2)
+    if "SMA_20" in line.columns:
+        ax.plot(line["timestamp"], line["SMA_20"], label="SMA_20", linewidth=1.0)
 
     buys = dfp[dfp["signal"] == "BUY"]
     sells = dfp[dfp["signal"] == "SELL"]
-    ax.scatter(buys["timestamp"], buys["BTC_USDT"], marker="^", s=70, label="BUY")
-    ax.scatter(sells["timestamp"], sells["BTC_USDT"], marker="v", s=70, label="SELL")
+    ax.scatter(buys["timestamp"], buys[col], marker="^", s=70, label="BUY")
+    ax.scatter(sells["timestamp"], sells[col], marker="v", s=70, label="SELL")
 
-    ax.set_title("BTC with Signals (Day 4)")
+    ax.set_title(f"{label} with Signals (Day 4)")
     ax.set_xlabel("Time"); ax.set_ylabel("Price (USDT)"); ax.legend()
     ax.xaxis.set_major_formatter(mdates.DateFormatter("%H:%M\n%d-%b"))
     ax.xaxis.set_major_locator(mdates.AutoDateLocator(minticks=3, maxticks=8))
     fig.tight_layout()
     fig.savefig(out_file)
-    plt.close(fig)
     return out_file
 
-def run(csv_path: str = "crypto_prices.csv") -> Tuple[str, str]:
-    df = load_prices(csv_path)
+def run(csv_path: str = "crypto_prices.csv", bars: str = "", downsample: Optional[bool] = None,
+        execution=None) -> Tuple[str, str]:
+    """
+    Signals + backtest + outputs; bars="1h" etc. runs on cached OHLC closes instead of ticks.
+    execution: optional execution.ExecutionModel for the backtest.
+    """
+    if bars:
+        df = bars_to_prices({"BTC_USDT": load_bars(resolve_path(csv_path), bars, "BTC_USDT")})
+    else:
+        df = load_prices(csv_path)
     df_s = generate_signals(df)
-    df_bt = backtest_long_only(df_s, fee_bps=10.0)
+    df_bt = backtest_long_only(df_s, fee_bps=10.0, execution=execution)
     sig_csv = save_signals_csv(df_bt, "outputs/signals.csv")
-    chart = plot_price_with_signals(df_bt, "charts/day4_price_signals.png")
+    chart = plot_price_with_signals(df_bt, "charts/day4_price_signals.png", downsample=downsample)
     return sig_csv, chart
 
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="RSI/SMA signals + long-only backtest")
+    p.add_argument("--csv", default="crypto_prices.csv", help="Path to CSV (default: crypto_prices.csv)")
+    p.add_argument("--bars", default="", help="Run on cached OHLC bars of this interval (e.g. 1h)")
+    p.add_argument("--no-downsample", action="store_true", help="Plot every row instead of fitting to the chart width")
+    p.add_argument("--fill", choices=("close", "next"), default="close",
+                   help="Fill at the signal bar's close or the next bar (default: close)")
+    p.add_argument("--latency", type=int, default=0, help="Order latency in ticks (default: 0)")
+    p.add_argument("--slippage", default="", help="Slippage model: fixed:BPS, vol:K:WINDOW or spread:BPS")
+    p.add_argument("--stop-loss", type=float, default=None, help="Stop-loss as a fraction of entry, e.g. 0.02")
+    p.add_argument("--take-profit", type=float, default=None, help="Take-profit as a fraction of entry, e.g. 0.05")
+    add_cli_flags(p)
+    return p.parse_args()
+
 if __name__ == "__main__":
-    p, c = run("crypto_prices.csv")
+    args = parse_args()
+    with cli_session(args, "strategy"):
+        execution = None
+        if args.fill != "close" or args.latency or args.slippage or args.stop_loss or args.take_profit:
+            from execution import ExecutionModel, parse_slippage
+            execution = ExecutionModel(args.fill, args.latency, parse_slippage(args.slippage),
+                                       args.stop_loss, args.take_profit)
+        p, c = run(args.csv, args.bars, downsample=False if args.no_downsample else None, execution=execution)
     print("✅ Saved:", p, "and", c)
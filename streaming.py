@@ -0,0 +1,317 @@
+# streaming.py
+# Stateful indicators that update in O(1) per new price.
+# They replay the exact arithmetic of pandas' rolling-mean and EWM kernels, so
+# feeding a series one price at a time gives the same floats as add_sma/add_rsi.
+# The Chunked* consumers do the same for whole chunks (analysis.iter_prices):
+# vectorized per chunk, with just enough state carried over between chunks.
+
+import math
+from collections import deque
+from typing import Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+
+def _clean(x) -> float:
+    """pandas treats +/-inf as missing inside window ops."""
+    x = float(x)
+    return math.nan if math.isinf(x) else x
+
+
+class StreamingSMA:
+    """Rolling mean over the last `window` prices (min_periods=1), like add_sma."""
+
+    def __init__(self, window: int):
+        if window < 1:
+            raise ValueError(f"window must be >= 1, got {window}")
+        self.window = int(window)
+        self._buf = deque()
+        self._reset()
+        self.value = math.nan
+
+    def _reset(self) -> None:
+        self._nobs = 0
+        self._neg_ct = 0
+        self._sum = 0.0
+        self._comp_add = 0.0
+        self._comp_remove = 0.0
+        self._same_ct = 0
+        self._prev = math.nan
+
+    def _add(self, v: float) -> None:
+        if v != v:
+            return
+        self._nobs += 1
+        y = v - self._comp_add
+        t = self._sum + y
+        self._comp_add = t - self._sum - y
+        self._sum = t
+        if math.copysign(1.0, v) < 0:
+            self._neg_ct += 1
+        self._same_ct = self._same_ct + 1 if v == self._prev else 1
+        self._prev = v
+
+    def _remove(self, v: float) -> None:
+        if v != v:
+            return
+        self._nobs -= 1
+        y = -v - self._comp_remove
+        t = self._sum + y
+        self._comp_remove = t - self._sum - y
+        self._sum = t
+        if math.copysign(1.0, v) < 0:
+            self._neg_ct -= 1
+
+    def update(self, price) -> float:
+        v = _clean(price)
+        if not self._buf or self.window == 1:
+            # First window, or one that no longer overlaps the last: pandas re-seeds its sums
+            self._buf.clear()
+            self._reset()
+            self._prev = v
+        elif len(self._buf) == self.window:
+            self._remove(self._buf.popleft())
+        self._buf.append(v)
+        self._add(v)
+        self.value = self._mean()
+        return self.value
+
+    def _mean(self) -> float:
+        if self._nobs <= 0:
+            return math.nan
+        result = self._sum / self._nobs
+        if self._same_ct >= self._nobs:
+            result = self._prev
+        elif self._neg_ct == 0 and result < 0:
+            result = 0.0
+        elif self._neg_ct == self._nobs and result > 0:
+            result = 0.0
+        return result
+
+    def snapshot(self) -> dict:
+        return {
+            "kind": "sma", "window": self.window, "buf": list(self._buf),
+            "nobs": self._nobs, "neg_ct": self._neg_ct, "sum": self._sum,
+            "comp_add": self._comp_add, "comp_remove": self._comp_remove,
+            "same_ct": self._same_ct, "prev": self._prev, "value": self.value,
+        }
+
+    @classmethod
+    def restore(cls, state: dict) -> "StreamingSMA":
+        obj = cls(state["window"])
+        obj._buf = deque(state["buf"])
+        obj._nobs, obj._neg_ct, obj._sum = state["nobs"], state["neg_ct"], state["sum"]
+        obj._comp_add, obj._comp_remove = state["comp_add"], state["comp_remove"]
+        obj._same_ct, obj._prev, obj.value = state["same_ct"], state["prev"], state["value"]
+        return obj
+
+
+class _WilderEWM:
+    """ewm(alpha=1/period, adjust=False, min_periods=period).mean(), one value at a time."""
+
+    def __init__(self, period: int):
+        com = (1.0 - 1.0 / period) / (1.0 / period)  # pandas converts alpha -> com -> alpha
+        self.alpha = 1.0 / (1.0 + com)
+        self.factor = 1.0 - self.alpha
+        self.min_periods = max(int(period), 1)
+        self.weighted = math.nan
+        self.old_wt = 1.0
+        self.nobs = 0
+        self.started = False
+
+    def update(self, cur: float) -> float:
+        is_obs = cur == cur
+        self.nobs += is_obs
+        if not self.started:
+            self.started = True
+            self.weighted = cur
+        elif self.weighted == self.weighted:
+            self.old_wt *= self.factor  # gaps (NaN) still age the running average
+            if is_obs:
+                if self.weighted != cur:
+                    self.weighted = self.old_wt * self.weighted + self.alpha * cur
+                    self.weighted /= (self.old_wt + self.alpha)
+                self.old_wt = 1.0
+        elif is_obs:
+            self.weighted = cur
+        return self.weighted if self.nobs >= self.min_periods else math.nan
+
+
+class StreamingRSI:
+    """Wilder RSI with running avg_gain/avg_loss, like add_rsi."""
+
+    def __init__(self, period: int = 14):
+        if period < 1:
+            raise ValueError(f"period must be >= 1, got {period}")
+        self.period = int(period)
+        self._gain = _WilderEWM(self.period)
+        self._loss = _WilderEWM(self.period)
+        self._last: Optional[float] = None
+        self.value = math.nan
+
+    def update(self, price) -> float:
+        v = float(price)
+        delta = math.nan if self._last is None else v - self._last
+        self._last = v
+        if delta != delta:
+            gain = loss = math.nan
+        else:
+            gain = delta if delta >= 0.0 else 0.0
+            loss = -(delta if delta <= 0.0 else 0.0)
+        avg_gain = self._gain.update(_clean(gain))
+        avg_loss = self._loss.update(_clean(loss))
+        if avg_loss == 0:
+            avg_loss = 1e-12
+        rs = avg_gain / avg_loss
+        self.value = 100 - (100 / (1 + rs))
+        return self.value
+
+    def snapshot(self) -> dict:
+        return {
+            "kind": "rsi", "period": self.period, "last": self._last, "value": self.value,
+            "gain": dict(vars(self._gain)), "loss": dict(vars(self._loss)),
+        }
+
+    @classmethod
+    def restore(cls, state: dict) -> "StreamingRSI":
+        obj = cls(state["period"])
+        obj._last, obj.value = state["last"], state["value"]
+        vars(obj._gain).update(state["gain"])
+        vars(obj._loss).update(state["loss"])
+        return obj
+
+
+def restore_indicator(state: dict):
+    """Rebuild a streaming or chunked indicator from its snapshot()."""
+    kinds = {"sma": StreamingSMA, "rsi": StreamingRSI,
+             "chunked_sma": ChunkedSMA, "chunked_rsi": ChunkedRSI}
+    if state.get("kind") not in kinds:
+        raise ValueError(f"Unknown indicator snapshot kind: {state.get('kind')!r}")
+    return kinds[state["kind"]].restore(state)
+
+
+# --------- Chunk consumers ---------
+class ChunkedStats:
+    """min/max/mean per column over a stream of chunks; result() has basic_stats' shape."""
+
+    def __init__(self, columns: Sequence[str] = ("BTC_USDT", "ETH_USDT")):
+        self.columns = list(columns)
+        self._acc = {c: [math.inf, -math.inf, 0.0, 0] for c in self.columns}
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        for c in self.columns:
+            x = chunk[c].to_numpy(dtype="float64")
+            x = x[~np.isnan(x)]
+            if len(x) == 0:
+                continue
+            acc = self._acc[c]
+            acc[0] = min(acc[0], float(x.min()))
+            acc[1] = max(acc[1], float(x.max()))
+            acc[2] += float(x.sum())
+            acc[3] += len(x)
+
+    def result(self) -> dict:
+        out = {}
+        for c, (lo, hi, total, n) in self._acc.items():
+            if n == 0:
+                out[c] = {"min": math.nan, "max": math.nan, "mean": math.nan}
+            else:
+                out[c] = {"min": lo, "max": hi, "mean": total / n}
+        return out
+
+
+class ChunkedDrawdown:
+    """calculate_drawdown over chunks of an equity curve; carries the running peak."""
+
+    def __init__(self):
+        self.peak = -math.inf
+        self.max_drawdown = 0.0
+        self._seen = False
+
+    def update(self, equity) -> np.ndarray:
+        """Drawdown (equity / running_peak - 1) for this chunk."""
+        eq = np.asarray(equity, dtype="float64")
+        if len(eq) == 0:
+            return eq
+        peak = np.fmax.accumulate(np.r_[self.peak, eq])[1:]
+        dd = eq / peak - 1.0
+        self.peak = float(peak[-1])
+        lowest = np.nanmin(dd) if not np.isnan(dd).all() else math.nan
+        self.max_drawdown = lowest if not self._seen else min(self.max_drawdown, lowest)
+        self._seen = True
+        return dd
+
+
+class ChunkedSMA:
+    """add_sma over chunks: the previous chunk's last window-1 prices are prepended."""
+
+    def __init__(self, window: int):
+        self.window = int(window)
+        self._tail = np.empty(0, dtype="float64")
+
+    def update(self, prices) -> np.ndarray:
+        x = np.asarray(prices, dtype="float64")
+        full = np.r_[self._tail, x]
+        sma = pd.Series(full).rolling(window=self.window, min_periods=1).mean().to_numpy()
+        keep = self.window - 1
+        self._tail = full[len(full) - keep:] if keep else full[:0]
+        return sma[len(full) - len(x):]
+
+    def snapshot(self) -> dict:
+        return {"kind": "chunked_sma", "window": self.window, "tail": self._tail.tolist()}
+
+    @classmethod
+    def restore(cls, state: dict) -> "ChunkedSMA":
+        obj = cls(state["window"])
+        obj._tail = np.asarray(state["tail"], dtype="float64")
+        return obj
+
+
+class ChunkedRSI:
+    """
+    add_rsi over chunks. Each Wilder EWM restarts from the carried average (fed as
+    its first element, which adjust=False takes verbatim) and min_periods is applied
+    to the observation count of the whole stream so far.
+    """
+
+    def __init__(self, period: int = 14):
+        self.period = int(period)
+        self._last = math.nan
+        self._ewm = {"gain": (math.nan, 0), "loss": (math.nan, 0)}
+
+    def _smooth(self, key: str, x: np.ndarray) -> np.ndarray:
+        weighted, nobs = self._ewm[key]
+        carried = weighted == weighted
+        s = pd.Series(np.r_[weighted, x] if carried else x)
+        avg = s.ewm(alpha=1 / self.period, adjust=False).mean().to_numpy()
+        if carried:
+            avg = avg[1:]
+        counts = nobs + np.cumsum(~np.isnan(x))
+        if len(x):
+            self._ewm[key] = (float(avg[-1]), int(counts[-1]))
+        avg[counts < self.period] = np.nan
+        return avg
+
+    def update(self, prices) -> np.ndarray:
+        p = np.asarray(prices, dtype="float64")
+        delta = np.diff(np.r_[self._last, p])
+        if len(p):
+            self._last = float(p[-1])
+        gain = np.clip(delta, 0.0, None)
+        loss = -np.clip(delta, None, 0.0)
+        avg_gain = self._smooth("gain", gain)
+        avg_loss = self._smooth("loss", loss)
+        rs = avg_gain / np.where(avg_loss == 0, 1e-12, avg_loss)
+        return 100 - (100 / (1 + rs))
+
+    def snapshot(self) -> dict:
+        return {"kind": "chunked_rsi", "period": self.period, "last": self._last,
+                "ewm": {k: list(v) for k, v in self._ewm.items()}}
+
+    @classmethod
+    def restore(cls, state: dict) -> "ChunkedRSI":
+        obj = cls(state["period"])
+        obj._last = state["last"]
+        obj._ewm = {k: (float(w), int(n)) for k, (w, n) in state["ewm"].items()}
+        return obj
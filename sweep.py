@@ -0,0 +1,200 @@
+# sweep.py
+# Parameter sweep for the long-only RSI/SMA strategy.
+#
+# - Each distinct RSI period and SMA window is computed once, up front.
+# - For one (RSI period, SMA window) pair, every (buy, sell) threshold pair is
+#   evaluated at once as a 2-D (time x combo) array, in cache-sized column blocks.
+# - (RSI period, SMA window) groups are spread over a process pool; prices,
+#   returns and indicator matrices live in shared memory, so workers don't copy them.
+
+import os
+import argparse
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from analysis import load_prices, add_sma, add_rsi
+from metrics import batch_metrics
+
+# Cap for one (time x combo) float64 block; bigger threshold grids are chunked
+MAX_BLOCK_BYTES = 16 * 1024 * 1024
+
+_SHARED: Dict[str, np.ndarray] = {}
+_HANDLES: List[shared_memory.SharedMemory] = []
+
+
+def _to_shared(arrays: Dict[str, np.ndarray]) -> Tuple[list, Dict[str, tuple]]:
+    """Copy arrays into shared memory blocks; returns (handles, specs for workers)."""
+    handles, specs = [], {}
+    for name, arr in arrays.items():
+        arr = np.ascontiguousarray(arr, dtype="float64")
+        shm = shared_memory.SharedMemory(create=True, size=max(arr.nbytes, 1))
+        np.ndarray(arr.shape, dtype=arr.dtype, buffer=shm.buf)[...] = arr
+        handles.append(shm)
+        specs[name] = (shm.name, arr.shape)
+    return handles, specs
+
+
+def _attach(specs: Dict[str, tuple]) -> None:
+    """Pool initializer: map the parent's shared arrays (no copy)."""
+    _SHARED.clear()
+    for name, (shm_name, shape) in specs.items():
+        shm = shared_memory.SharedMemory(name=shm_name)
+        _HANDLES.append(shm)
+        _SHARED[name] = np.ndarray(shape, dtype="float64", buffer=shm.buf)
+
+
+def _last_event(events: np.ndarray) -> np.ndarray:
+    """Index of the most recent True at or before each row (-1 if none), per column."""
+    t = np.arange(events.shape[0], dtype=np.int32)[:, None]
+    last = np.where(events, t, np.int32(-1))
+    return np.maximum.accumulate(last, axis=0)
+
+
+def _eval_group(task: tuple, arrays: Optional[Dict[str, np.ndarray]] = None) -> List[dict]:
+    """
+    Evaluate all threshold pairs x fees for one (rsi_period, sma_window) group.
+    arrays: price/ret/rsi/sma in-process; None reads the pool worker's shared arrays.
+    """
+    (p_idx, rsi_period), (w_idx, sma_window), buys, sells, fees, periods_per_year = task
+    A = _SHARED if arrays is None else arrays
+    price, ret = A["price"], A["ret"]
+    rsi, sma = A["rsi"][:, p_idx], A["sma"][:, w_idx]
+
+    # Same rule as strategy.generate_signals: long iff the latest BUY is more recent
+    # than the latest SELL (SELL wins ties). Last-event indices are computed once per
+    # threshold, so each (buy, sell) pair costs a single comparison.
+    b = np.asarray(buys, dtype=float)
+    s = np.asarray(sells, dtype=float)
+    last_buy = _last_event((rsi[:, None] < b[None, :]) & (price > sma)[:, None])
+    last_sell = _last_event(rsi[:, None] > s[None, :])
+
+    pairs = list(itertools.product(range(len(b)), range(len(s))))
+    chunk = max(1, MAX_BLOCK_BYTES // max(8 * len(price), 1))
+    rows = []
+    for lo in range(0, len(pairs), chunk):
+        block = pairs[lo:lo + chunk]
+        bi = [p[0] for p in block]
+        si = [p[1] for p in block]
+        # Column-major so per-combo reductions run over contiguous memory
+        pos = np.asfortranarray(last_buy[:, bi] > last_sell[:, si], dtype="float64")
+        gross = np.zeros_like(pos)
+        gross[1:] = pos[:-1] * ret[1:, None]
+        changes = np.zeros_like(pos)
+        changes[1:] = pos[1:] != pos[:-1]
+        trades = changes.sum(axis=0)
+        for fee_bps in fees:
+            strat = gross - changes * (fee_bps / 10000.0)
+            equity = np.cumprod(1.0 + strat, axis=0)
+            m = batch_metrics(strat, equity, periods_per_year=periods_per_year)
+            for k, (i, j) in enumerate(block):
+                rows.append({
+                    "rsi_period": rsi_period, "sma_window": sma_window,
+                    "rsi_buy": buys[i], "rsi_sell": sells[j], "fee_bps": fee_bps,
+                    "sharpe": float(m["sharpe"][k]), "sortino": float(m["sortino"][k]),
+                    "max_drawdown": float(m["max_drawdown"][k]), "calmar": float(m["calmar"][k]),
+                    "win_rate": float(m["win_rate"][k]),
+                    "final_equity": float(equity[-1, k]), "trades": int(trades[k]),
+                })
+    return rows
+
+
+def sweep(
+    df: pd.DataFrame,
+    rsi_periods: Iterable[int] = (14,),
+    rsi_buy: Iterable[float] = (30.0,),
+    rsi_sell: Iterable[float] = (70.0,),
+    sma_windows: Iterable[int] = (20,),
+    fee_bps: Iterable[float] = (10.0,),
+    col: str = "BTC_USDT",
+    periods_per_year: float = 252.0,
+    n_jobs: Optional[int] = None,
+    cache=None,
+) -> pd.DataFrame:
+    """
+    Backtest every combination of the given parameters with the
+    generate_signals/backtest_long_only rules and return a table ranked by Sharpe
+    (NaN last). n_jobs=1 runs in-process; None uses one worker per CPU.
+    cache: optional IndicatorCache, so repeated sweeps reuse the RSI/SMA series.
+    """
+    rsi_periods, sma_windows = sorted(set(rsi_periods)), sorted(set(sma_windows))
+    buys, sells, fees = list(rsi_buy), list(rsi_sell), list(fee_bps)
+    base = df.sort_values("timestamp").reset_index(drop=True)[["timestamp", col]]
+    price = base[col].astype(float)
+
+    if cache is not None:
+        rsi = [cache.rsi(base, col, p) for p in rsi_periods]
+        sma = [cache.sma(base, col, w) for w in sma_windows]
+    else:
+        rsi = [add_rsi(base, col, period=p)[f"RSI_{p}"].to_numpy(dtype=float) for p in rsi_periods]
+        sma = [add_sma(base, col, windows=(w,))[f"SMA_{w}"].to_numpy(dtype=float) for w in sma_windows]
+    arrays = {
+        "price": price.to_numpy(),
+        "ret": price.pct_change().fillna(0.0).to_numpy(),
+        "rsi": np.column_stack(rsi),
+        "sma": np.column_stack(sma),
+    }
+    tasks = [(p, w, buys, sells, fees, periods_per_year)
+             for p in enumerate(rsi_periods) for w in enumerate(sma_windows)]
+
+    n_jobs = n_jobs or os.cpu_count() or 1
+    if n_jobs == 1 or len(tasks) == 1:
+        results = [_eval_group(t, arrays) for t in tasks]
+    else:
+        handles, specs = _to_shared(arrays)
+        try:
+            with ProcessPoolExecutor(max_workers=min(n_jobs, len(tasks)),
+                                     initializer=_attach, initargs=(specs,)) as pool:
+                results = list(pool.map(_eval_group, tasks))
+        finally:
+            for shm in handles:
+                shm.close()
+                shm.unlink()
+
+    table = pd.DataFrame([r for group in results for r in group])
+    table = table.sort_values("sharpe", ascending=False, na_position="last", kind="stable")
+    return table.reset_index(drop=True)
+
+
+def _grid(spec: str, cast=float) -> List:
+    """'10,14,20' -> [10, 14, 20]; 'start:stop:step' -> inclusive range."""
+    if ":" in spec:
+        start, stop, step = (float(x) for x in spec.split(":"))
+        return [cast(v) for v in np.arange(start, stop + step / 2, step)]
+    return [cast(x) for x in spec.split(",") if x.strip()]
+
+
+def parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Parameter sweep for the RSI/SMA long-only strategy")
+    p.add_argument("--csv", default="crypto_prices.csv", help="Path to CSV (default: crypto_prices.csv)")
+    p.add_argument("--rsi", default="14", help="RSI periods, e.g. 7,14,21 or 5:30:1")
+    p.add_argument("--buy", default="30", help="RSI buy thresholds, e.g. 20:40:1")
+    p.add_argument("--sell", default="70", help="RSI sell thresholds, e.g. 60:80:1")
+    p.add_argument("--sma", default="20", help="SMA windows, e.g. 10,20,50")
+    p.add_argument("--fee-bps", default="10", help="Fees in bps, e.g. 5,10")
+    p.add_argument("--jobs", type=int, default=None, help="Worker processes (default: CPU count)")
+    p.add_argument("--top", type=int, default=20, help="Rows to print (default: 20)")
+    p.add_argument("--out", default="outputs/sweep.csv", help="Where to save the full ranked table")
+    return p.parse_args()
+
+
+def main():
+    args = parse_args()
+    df = load_prices(args.csv)
+    table = sweep(
+        df,
+        rsi_periods=_grid(args.rsi, int), rsi_buy=_grid(args.buy), rsi_sell=_grid(args.sell),
+        sma_windows=_grid(args.sma, int), fee_bps=_grid(args.fee_bps), n_jobs=args.jobs,
+    )
+    os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+    table.to_csv(args.out, index=False)
+    print(table.head(args.top).to_string())
+    print(f"✅ {len(table)} combinations saved to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
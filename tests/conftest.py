@@ -1,3 +1,30 @@
 import os, sys
+import numpy as np
+import pandas as pd
+import pytest
 # Add project root (parent of tests/) to Python path so "import analysis" works
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+def price_walk(n=5000, start="2025-01-01", freq="min", seed=53, decimals=None, text=False):
+    """
+    Heavy-tailed (clipped Cauchy) BTC walk with ETH = BTC / 15; sharp jumps make
+    the RSI/SMA strategy trade. decimals rounds prices, text formats timestamps
+    like the logger.
+    """
+    rng = np.random.default_rng(seed)
+    btc = 50000 + np.cumsum(np.clip(rng.standard_t(1, n), -50, 50) * 20)
+    df = pd.DataFrame({
+        "timestamp": pd.date_range(start, periods=n, freq=freq),
+        "BTC_USDT": btc,
+        "ETH_USDT": btc / 15,
+    })
+    if decimals is not None:
+        df = df.round(decimals)
+    if text:
+        df["timestamp"] = df["timestamp"].dt.strftime("%Y-%m-%d %H:%M:%S")
+    return df
+
+@pytest.fixture
+def walk():
+    """price_walk as a fixture: walk(n, start=..., freq=...) -> test price frame."""
+    return price_walk
@@ -53,3 +53,37 @@ def test_plot_candles_creates_png(tmp_path):
     path = plot_candles(df, output_file=str(out))
     assert os.path.exists(path)
     assert os.path.getsize(path) > 0
+
+def test_iter_prices_chunk_consumers_match_full_load(tmp_path):
+    import numpy as np
+    from analysis import iter_prices, add_sma, add_rsi, basic_stats, calculate_drawdown
+    from streaming import ChunkedStats, ChunkedDrawdown, ChunkedSMA, ChunkedRSI
+
+    rng = np.random.default_rng(7)
+    n = 1000
+    ts = pd.date_range("2025-01-01", periods=n, freq="min").strftime("%Y-%m-%d %H:%M:%S")
+    btc = 50000 + np.cumsum(rng.normal(0, 50, n))
+    eth = 3000 + np.cumsum(rng.normal(0, 5, n))
+    p = tmp_path / "prices.csv"
+    pd.DataFrame({"timestamp": ts, "BTC_USDT": btc, "ETH_USDT": eth}).to_csv(p, index=False)
+
+    full = add_rsi(add_sma(load_prices(str(p)), windows=(20,)), period=14)
+    stats, dd, sma, rsi = ChunkedStats(), ChunkedDrawdown(), ChunkedSMA(20), ChunkedRSI(14)
+    got_sma, got_rsi, got_dd, rows = [], [], [], 0
+    for chunk in iter_prices(str(p), chunksize=97):
+        rows += len(chunk)
+        stats.update(chunk)
+        got_sma.append(sma.update(chunk["BTC_USDT"]))
+        got_rsi.append(rsi.update(chunk["BTC_USDT"]))
+        got_dd.append(dd.update(chunk["ETH_USDT"]))
+
+    assert rows == n
+    expected_stats = basic_stats(full)
+    for col in ("BTC_USDT", "ETH_USDT"):
+        for k in ("min", "max", "mean"):
+            assert np.isclose(stats.result()[col][k], expected_stats[col][k])
+    assert np.allclose(np.concatenate(got_sma), full["SMA_20"])
+    assert np.allclose(np.concatenate(got_rsi), full["RSI_14"].astype(float), equal_nan=True)
+    expected_dd = calculate_drawdown(full["ETH_USDT"])
+    assert np.allclose(np.concatenate(got_dd), expected_dd["dd_series"])
+    assert np.isclose(dd.max_drawdown, expected_dd["max_drawdown"])
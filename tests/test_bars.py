@@ -0,0 +1,78 @@
+import os
+import numpy as np
+import pandas as pd
+import bars
+from bars import BarAggregator, load_bars, resample_ohlc
+
+def _ticks(n=240, start="2025-09-01 10:00:00"):
+    rng = np.random.default_rng(1)
+    return pd.DataFrame({
+        "timestamp": pd.date_range(start, periods=n, freq="30s"),
+        "BTC_USDT": (50000 + np.cumsum(rng.normal(0, 20, n))).round(2),
+        "ETH_USDT": (3000 + np.cumsum(rng.normal(0, 2, n))).round(2),
+    })
+
+def _write(df, path, header=True):
+    out = df.assign(timestamp=df["timestamp"].dt.strftime("%Y-%m-%d %H:%M:%S"))
+    out.to_csv(path, mode="w" if header else "a", header=header, index=False)
+
+def test_resample_ohlc_real_candles():
+    df = _ticks()
+    bars = resample_ohlc(df, "BTC_USDT", "5m")
+    assert len(bars) == 24 and (bars["Ticks"] == 10).all()
+    first = df["BTC_USDT"].iloc[:10]
+    row = bars.iloc[0]
+    assert (row["Open"], row["High"], row["Low"], row["Close"]) == (first.iloc[0], first.max(), first.min(), first.iloc[-1])
+
+def test_aggregator_matches_batch():
+    df = _ticks()
+    agg = BarAggregator("5m")
+    closed = [b for t, p in zip(df["timestamp"], df["BTC_USDT"]) if (b := agg.update(t, p))]
+    batch = resample_ohlc(df, "BTC_USDT", "5m")
+    assert len(closed) == len(batch) - 1  # last bar is still open
+    assert [b["Close"] for b in closed] == list(batch["Close"].iloc[:-1])
+    assert agg.bar["Close"] == batch["Close"].iloc[-1]
+
+def test_load_bars_extends_cache_incrementally(tmp_path):
+    df = _ticks()
+    csv_path = str(tmp_path / "prices.csv")
+    _write(df.iloc[:97], csv_path)  # cut in the middle of a 5m bar
+    cache = str(tmp_path / "cache")
+    first = load_bars(csv_path, "5m", cache_dir=cache)
+    assert len(first) == 10 and first["Ticks"].iloc[-1] == 7
+
+    _write(df.iloc[97:], csv_path, header=False)
+    with open(csv_path, "a") as f:
+        f.write("2025-09-01 12:00:00,5")  # half-written row must be ignored
+    second = load_bars(csv_path, "5m", cache_dir=cache)
+    expected = resample_ohlc(df, "BTC_USDT", "5m")
+    pd.testing.assert_frame_equal(second, expected)
+    assert len(pd.read_csv(os.path.join(cache, "prices.csv.BTC_USDT.5m.csv"))) == 23
+
+def test_load_bars_rebuilds_after_longer_replacement(tmp_path):
+    df = _ticks()
+    csv_path = str(tmp_path / "prices.csv")
+    cache = str(tmp_path / "cache")
+    _write(df.iloc[:60], csv_path)
+    load_bars(csv_path, "5m", cache_dir=cache)
+    later = df.assign(timestamp=df["timestamp"] + pd.Timedelta(days=1), BTC_USDT=(df["BTC_USDT"] * 1.0001).round(2))
+    _write(later, csv_path)  # same header, longer, rewritten in place
+    pd.testing.assert_frame_equal(load_bars(csv_path, "5m", cache_dir=cache), resample_ohlc(later, "BTC_USDT", "5m"))
+    assert not any(name.endswith(".tmp") for name in os.listdir(cache))
+
+def test_load_bars_reads_in_chunks_and_appends(tmp_path, monkeypatch):
+    df = _ticks()
+    csv_path = str(tmp_path / "prices.csv")
+    cache = str(tmp_path / "cache")
+    bars_path = os.path.join(cache, "prices.csv.BTC_USDT.5m.csv")
+    monkeypatch.setattr(bars, "READ_BYTES", 100)  # a few lines per chunk
+    _write(df.iloc[:150], csv_path)
+    load_bars(csv_path, "5m", cache_dir=cache)
+    inode = os.stat(bars_path).st_ino
+    with open(bars_path, "a") as f:
+        f.write("2025-09-01 11:15:00,1,2")  # rows from an interrupted call are cut off
+    _write(df.iloc[150:], csv_path, header=False)
+    pd.testing.assert_frame_equal(load_bars(csv_path, "5m", cache_dir=cache), resample_ohlc(df, "BTC_USDT", "5m"))
+    assert os.stat(bars_path).st_ino == inode  # appended, not rewritten
+    pd.testing.assert_frame_equal(pd.read_csv(bars_path, parse_dates=["timestamp"]),
+                                  resample_ohlc(df, "BTC_USDT", "5m").iloc[:-1])
@@ -0,0 +1,29 @@
+import pandas as pd
+from benchmarks.synthetic import iter_chunks, random_walk, write_csv
+from benchmarks.suite import compare, run_suite
+from analysis import load_prices
+
+def test_synthetic_walk_is_deterministic_and_loadable(tmp_path):
+    df = random_walk(1000, seed=7)
+    assert df.equals(random_walk(1000, seed=7))
+    assert pd.concat(list(iter_chunks(1000, seed=7, chunk=300)), ignore_index=True).equals(df)
+    loaded = load_prices(write_csv(str(tmp_path / "p.csv"), 1000, seed=7, chunk=300))
+    assert len(loaded) == 1000 and (loaded["BTC_USDT"] > 0).all()
+
+def test_suite_runs_and_flags_regressions():
+    results = run_suite([500], ["add_rsi", "generate_signals", "csv_append"], repeat=1)
+    assert [(r["stage"], r["rows"]) for r in results] == [
+        ("add_rsi", 500), ("generate_signals", 500), ("csv_append", 500)]
+    assert not any(c["regression"] for c in compare(results, results))
+    base = [dict(r, min=0.1) for r in results]
+    slow = [dict(r, min=0.13) for r in results]
+    assert all(c["regression"] for c in compare(slow, base, threshold=0.2))
+    assert not any(c["regression"] for c in compare(slow, base, threshold=0.5))
+    noisy = [dict(r, min=0.001) for r in results]
+    assert not any(c["regression"] for c in compare(noisy, [dict(r, min=0.0001) for r in results]))
+
+def test_compare_reports_stages_missing_from_baseline():
+    results = [{"stage": "add_rsi", "rows": 500, "min": 0.1}, {"stage": "backtest_execution", "rows": 500, "min": 0.2}]
+    cmp = compare(results, results[:1])
+    assert [(c["stage"], c["baseline"], c["regression"]) for c in cmp] == [
+        ("add_rsi", 0.1, False), ("backtest_execution", None, False)]
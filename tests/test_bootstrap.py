@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+import pytest
+import bootstrap as bootstrap_module
+from bootstrap import block_paths, bootstrap, confidence_intervals, point_estimates
+from metrics import batch_metrics, summarize
+from strategy import generate_signals, backtest_long_only
+
+def _returns(walk):
+    return backtest_long_only(generate_signals(walk()))["strategy_ret"].to_numpy()
+
+@pytest.mark.parametrize("block", [1, 7, 50, 5000])
+def test_block_bootstrap_matches_metrics_on_materialized_paths(block, walk):
+    r = _returns(walk)
+    samples = bootstrap(r, 40, block=block, seed=7)
+    paths = block_paths(r, 40, block=block, seed=7)
+    ref = batch_metrics(paths.T)
+    np.testing.assert_allclose(samples["sharpe"], ref["sharpe"], rtol=1e-7)
+    np.testing.assert_allclose(samples["max_drawdown"], ref["max_drawdown"], rtol=1e-9, atol=1e-12)
+    np.testing.assert_allclose(samples["final_equity"], np.prod(1 + paths, axis=1), rtol=1e-9)
+
+def test_offset_resamples_are_suffixes_of_the_real_path(walk):
+    r = _returns(walk)
+    samples = bootstrap(r, 30, method="offset", max_offset=1000, seed=3)
+    assert samples["offset"].between(0, 1000).all()
+    for row in samples.head(10).itertuples():
+        ref = summarize(r[row.offset:])
+        assert row.sharpe == pytest.approx(ref["sharpe"], rel=1e-7)
+        assert row.max_drawdown == pytest.approx(ref["max_drawdown"], abs=1e-12)
+        assert row.final_equity == pytest.approx(np.prod(1 + r[row.offset:]), rel=1e-9)
+
+def test_seeded_chunked_and_parallel_runs_agree(walk):
+    r = _returns(walk)
+    a = bootstrap(r, 300, seed=11, chunk=64)
+    pd.testing.assert_frame_equal(a, bootstrap(r, 300, seed=11, chunk=64, n_jobs=2))
+    assert len(bootstrap(r, 300, seed=11, chunk=1000)) == 300
+    assert not a.equals(bootstrap(r, 300, seed=12, chunk=64))
+    assert not bootstrap_module._SUMMARIES  # in-process runs don't keep the summaries alive
+
+def test_confidence_intervals_bracket_the_point_estimate(walk):
+    r = _returns(walk)
+    point = point_estimates(r)
+    ref = summarize(r)
+    assert point["sharpe"] == pytest.approx(ref["sharpe"]) and point["max_drawdown"] == pytest.approx(ref["max_drawdown"])
+    table = confidence_intervals(bootstrap(r, 500, seed=1), 0.9, point)
+    assert list(table.index) == ["sharpe", "max_drawdown", "final_equity"]
+    assert (table["low"] <= table["median"]).all() and (table["median"] <= table["high"]).all()
+    assert (table.loc["max_drawdown", ["low", "high"]] <= 0).all()
+    assert table.loc["final_equity", "low"] < point["final_equity"] < table.loc["final_equity", "high"]
+    with pytest.raises(ValueError):
+        bootstrap(r, 10, method="jackknife")
@@ -0,0 +1,67 @@
+import os
+import asyncio
+import functools
+from collector import Collector, merge_shards, shard_pairs
+
+class StubExchange:
+    """Async stand-in for a ccxt exchange; prices encode the exchange and symbol."""
+    rateLimit = 10
+    has = {"fetchTickers": True}
+
+    def __init__(self, name, crash_marker=None):
+        self.name = name
+        self.crash_marker = crash_marker
+
+    async def fetch_tickers(self, symbols):
+        if self.crash_marker and not os.path.exists(self.crash_marker):
+            open(self.crash_marker, "w").close()
+            os._exit(3)  # simulate a hard crash, once
+        await asyncio.sleep(0.001)
+        return {s: {"last": float(len(self.name) * 100 + len(s))} for s in symbols}
+
+    async def close(self):
+        pass
+
+def stub_factory(name, crash_marker=None):
+    return StubExchange(name, crash_marker)
+
+EXCHANGES = {
+    "alpha": [f"A{i}/USDT" for i in range(5)],
+    "beta": ["BTC/USDT", "ETH/USDT", "SOL/USDT"],
+}
+
+def test_shard_pairs_balanced_and_complete():
+    shards = shard_pairs(EXCHANGES, 3)
+    sizes = [sum(len(v) for v in s.values()) for s in shards]
+    assert max(sizes) - min(sizes) <= 1
+    pairs = sorted((e, s) for sh in shards for e, syms in sh.items() for s in syms)
+    assert pairs == sorted((e, s) for e, syms in EXCHANGES.items() for s in syms)
+    assert shard_pairs(EXCHANGES, 3) == shards
+    assert len(shard_pairs({"alpha": ["X/USDT"]}, 4)) == 1
+
+def test_collector_writes_shards_reports_metrics_and_merges(tmp_path):
+    out = tmp_path / "shards"
+    c = Collector(EXCHANGES, workers=2, interval=0.05, out_dir=str(out), factory=stub_factory,
+                  report_every=0.02)
+    stats = c.run(max_ticks=3, poll_every=0.05)
+    assert set(stats) == {0, 1}
+    for st in stats.values():
+        assert st["rows"] == 6 and st["restarts"] == 0 and st["finished"]
+        assert st["prices_per_sec"] > 0 and st["lag_sec"] is not None
+    assert os.path.exists(out / "_workers.json")
+    assert sorted(os.listdir(out / "alpha")) == ["w00.csv", "w01.csv"]
+
+    merged = merge_shards(str(out), freq="1D")
+    assert len(merged) == 1
+    assert len(merged.columns) == 1 + 8
+    assert merged["beta_BTC_USDT"].iloc[0] == 400 + len("BTC/USDT")
+
+def test_crashed_worker_is_restarted(tmp_path):
+    out = tmp_path / "shards"
+    factory = functools.partial(stub_factory, crash_marker=str(tmp_path / "crashed"))
+    c = Collector({"alpha": ["BTC/USDT"]}, workers=1, interval=0.02, out_dir=str(out),
+                  factory=factory, restart_delay=0.01)
+    stats = c.run(max_ticks=2, poll_every=0.02)
+    assert stats[0]["restarts"] == 1
+    assert stats[0]["rows"] == 2
+    assert len((out / "alpha" / "w00.csv").read_text().strip().splitlines()) == 3
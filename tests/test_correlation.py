@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+import pytest
+from correlation import (StreamingCorrelation, correlation_matrix, parse_pairs, rolling_beta,
+                         save_correlation_csv, spread_zscores)
+from plotting import plot_correlation_matrix, plot_rolling_correlation
+
+def _df(walk, n=3000):
+    df = walk(n, text=True)
+    rng = np.random.default_rng(7)
+    eth = df["ETH_USDT"] * np.exp(np.cumsum(rng.normal(0, 1e-3, n)))
+    return df.assign(ETH_USDT=eth, SOL_USDT=eth / 20 * (1 + rng.normal(0, 1e-3, n)))
+
+def test_rolling_beta_matches_pandas_rolling(walk):
+    df = _df(walk)
+    df.loc[100:110, "SOL_USDT"] = np.nan
+    out = rolling_beta(df, windows=(30, 200))
+    r = df[["BTC_USDT", "ETH_USDT", "SOL_USDT"]].pct_change(fill_method=None)
+    for s in ("ETH_USDT", "SOL_USDT"):
+        for w in (30, 200):
+            corr = r[s].rolling(w).corr(r["BTC_USDT"])
+            beta = r[s].rolling(w).cov(r["BTC_USDT"]) / r["BTC_USDT"].where(r[s].notna()).rolling(w).var()
+            np.testing.assert_allclose(out[f"CORR_{s}_{w}"], corr, atol=1e-10)
+            np.testing.assert_allclose(out[f"BETA_{s}_{w}"], beta, rtol=1e-8, atol=1e-10)
+    stepped = rolling_beta(df, windows=(30,), step=7)
+    assert stepped["timestamp"].iloc[-1] == df["timestamp"].iloc[-1]
+    pd.testing.assert_frame_equal(stepped, out.iloc[(len(df) - 1) % 7::7][list(stepped.columns)].reset_index(drop=True))
+    with pytest.raises(ValueError):
+        rolling_beta(df[["timestamp", "BTC_USDT"]])
+
+def test_spread_zscore_matches_per_window_ols(walk):
+    df = _df(walk, 800)
+    out = spread_zscores(df, parse_pairs("ETH_USDT:BTC_USDT"), windows=(50,))
+    la, lb = np.log(df["ETH_USDT"].to_numpy()), np.log(df["BTC_USDT"].to_numpy())
+    for t in (49, 300, 799):
+        a, b = la[t - 49:t + 1], lb[t - 49:t + 1]
+        hedge = np.cov(a, b)[0, 1] / np.var(b, ddof=1)
+        s = a - hedge * b
+        assert out["HEDGE_ETH_USDT_BTC_USDT_50"].iloc[t] == pytest.approx(hedge, rel=1e-6)
+        assert out["Z_ETH_USDT_BTC_USDT_50"].iloc[t] == pytest.approx((s[-1] - s.mean()) / s.std(ddof=1), rel=1e-5, abs=1e-6)
+    assert out["Z_ETH_USDT_BTC_USDT_50"].iloc[:49].isna().all()
+    with pytest.raises(ValueError):
+        parse_pairs("ETH_USDT")
+
+def test_streaming_matches_batch(walk):
+    df = _df(walk, 1500)
+    pairs = [("ETH_USDT", "BTC_USDT"), ("SOL_USDT", "ETH_USDT")]
+    live = StreamingCorrelation(["BTC_USDT", "ETH_USDT", "SOL_USDT"], windows=(20, 100), pairs=pairs,
+                                matrix_window=100, resync=400)
+    got = pd.DataFrame([live.update(row) for row in df.to_dict("records")])
+    ref = rolling_beta(df, windows=(20, 100)).merge(spread_zscores(df, pairs, windows=(20, 100)), on="timestamp")
+    for c in got.columns:
+        np.testing.assert_allclose(got[c], ref[c], rtol=1e-7, atol=1e-8, err_msg=c)
+    pd.testing.assert_frame_equal(live.matrix().loc[["BTC_USDT", "ETH_USDT", "SOL_USDT"], ["BTC_USDT", "ETH_USDT", "SOL_USDT"]],
+                                  correlation_matrix(df, 100), atol=1e-9)
+
+def test_matrix_matches_dataframe_corr_and_outputs(tmp_path, walk):
+    df = _df(walk)
+    df.loc[2950:2960, "ETH_USDT"] = np.nan
+    ref = df.drop(columns="timestamp").pct_change(fill_method=None).tail(100).corr()
+    pd.testing.assert_frame_equal(correlation_matrix(df, 100), ref, atol=1e-12)
+    frame = rolling_beta(df).merge(spread_zscores(df, [("ETH_USDT", "BTC_USDT")]), on="timestamp")
+    path = save_correlation_csv(frame, str(tmp_path / "out" / "correlation.csv"))
+    assert list(pd.read_csv(path).columns) == list(frame.columns)
+    chart = plot_rolling_correlation(frame, str(tmp_path / "corr.png"))
+    heat = plot_correlation_matrix(ref, str(tmp_path / "heat.png"))
+    assert open(chart, "rb").read(4) == b"\x89PNG" and open(heat, "rb").read(4) == b"\x89PNG"
@@ -0,0 +1,86 @@
+import os
+import pandas as pd
+from analysis import load_prices
+from csv_index import CsvIndex
+from price_tracker import open_writer
+
+def _df(walk, n=5000):
+    return walk(n, freq="s", decimals=2)
+
+def _write(df, path, header=True):
+    out = df.assign(timestamp=df["timestamp"].dt.strftime("%Y-%m-%d %H:%M:%S"))
+    out.to_csv(path, mode="w" if header else "a", header=header, index=False)
+
+def test_range_and_last_n_match_a_full_load(tmp_path, walk):
+    path = str(tmp_path / "prices.csv")
+    _write(_df(walk), path)
+    full = load_prices(path)
+    start, end = "2025-01-01 00:20:00", "2025-01-01 00:41:39"
+    ref = full[(full["timestamp"] >= start) & (full["timestamp"] <= end)].reset_index(drop=True)
+    pd.testing.assert_frame_equal(load_prices(path, start=start, end=end), ref)
+    pd.testing.assert_frame_equal(load_prices(path, last_n=777), full.tail(777).reset_index(drop=True))
+    pd.testing.assert_frame_equal(load_prices(path, start=start, end=end, last_n=10), ref.tail(10).reset_index(drop=True))
+    assert len(load_prices(path, last_n=10 ** 6)) == len(full)
+
+    idx = CsvIndex(path, stride=64).rebuild()
+    lo, hi = idx.byte_range(start, end)
+    assert 0 < lo and hi < os.path.getsize(path)  # only a slice of the file is parsed
+    assert len(idx.read(last_n=5)) < 2 * 64 + 5
+
+def test_index_extends_incrementally_and_rebuilds_when_stale(tmp_path, walk):
+    path = str(tmp_path / "prices.csv")
+    df = _df(walk, 3000)
+    _write(df.iloc[:1000], path)
+    idx = CsvIndex(path, stride=100).update()
+    assert idx.meta["rows"] == 1000 and idx.meta["entries"] == 10
+    _write(df.iloc[1000:], str(tmp_path / "rest.csv"), header=False)
+    rest = (tmp_path / "rest.csv").read_bytes()
+    with open(path, "ab") as f:  # a half-written row is left for the next update
+        f.write(rest[:30])
+    assert CsvIndex(path).update().meta["rows"] == 1000
+    with open(path, "ab") as f:
+        f.write(rest[30:])
+    idx = CsvIndex(path).update()
+    assert idx.meta["rows"] == 3000 and idx.meta["entries"] == 30
+    assert idx.sorted
+
+    _write(df.iloc[:500], path)  # file replaced by a shorter one
+    idx = CsvIndex(path).update()
+    assert idx.meta["rows"] == 500 and len(idx.entries) == 5
+    pd.testing.assert_frame_equal(load_prices(path, last_n=50), load_prices(path).tail(50).reset_index(drop=True))
+
+def test_replaced_by_a_longer_file_with_the_same_header_rebuilds(tmp_path, walk):
+    path = str(tmp_path / "prices.csv")
+    _write(_df(walk, 3000), path)
+    assert CsvIndex(path, stride=100).update().meta["rows"] == 3000
+    wider = _df(walk, 6000).assign(timestamp=pd.date_range("2025-03-01", periods=6000, freq="s"))
+    wider[["BTC_USDT", "ETH_USDT"]] += 0.123456789
+    _write(wider, path)  # same header, rewritten in place (same inode)
+    idx = CsvIndex(path).update()
+    assert idx.meta["rows"] == 6000 and len(idx.entries) == 60
+    start, end = "2025-03-01 00:00:00", "2025-03-01 00:20:00"
+    assert len(load_prices(path, start=start, end=end)) == 1201
+
+    os.replace(str(tmp_path / "prices.csv"), str(tmp_path / "old.csv"))
+    _write(wider.iloc[:10], str(tmp_path / "new.csv"))
+    os.replace(str(tmp_path / "new.csv"), path)  # rotated: new inode, shorter file
+    assert CsvIndex(path).update().meta["rows"] == 10
+
+def test_unsorted_log_falls_back_to_full_read(tmp_path, walk):
+    path = str(tmp_path / "prices.csv")
+    df = _df(walk, 3000)
+    _write(pd.concat([df.iloc[1500:], df.iloc[:1500]]), path)
+    assert not CsvIndex(path, stride=100).update().sorted
+    got = load_prices(path, start="2025-01-01 00:10:00", end="2025-01-01 00:30:00")
+    assert len(got) == 1201 and got["timestamp"].is_monotonic_increasing
+
+def test_logger_writer_keeps_the_index_current(tmp_path, walk):
+    path = str(tmp_path / "prices.csv")
+    df = _df(walk, 300)
+    with open_writer(path, ["timestamp", "BTC_USDT", "ETH_USDT"], fsync="never") as w:
+        for r in df.assign(timestamp=df["timestamp"].dt.strftime("%Y-%m-%d %H:%M:%S")).to_dict("records"):
+            w.write(r)
+        w.flush()
+        idx = CsvIndex(path)
+        assert idx._load_meta()["rows"] == 300
+    assert load_prices(path, last_n=3)["BTC_USDT"].tolist() == df["BTC_USDT"].tail(3).tolist()
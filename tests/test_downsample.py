@@ -0,0 +1,88 @@
+import os
+import numpy as np
+import pytest
+import downsample
+from downsample import fit_to_width, lttb_indices, minmax_indices, reuse_figure
+from analysis import plot_price_with_mas, plot_rsi, plot_prices, add_sma, add_rsi
+from strategy import generate_signals, backtest_long_only, plot_price_with_signals
+
+def _df(walk, n=50_000):
+    return walk(n, freq="s")
+
+def test_minmax_keeps_extremes_and_endpoints(walk):
+    y = _df(walk)["BTC_USDT"].to_numpy()
+    idx = minmax_indices(y, 1000)
+    assert idx[0] == 0 and idx[-1] == len(y) - 1
+    assert np.all(np.diff(idx) > 0)
+    assert len(idx) <= 4 * 1000
+    assert y.argmin() in idx and y.argmax() in idx
+    # every bucket's extremes survive
+    size = -(-len(y) // 1000)
+    for b in range(0, len(y), size * 97):
+        seg = y[b:b + size]
+        assert b + seg.argmin() in idx and b + seg.argmax() in idx
+
+def test_minmax_short_or_nan_input():
+    assert list(minmax_indices([1.0, 2.0, 3.0], 10)) == [0, 1, 2]
+    y = np.r_[np.full(500, np.nan), np.arange(500.0)]
+    idx = minmax_indices(y, 10)
+    assert 999 in idx and 500 in idx
+
+def test_lttb_budget_and_shape(walk):
+    df = _df(walk, 20_000)
+    x = np.arange(len(df), dtype=float)
+    y = df["BTC_USDT"].to_numpy()
+    idx = lttb_indices(x, y, 500)
+    assert len(idx) == 500
+    assert idx[0] == 0 and idx[-1] == len(y) - 1
+    assert np.all(np.diff(idx) > 0)
+    # a spike is picked up
+    y2 = np.zeros(20_000); y2[12_345] = 100.0
+    assert 12_345 in lttb_indices(x, y2, 100)
+
+def test_fit_to_width_auto_and_opt_out(walk):
+    df = _df(walk, 5000)
+    assert fit_to_width(df, ["BTC_USDT"], 6000) is df  # fewer rows than pixels
+    assert fit_to_width(df, ["BTC_USDT"], 100, enabled=False) is df
+    small = fit_to_width(df, ["BTC_USDT"], 100)
+    assert len(small) <= 400
+    keep = np.zeros(len(df), dtype=bool); keep[[7, 1234, 4321]] = True
+    kept = fit_to_width(df, ["BTC_USDT"], 100, method="lttb", keep=keep)
+    assert {7, 1234, 4321} <= set(kept.index)
+    with pytest.raises(ValueError):
+        fit_to_width(df, ["BTC_USDT"], 100, method="nope")
+    downsample.set_enabled(False)
+    try:
+        assert fit_to_width(df, ["BTC_USDT"], 100) is df
+    finally:
+        downsample.set_enabled(True)
+
+def test_reuse_figure_is_cached_and_cleared():
+    fig, ax = reuse_figure((4, 2))
+    ax.plot([1, 2], [3, 4])
+    fig2, ax2 = reuse_figure((4, 2))
+    assert fig2 is fig and len(fig2.axes) == 1 and not ax2.lines
+
+def test_plots_downsample_large_frames(tmp_path, walk):
+    df = add_rsi(add_sma(_df(walk), windows=(5, 20)), period=14)
+    for fn, name in ((plot_price_with_mas, "ma.png"), (plot_prices, "line.png"), (plot_rsi, "rsi.png")):
+        out = str(tmp_path / name)
+        assert fn(df, out) == out and os.path.getsize(out) > 0
+        fig = downsample._FIGURES[{"ma.png": (11, 6), "line.png": (10, 5), "rsi.png": (11, 3)}[name]]
+        drawn = sum(len(line.get_xdata()) for line in fig.axes[0].lines if len(line.get_xdata()) > 2)
+        assert drawn < len(df)
+    plot_prices(df, str(tmp_path / "full.png"), downsample=False)
+    line = downsample._FIGURES[(10, 5)].axes[0].lines[0]
+    assert len(line.get_xdata()) == len(df)
+    plot_price_with_mas(df.rename(columns={"ETH_USDT": "ETH_USD"}), str(tmp_path / "eth.png"), col="ETH_USD")
+    assert downsample._FIGURES[(11, 6)].axes[0].get_title() == "ETH/USD with SMA(5, 20)"
+
+def test_signal_chart_keeps_every_marker(tmp_path, walk):
+    bt = backtest_long_only(generate_signals(_df(walk)))
+    n_marks = int(bt["signal"].isin(("BUY", "SELL")).sum())
+    assert n_marks > 0
+    plot_price_with_signals(bt, str(tmp_path / "sig.png"))
+    ax = downsample._FIGURES[(12, 6)].axes[0]
+    price = ax.lines[0]
+    assert len(price.get_xdata()) < len(bt)
+    assert sum(len(c.get_offsets()) for c in ax.collections) == n_marks
@@ -0,0 +1,93 @@
+import numpy as np
+import pandas as pd
+import pytest
+from execution import (
+    ExecutionModel, FixedSlippage, SpreadSlippage, VolatilitySlippage, parse_slippage, simulate, trade_log,
+    EXIT_SIGNAL, EXIT_STOP, EXIT_TAKE,
+)
+from strategy import BUY, SELL, HOLD, generate_signals, backtest_long_only, codes_from_signal
+
+def test_default_model_matches_legacy_backtest(walk):
+    sig = generate_signals(walk())
+    legacy = backtest_long_only(sig)
+    bt = backtest_long_only(sig, execution=ExecutionModel())
+    assert (bt["held"].to_numpy() == legacy["position"].to_numpy()).all()
+    np.testing.assert_allclose(bt["strategy_ret"], legacy["strategy_ret"], rtol=0, atol=1e-15)
+    np.testing.assert_allclose(bt["equity"], legacy["equity"], rtol=1e-12)
+    assert (bt["exit_reason"].isin(["", "signal"])).all()
+
+def test_codes_from_signal_roundtrip(walk):
+    sig = generate_signals(walk(500))
+    codes = codes_from_signal(sig["signal"])
+    assert (codes == codes_from_signal(sig["signal"].astype(str))).all()
+    assert set(np.unique(codes)) <= {HOLD, BUY, SELL}
+
+def test_next_bar_fill_and_latency_shift_the_position(walk):
+    sig = generate_signals(walk())
+    price, codes = sig["BTC_USDT"].to_numpy(), codes_from_signal(sig["signal"])
+    base = simulate(price, codes)
+    nxt = simulate(price, codes, fill="next")
+    late = simulate(price, codes, fill="close", latency=1)
+    slow = simulate(price, codes, fill="next", latency=3)
+    assert (nxt["held"][1:] == base["held"][:-1]).all() and nxt["held"][0] == 0
+    assert (late["held"] == nxt["held"]).all()
+    assert (slow["held"][4:] == base["held"][:-4]).all()
+    assert not simulate(price[:3], codes[:3], latency=10)["held"].any()
+
+def test_slippage_models_charge_only_fill_bars(walk):
+    sig = generate_signals(walk())
+    price, codes = sig["BTC_USDT"].to_numpy(), codes_from_signal(sig["signal"])
+    base = simulate(price, codes, fee_bps=10)
+    fixed = simulate(price, codes, fee_bps=10, slippage=FixedSlippage(5))
+    np.testing.assert_allclose(fixed["strategy_ret"], simulate(price, codes, fee_bps=15)["strategy_ret"])
+    fills = np.flatnonzero(base["cost"])
+    assert len(fills) > 0 and (fixed["cost"][fills] == pytest.approx(0.0015))
+
+    vol = simulate(price, codes, fee_bps=0, slippage=VolatilitySlippage(k=2.0, window=20))
+    ref = 2.0 * pd.Series(price).pct_change().rolling(20, min_periods=2).std().fillna(0.0).to_numpy()
+    np.testing.assert_allclose(vol["cost"][fills], ref[fills], rtol=1e-9)
+    assert (vol["cost"][np.setdiff1d(np.arange(len(price)), fills)] == 0).all()
+
+    spread = simulate(price, codes, fee_bps=0, slippage=SpreadSlippage(spread=price * 4e-4))
+    np.testing.assert_allclose(spread["cost"][fills], 2e-4)
+    np.testing.assert_allclose(simulate(price, codes, fee_bps=0, slippage=SpreadSlippage(bps=4))["cost"],
+                               spread["cost"])
+    with pytest.raises(ValueError):
+        SpreadSlippage()
+
+def test_parse_slippage():
+    assert parse_slippage("") is None
+    assert parse_slippage("fixed:5").bps == 5
+    v = parse_slippage("vol:0.3:50")
+    assert (v.k, v.window) == (0.3, 50)
+    assert parse_slippage("spread:2").bps == 2
+    with pytest.raises(ValueError):
+        parse_slippage("magic:1")
+
+def test_stop_loss_and_take_profit_exits():
+    price = np.array([100, 100, 99, 97, 98, 101, 101, 106, 107, 100, 100.0])
+    codes = np.array([HOLD, BUY, HOLD, HOLD, BUY, HOLD, BUY, HOLD, HOLD, SELL, HOLD], dtype=np.int8)
+    plain = simulate(price, codes, fee_bps=0)
+    assert list(plain["held"]) == [0, 1, 1, 1, 1, 1, 1, 1, 1, 0, 0]
+    assert plain["exit_reason"][9] == EXIT_SIGNAL
+
+    res = simulate(price, codes, fee_bps=0, stop_loss=0.02, take_profit=0.04)
+    # entry @100 -> stop at 97 (bar 3); re-enter on the BUY at bar 4 @98 -> take profit at 106 (bar 7)
+    assert list(res["held"]) == [0, 1, 1, 0, 1, 1, 1, 0, 0, 0, 0]
+    assert res["exit_reason"][3] == EXIT_STOP and res["exit_reason"][7] == EXIT_TAKE
+    assert res["exit_reason"][9] == 0  # already flat when the SELL arrives
+    np.testing.assert_allclose(res["equity"][-1], 0.97 * (106 / 98))
+
+def test_backtest_with_execution_and_trade_log(walk):
+    sig = generate_signals(walk())
+    model = ExecutionModel(fill="next", latency=2, slippage=FixedSlippage(5), stop_loss=0.001, take_profit=0.002)
+    bt = backtest_long_only(sig, execution=model)
+    assert {"held", "cost", "exit_reason", "strategy_ret", "equity"} <= set(bt.columns)
+    trades = trade_log(bt)
+    assert len(trades) == int((np.diff(np.r_[0, bt["held"].to_numpy()]) == 1).sum())
+    assert set(trades["reason"]) <= {"signal", "stop_loss", "take_profit", "open"}
+    assert (trades["exit_time"] >= trades["entry_time"]).all()
+    with pytest.raises(ValueError):
+        ExecutionModel(fill="open")
+    with pytest.raises(ValueError):
+        ExecutionModel(latency=-1)
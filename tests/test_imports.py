@@ -0,0 +1,30 @@
+import pytest
+from benchmarks.imports import HEAVY, import_profile, parse_importtime
+
+@pytest.mark.parametrize("module", ["strategy", "analysis", "sweep", "execution", "price_tracker", "scheduler"])
+def test_core_modules_skip_plotting_and_exchange_imports(module):
+    prof = import_profile(module)
+    assert prof["heavy"] == [], f"{module} imports {prof['heavy']} at import time"
+    assert prof["ms"] > 0
+
+def test_parse_importtime():
+    err = ("import time: self [us] | cumulative | imported package\n"
+           "import time:       120 |        120 |   _io\n"
+           "import time:      4345 |    1058797 | strategy\n")
+    assert parse_importtime(err) == {"_io": 120, "strategy": 1058797}
+    assert "matplotlib" in HEAVY
+
+def test_plotting_names_still_reachable_from_analysis():
+    import analysis
+    import plotting
+    assert analysis.plot_price_with_mas is plotting.plot_price_with_mas
+    assert analysis.HAS_MPF == plotting.HAS_MPF
+    with pytest.raises(AttributeError):
+        analysis.plot_nothing
+
+def test_scheduler_backoff_table_loads_ccxt_on_demand():
+    import ccxt
+    import scheduler
+    assert scheduler.classify(ccxt.RateLimitExceeded("429"))[1:] == (2.0, 60.0, True)
+    assert not hasattr(scheduler, "BACKOFF")
+    assert scheduler.classify(OSError("boom"))[1:] == scheduler.DEFAULT_BACKOFF
@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+from analysis import add_sma, add_rsi
+from indicator_cache import IndicatorCache
+
+def _df(n=500, seed=3):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "timestamp": pd.date_range("2025-01-01", periods=n, freq="min"),
+        "BTC_USDT": 50000 + np.cumsum(rng.normal(0, 50, n)),
+    })
+
+def test_cache_hit_returns_same_series():
+    df = _df()
+    cache = IndicatorCache()
+    first = cache.rsi(df, period=14)
+    again = cache.rsi(df.copy(), period=14)
+    assert cache.stats == {"hits": 1, "extended": 0, "misses": 1}
+    assert np.array_equal(first, again, equal_nan=True)
+    expected = add_rsi(df, period=14)["RSI_14"].to_numpy(dtype=float)
+    assert np.array_equal(first, expected, equal_nan=True)
+
+def test_grown_data_is_extended_not_recomputed():
+    df = _df(800)
+    cache = IndicatorCache()
+    cache.sma(df.iloc[:500], window=20)
+    cache.rsi(df.iloc[:500], period=14)
+    sma = cache.sma(df, window=20)
+    rsi = cache.rsi(df, period=14)
+    assert cache.stats["extended"] == 2 and cache.stats["misses"] == 2
+    assert np.allclose(sma, add_sma(df, windows=(20,))["SMA_20"])
+    assert np.allclose(rsi, add_rsi(df, period=14)["RSI_14"].astype(float), equal_nan=True)
+
+def test_changed_history_is_recomputed():
+    df = _df()
+    cache = IndicatorCache()
+    cache.sma(df, window=5)
+    edited = df.copy()
+    edited.loc[10, "BTC_USDT"] += 1.0
+    got = cache.sma(edited, window=5)
+    assert cache.stats["misses"] == 2
+    assert np.allclose(got, add_sma(edited, windows=(5,))["SMA_5"])
+
+def test_disk_tier_survives_new_instance_and_evicts_by_size(tmp_path):
+    df = _df()
+    IndicatorCache(disk_dir=str(tmp_path)).rsi(df, period=14)
+    cache = IndicatorCache(disk_dir=str(tmp_path))
+    cache.rsi(df, period=14)
+    assert cache.stats["hits"] == 1
+
+    small = IndicatorCache(disk_dir=str(tmp_path), max_disk_bytes=6000)
+    for w in (5, 10, 20):
+        small.sma(df, window=w)
+    assert len(list(tmp_path.glob("*.npy"))) == 1  # ~4KB per series
+
+def test_memory_tier_is_bounded():
+    df = _df()
+    cache = IndicatorCache(max_bytes=10_000)
+    for w in (5, 10, 20):
+        cache.sma(df, window=w)
+    assert len(cache._mem) == 2
+    cache.sma(df, window=5)
+    assert cache.stats["misses"] == 4
@@ -0,0 +1,60 @@
+import json
+import time
+import argparse
+import pytest
+import instrument
+from instrument import count, timed, timer
+
+@pytest.fixture(autouse=True)
+def _clean_registry():
+    instrument.reset()
+    yield
+    instrument.enable(False)
+    instrument.reset()
+
+def _df(walk, n=300):
+    return walk(n, start="2025-09-03", freq="30s").assign(ETH_USDT=3000.0)
+
+def test_disabled_records_nothing_and_is_cheap():
+    @timed("work")
+    def work():
+        return 1
+    t0 = time.perf_counter()
+    for _ in range(100_000):
+        with timer("block"):
+            work()
+        count("calls")
+    assert time.perf_counter() - t0 < 1.0
+    assert instrument.snapshot() == {"timers": {}, "counters": {}}
+
+def test_pipeline_timers_and_exports(tmp_path, walk):
+    from strategy import generate_signals, backtest_long_only
+    instrument.enable()
+    backtest_long_only(generate_signals(_df(walk)))
+    count("rows", 3)
+    snap = instrument.snapshot()
+    for name in ("indicator.sma", "indicator.rsi", "signals", "backtest"):
+        assert snap["timers"][name]["count"] >= 1
+    assert snap["counters"] == {"rows": 3}
+
+    prom = instrument.prometheus_text()
+    assert "# TYPE cml_indicator_rsi_seconds summary" in prom
+    assert "cml_rows_total 3" in prom
+
+    path = tmp_path / "m.jsonl"
+    instrument.write_jsonl(str(path), run="test")
+    lines = [json.loads(l) for l in path.read_text().splitlines()]
+    assert {l["metric"] for l in lines} >= {"signals", "backtest", "rows"}
+    assert all(l["run"] == "test" for l in lines)
+
+def test_cli_session_profiles_and_writes_metrics(tmp_path):
+    p = argparse.ArgumentParser()
+    instrument.add_cli_flags(p)
+    args = p.parse_args(["--profile", str(tmp_path / "run.pstats"),
+                         "--metrics", str(tmp_path / "m.jsonl"), "--prom", str(tmp_path / "m.prom")])
+    with instrument.cli_session(args, "test"):
+        with timer("step"):
+            sum(range(1000))
+    assert (tmp_path / "run.pstats").stat().st_size > 0
+    assert "cml_step_seconds_count 1" in (tmp_path / "m.prom").read_text()
+    assert json.loads((tmp_path / "m.jsonl").read_text().splitlines()[0])["run"] == "test"
@@ -1,6 +1,9 @@
 import os
+import time
+import asyncio
 import pandas as pd
 from datetime import datetime
+from price_tracker import CsvWriter, append_row, fetch_prices_async, log_prices_async
 
 def test_log_csv_tmp(tmp_path):
     # create a tiny row and write to a temp file
@@ -18,3 +21,94 @@ def test_log_csv_tmp(tmp_path):
     lines = csv_path.read_text().strip().splitlines()
     assert len(lines) == 3
     assert lines[0] == "timestamp,BTC_USDT,ETH_USDT"
+
+class StubExchange:
+    """Stands in for a ccxt.async_support exchange."""
+    def __init__(self, delay=0.05, batch=False):
+        self.delay = delay
+        self.has = {"fetchTickers": batch}
+        self.in_flight = 0
+        self.max_seen = 0
+        self.calls = 0
+
+    async def fetch_ticker(self, symbol):
+        self.in_flight += 1
+        self.max_seen = max(self.max_seen, self.in_flight)
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        self.in_flight -= 1
+        return {"last": float(len(symbol))}
+
+    async def fetch_tickers(self, symbols):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return {s: {"last": float(len(s))} for s in symbols}
+
+def test_fetch_prices_async_concurrent_and_capped():
+    ex = StubExchange(delay=0.05)
+    symbols = [f"C{i}/USDT" for i in range(8)]
+    t0 = time.monotonic()
+    row = asyncio.run(fetch_prices_async(ex, symbols, max_in_flight=4))
+    elapsed = time.monotonic() - t0
+    assert ex.max_seen == 4
+    assert elapsed < 0.05 * 8 / 2  # two waves of 4, not 8 round-trips
+    assert list(row)[1:] == [s.replace("/", "_") for s in symbols]
+
+def test_fetch_prices_async_uses_batched_call():
+    ex = StubExchange(batch=True)
+    row = asyncio.run(fetch_prices_async(ex, ["BTC/USDT", "ETH/USDT"]))
+    assert ex.calls == 1
+    assert row["BTC_USDT"] == 8.0 and row["ETH_USDT"] == 8.0
+
+def test_log_prices_async_writes_ticks(tmp_path):
+    csv_path = tmp_path / "prices.csv"
+    ex = StubExchange(delay=0.01)
+    asyncio.run(log_prices_async(0.02, ["BTC/USDT", "ETH/USDT"], exchange=ex,
+                                 csv_path=str(csv_path), max_ticks=3))
+    lines = csv_path.read_text().strip().splitlines()
+    assert lines[0] == "timestamp,BTC_USDT,ETH_USDT"
+    assert len(lines) == 4
+
+def test_log_prices_async_zero_interval_runs_back_to_back(tmp_path):
+    csv_path = tmp_path / "prices.csv"
+    asyncio.run(log_prices_async(0, ["BTC/USDT"], exchange=StubExchange(delay=0.0),
+                                 csv_path=str(csv_path), max_ticks=3, verbose=False))
+    assert len(csv_path.read_text().strip().splitlines()) == 4
+
+def test_csv_writer_batches_and_flushes_on_close(tmp_path):
+    csv_path = tmp_path / "prices.csv"
+    w = CsvWriter(str(csv_path), ["timestamp", "BTC_USDT", "ETH_USDT"], flush_rows=3, flush_interval=60)
+    w.write({"timestamp": "2025-09-01 00:00:00", "BTC_USDT": 1.5, "ETH_USDT": None})
+    assert csv_path.read_text() == ""  # still buffered
+    w.write({"timestamp": "2025-09-01 00:00:30", "BTC_USDT": 2.5, "ETH_USDT": 3.0})
+    w.write({"timestamp": "2025-09-01 00:01:00", "BTC_USDT": 3.5, "ETH_USDT": 4.0})
+    assert len(csv_path.read_text().splitlines()) == 4  # header + 3 rows
+    w.write({"timestamp": "2025-09-01 00:01:30", "BTC_USDT": 4.5, "ETH_USDT": 5.0})
+    w.close()
+    lines = csv_path.read_text().splitlines()
+    assert lines[1] == "2025-09-01 00:00:00,1.5,"
+    assert len(lines) == 5
+
+def test_ticks_are_flushed_between_ticks_once_due(tmp_path):
+    csv_path = tmp_path / "prices.csv"
+    seen = []
+    on_row = lambda row: seen.append(len(csv_path.read_text().splitlines()))
+    asyncio.run(log_prices_async(0.1, ["BTC/USDT"], exchange=StubExchange(delay=0.0), csv_path=str(csv_path),
+                                 max_ticks=3, on_row=on_row, verbose=False, flush_interval=0.03))
+    assert seen == [0, 2, 3]  # each row is on disk before the next tick (header comes with the first)
+
+    fast = tmp_path / "fast.csv"
+    seen.clear()
+    on_row = lambda row: seen.append(len(fast.read_text().splitlines()))
+    asyncio.run(log_prices_async(0.01, ["BTC/USDT"], exchange=StubExchange(delay=0.0), csv_path=str(fast),
+                                 max_ticks=5, on_row=on_row, verbose=False, flush_interval=60))
+    assert seen == [0] * 5 and len(fast.read_text().splitlines()) == 6  # batched until close
+
+def test_append_row_matches_pandas_format(tmp_path):
+    row = {"timestamp": "2025-09-01 00:00:00", "BTC_USDT": 108703.23, "ETH_USDT": 4352.0}
+    ours, theirs = tmp_path / "ours.csv", tmp_path / "theirs.csv"
+    append_row(row, str(ours))
+    append_row(row, str(ours))
+    for header in (True, False):
+        pd.DataFrame([row]).to_csv(theirs, mode="a", header=header, index=False)
+    assert ours.read_text() == theirs.read_text()
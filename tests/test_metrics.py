@@ -0,0 +1,80 @@
+import math
+import numpy as np
+import pandas as pd
+import metrics
+from analysis import calculate_sharpe, calculate_drawdown
+
+def _legacy_sharpe(returns, periods_per_year=252.0, risk_free=0.0):
+    # The previous ("hotfix") pandas implementation, kept as a reference
+    r = pd.Series(returns, dtype="float64").dropna()
+    if len(r) == 0 or r.nunique(dropna=True) <= 1:
+        return float("nan")
+    r = r[np.isfinite(r.values)]
+    if len(r) == 0:
+        return float("nan")
+    excess = r - (risk_free / periods_per_year)
+    mu, sigma = float(excess.mean()), float(excess.std(ddof=1))
+    if not math.isfinite(sigma) or abs(sigma) < 1e-9:
+        return float("nan")
+    return float(mu / sigma * math.sqrt(periods_per_year))
+
+def _legacy_max_drawdown(equity):
+    if len(equity) == 0:
+        return 0.0
+    equity = pd.Series(equity).astype(float)
+    return float((equity / equity.cummax() - 1.0).min())
+
+EDGE_CASES = [
+    [], [0.01], [0.01, 0.01, 0.01], [np.nan, np.nan], [np.inf, np.inf], [0.01, np.inf],
+    [0.01, np.nan, -0.02, np.inf, 0.03], [0.1] * 1000, [1e-12, 2e-12, 3e-12],
+]
+
+def _same(a, b):
+    return (math.isnan(a) and math.isnan(b)) or a == b
+
+def test_sharpe_matches_legacy_on_edge_cases_and_random_data():
+    rng = np.random.default_rng(0)
+    cases = EDGE_CASES + [rng.normal(0.001, 0.01, n) for n in (2, 10, 500)]
+    for r in cases:
+        for rf in (0.0, 0.02):
+            assert _same(calculate_sharpe(pd.Series(r, dtype=float), risk_free=rf), _legacy_sharpe(r, risk_free=rf)), r
+            assert _same(metrics.sharpe(r, risk_free=rf), _legacy_sharpe(r, risk_free=rf)), r
+
+def test_drawdown_matches_legacy_and_reports_duration():
+    for eq in ([], [1.0], [1.0, np.nan, 0.9], [1.0, 1.2, 0.9, 1.0, 1.3, 1.1], [np.nan] * 3):
+        got = calculate_drawdown(pd.Series(eq, dtype=float))
+        assert _same(got["max_drawdown"], _legacy_max_drawdown(eq))
+        assert isinstance(got["dd_series"], pd.Series) and len(got["dd_series"]) == len(eq)
+    dd = metrics.drawdown([1.0, 1.2, 0.9, 1.0, 1.3, 1.1])
+    assert math.isclose(dd["max_drawdown"], 0.9 / 1.2 - 1)
+    assert dd["max_dd_duration"] == 2
+    assert metrics.drawdown([1.0, 1.1, 1.2])["max_dd_duration"] == 0
+
+def test_batch_matches_single_curve_metrics():
+    rng = np.random.default_rng(1)
+    r = rng.normal(0.0005, 0.01, (400, 6))
+    r[:, 5] = 0.0
+    r[10, 2] = np.nan
+    pos = (rng.random((400, 6)) > 0.5).astype(float)
+    res = metrics.batch_metrics(r, positions=pos)
+    for j in range(6):
+        one = metrics.summarize(r[:, j], positions=pos[:, j])
+        assert _same(res["sharpe"][j], _legacy_sharpe(r[:, j]))
+        for k, v in one.items():
+            assert _same(float(res[k][j]), float(v)), (k, j)
+    assert np.isnan(res["win_rate"][5]) and np.isnan(res["calmar"][5])
+    assert res["max_dd_duration"][5] == 0
+    assert np.isclose(res["turnover"][0], np.abs(np.diff(pos[:, 0], prepend=0)).mean())
+
+def test_rolling_matches_windowed_batch():
+    rng = np.random.default_rng(2)
+    r = rng.normal(0.001, 0.01, 300)
+    r[50] = np.nan
+    w = 30
+    rs, so = metrics.rolling_sharpe(r, w), metrics.rolling_sortino(r, w)
+    for t in range(len(r)):
+        window = r[max(0, t - w + 1):t + 1]
+        assert np.isclose(rs[t], metrics.sharpe(window), equal_nan=True), t
+        assert np.isclose(so[t], metrics.sortino(window), equal_nan=True), t
+    eq = np.cumprod(1 + np.nan_to_num(r))
+    assert np.allclose(metrics.rolling_drawdown(eq), metrics.drawdown(eq)["dd_series"])
@@ -0,0 +1,45 @@
+import math
+import numpy as np
+import pandas as pd
+from analysis import load_prices
+from strategy import generate_signals, backtest_long_only
+from paper_trader import PaperTrader, replay_csv, run_replay
+
+def _write_feed(walk, path, n=400):
+    # Heavy-tailed walk: BUY (RSI<30 while above SMA_20) needs sharp jumps
+    df = walk(n, start="2025-09-03 10:00:00", freq="30s", decimals=2, text=True)
+    df.assign(ETH_USDT=(3000 + np.arange(n) * 0.5).round(2)).to_csv(path, index=False)
+
+def test_replay_matches_offline_backtest(tmp_path, walk):
+    csv_path = tmp_path / "feed.csv"
+    _write_feed(walk, csv_path)
+    out_path = tmp_path / "live.csv"
+    summary = run_replay(replay_csv(str(csv_path)), PaperTrader(fee_bps=10.0, out_path=str(out_path)))
+
+    bt = backtest_long_only(generate_signals(load_prices(str(csv_path))), fee_bps=10.0)
+    live = pd.read_csv(out_path, keep_default_na=False)
+    assert summary["rows"] == len(bt) == len(live)
+    assert summary["trades"] > 2
+    assert list(live["signal"]) == list(bt["signal"])
+    assert list(live["position"]) == list(bt["position"])
+    assert np.allclose(live["equity"].astype(float), bt["equity"], rtol=1e-12)
+    assert math.isclose(summary["equity"], bt["equity"].iloc[-1], rel_tol=1e-12)
+    assert summary["latency"]["count"] == len(bt)
+
+def test_on_tick_skips_missing_prices():
+    trader = PaperTrader()
+    assert trader.on_tick({"timestamp": "2025-09-03 10:00:00", "BTC_USDT": ""}) is None
+    row = trader.on_tick({"timestamp": "2025-09-03 10:00:30", "BTC_USDT": "50000.0"})
+    assert row["position"] == 0 and row["equity"] == 1.0
+
+def test_replay_skips_partial_rows_like_load_prices(tmp_path, walk):
+    csv_path = tmp_path / "feed.csv"
+    _write_feed(walk, csv_path)
+    df = pd.read_csv(csv_path)
+    df.loc[[50, 51, 200], "ETH_USDT"] = np.nan  # partial ticks: BTC logged, ETH missing
+    df.loc[120, "BTC_USDT"] = np.nan
+    df.to_csv(csv_path, index=False)
+    summary = run_replay(replay_csv(str(csv_path)), PaperTrader(fee_bps=10.0))
+    bt = backtest_long_only(generate_signals(load_prices(str(csv_path))), fee_bps=10.0)
+    assert summary["rows"] == len(bt) == len(df) - 4
+    assert math.isclose(summary["equity"], bt["equity"].iloc[-1], rel_tol=1e-12)
@@ -0,0 +1,35 @@
+import os
+import numpy as np
+import pandas as pd
+from strategy import generate_signals, backtest_long_only
+from portfolio import portfolio_backtest
+from plotting import plot_portfolio_equity
+
+def _df(n=1500, n_assets=3):
+    rng = np.random.default_rng(53)
+    data = {"timestamp": pd.date_range("2025-09-03 10:00:00", periods=n, freq="30s")}
+    for k in range(n_assets):
+        data[f"A{k}_USDT"] = 1000 * (k + 1) + np.cumsum(np.clip(rng.standard_t(1, n), -50, 50))
+    return pd.DataFrame(data)
+
+def test_each_asset_matches_single_asset_backtest():
+    df = _df()
+    res = portfolio_backtest(df, weights=[0.5, 0.3, 0.2])
+    strat = []
+    for sym in ["A0_USDT", "A1_USDT", "A2_USDT"]:
+        bt = backtest_long_only(generate_signals(df, col=sym), col=sym)
+        assert np.array_equal(res["positions"][sym].to_numpy(), bt["position"].to_numpy())
+        final = res["assets"].set_index("symbol").loc[sym, "final_equity"]
+        assert np.isclose(final, bt["equity"].iloc[-1], rtol=1e-12)
+        strat.append(bt["strategy_ret"].to_numpy())
+    expected = np.column_stack(strat) @ np.array([0.5, 0.3, 0.2])
+    assert np.allclose(res["equity"]["portfolio_ret"], expected, rtol=1e-12, atol=0)
+    assert res["max_drawdown"] <= 0
+
+def test_dict_weights_and_chart(tmp_path):
+    df = _df(n=200, n_assets=2)
+    res = portfolio_backtest(df, weights={"A0_USDT": 1.0, "A1_USDT": 0.0})
+    solo = portfolio_backtest(df, symbols=["A0_USDT"], weights=[1.0])
+    assert np.allclose(res["equity"]["equity"], solo["equity"]["equity"])
+    out = plot_portfolio_equity(res, str(tmp_path / "eq.png"))
+    assert os.path.getsize(out) > 0
@@ -0,0 +1,59 @@
+import os
+import pandas as pd
+import pytest
+import report
+from report import Job, build_report, job_grid, parse_jobs, prepare, render, window
+
+def test_parse_jobs_and_grid():
+    jobs = parse_jobs(["BTC_USDT:1d:ma", {"symbol": "ETH_USDT", "chart": "rsi"}, ("BTC_USDT", "6h", "signals")])
+    assert jobs == [Job("BTC_USDT", "1d", "ma"), Job("ETH_USDT", "all", "rsi"), Job("BTC_USDT", "6h", "signals")]
+    assert len(job_grid(["BTC_USDT", "ETH_USDT"], ["1d", "all"], ["ma", "rsi", "candles"])) == 12
+    with pytest.raises(ValueError):
+        parse_jobs(["BTC_USDT:1d:pie"])
+    with pytest.raises(ValueError):
+        parse_jobs(["BTC_USDT:soon:ma"])
+
+def test_window_slices_from_the_end(walk):
+    df = walk(3000)
+    w = window(df, "1h")
+    assert len(w) == 61 and w["timestamp"].iloc[-1] == df["timestamp"].iloc[-1]
+    assert window(df, "all") is df
+
+def test_prepare_computes_each_symbol_once(monkeypatch, walk):
+    calls = []
+    real = report.generate_signals
+    monkeypatch.setattr(report, "generate_signals", lambda df, col, cache=None: calls.append(col) or real(df, col, cache))
+    frames = prepare(walk(3000), ["BTC_USDT", "ETH_USDT"])
+    assert calls == ["BTC_USDT", "ETH_USDT"]
+    assert {"SMA_5", "SMA_20", "RSI_14", "signal"} <= set(frames["ETH_USDT"].columns)
+    # indicators come from the full history, so a window has no warm-up NaNs
+    assert window(frames["BTC_USDT"], "1h")["RSI_14"].notna().all()
+
+def test_render_in_process_and_pool_match(tmp_path, walk):
+    frames = prepare(walk(3000), ["BTC_USDT", "ETH_USDT"])
+    jobs = job_grid(["BTC_USDT", "ETH_USDT"], ["6h", "all"], ["ma", "rsi", "signals", "candles"])
+    serial = render(frames, jobs, str(tmp_path / "a"), n_jobs=1, verbose=False)
+    assert not report._FRAMES  # in-process renders don't keep the frames alive
+    pooled = render(frames, jobs, str(tmp_path / "b"), n_jobs=2, verbose=False)
+    for s, p, job in zip(serial, pooled, jobs):
+        assert (s["symbol"], s["window"], s["chart"]) == tuple(job)
+        assert (p["symbol"], p["window"], p["chart"]) == tuple(job)
+        assert s["error"] == "" and p["error"] == ""
+        assert s["rows"] == p["rows"] > 0 and p["seconds"] > 0
+        assert os.path.getsize(p["path"]) > 0
+    assert serial[0]["path"] == str(tmp_path / "a" / "BTC_USDT" / "6h_ma.png")
+
+def test_build_report_records_failures(tmp_path, walk):
+    csv = tmp_path / "prices.csv"
+    df = walk(500)
+    df.assign(timestamp=df["timestamp"].dt.strftime("%Y-%m-%d %H:%M:%S")).to_csv(csv, index=False)
+    out = tmp_path / "report"
+    results = build_report(str(csv), parse_jobs(["BTC_USDT:all:ma", "BTC_USDT:1h:rsi"]), str(out),
+                           n_jobs=1, verbose=False)
+    assert all(r["error"] == "" for r in results)
+    timings = pd.read_csv(out / "timings.csv")
+    assert list(timings["chart"]) == ["ma", "rsi"] and (timings["seconds"] > 0).all()
+
+    frames = {"BTC_USDT": walk(50)[["timestamp", "BTC_USDT"]]}  # no RSI column
+    bad = render(frames, [Job("BTC_USDT", "all", "rsi")], str(out), n_jobs=1, verbose=False)
+    assert bad[0]["error"].startswith("ValueError")
@@ -0,0 +1,147 @@
+import asyncio
+import random
+import ccxt
+import pytest
+from scheduler import RequestScheduler, classify
+from price_tracker import log_prices, log_prices_async
+
+class FakeTime:
+    def __init__(self):
+        self.t = 0.0
+    def clock(self):
+        return self.t
+    async def sleep(self, dt):
+        self.t += dt
+        await asyncio.sleep(0)
+    def sleep_sync(self, dt):
+        self.t += dt
+
+class FaultyExchange:
+    """Fake exchange: errors[symbol] is a list of exceptions raised before succeeding."""
+    def __init__(self, errors=None, batch=False, rate_limit=None):
+        self.errors = {k: list(v) for k, v in (errors or {}).items()}
+        self.has = {"fetchTickers": batch}
+        self.calls = 0
+        if rate_limit:
+            self.rateLimit = rate_limit
+
+    def _next(self, key):
+        self.calls += 1
+        pending = self.errors.get(key)
+        if pending:
+            e = pending[0] if len(pending) == 1 and pending[0] is ALWAYS else pending.pop(0)
+            raise (e.exc if e is ALWAYS else e)
+
+    async def fetch_ticker(self, symbol):
+        self._next(symbol)
+        return {"last": 100.0}
+
+    async def fetch_tickers(self, symbols):
+        self._next("*")
+        return {s: {"last": 100.0} for s in symbols}
+
+class _Always:
+    exc = ccxt.NetworkError("down")
+ALWAYS = _Always()
+
+class SyncExchange(FaultyExchange):
+    def fetch_ticker(self, symbol):
+        self._next(symbol)
+        return {"last": 100.0}
+
+def _scheduler(ex, ft, **kw):
+    return RequestScheduler(ex, clock=ft.clock, sleep=ft.sleep, rng=random.Random(0), **kw)
+
+def test_classify_by_ccxt_error_class():
+    assert classify(ccxt.RateLimitExceeded("429"))[1:] == (2.0, 60.0, True)
+    assert classify(ccxt.RequestTimeout("t"))[3] is True
+    assert classify(ccxt.BadSymbol("x"))[3] is False
+
+def test_token_bucket_paces_requests():
+    ft = FakeTime()
+    ex = FaultyExchange(rate_limit=100)  # ccxt rateLimit: 100 ms/request -> 10 req/s
+    sched = _scheduler(ex, ft)
+    async def run():
+        for _ in range(21):
+            await sched.call(ex.fetch_ticker, "BTC/USDT")
+    asyncio.run(run())
+    assert sched.rate == 10.0
+    assert ft.t == pytest.approx(2.0)
+
+def test_rate_limit_backs_off_and_halves_rate_then_recovers():
+    ft = FakeTime()
+    ex = FaultyExchange({"BTC/USDT": [ccxt.RateLimitExceeded("429"), ccxt.DDoSProtection("418")]})
+    sched = _scheduler(ex, ft, rate=20.0)
+    res = asyncio.run(sched.call(ex.fetch_ticker, "BTC/USDT"))
+    assert res["last"] == 100.0
+    assert sched.stats["rate_limited"] == 2 and sched.stats["retries"] == 2
+    assert sched.rate == pytest.approx(5.0 + 1.0)  # halved twice, +max/20 on success
+    for _ in range(20):
+        asyncio.run(sched.call(ex.fetch_ticker, "BTC/USDT"))
+    assert sched.rate == 20.0
+
+def test_permanent_errors_are_not_retried_and_become_gaps():
+    ft = FakeTime()
+    ex = FaultyExchange({"BAD/USDT": [ccxt.BadSymbol("nope")]})
+    sched = _scheduler(ex, ft)
+    prices, gaps = asyncio.run(sched.fetch_prices(["BTC/USDT", "BAD/USDT"]))
+    assert prices == {"BTC/USDT": 100.0, "BAD/USDT": None}
+    assert gaps == [{"symbol": "BAD/USDT", "reason": "BadSymbol", "attempts": 1}]
+    assert sched.gap_counts["BAD/USDT"] == 1
+
+def test_retries_stop_at_deadline():
+    ft = FakeTime()
+    ex = FaultyExchange({"*": [ALWAYS]}, batch=True)
+    sched = _scheduler(ex, ft, max_retries=100)
+    prices, gaps = asyncio.run(sched.fetch_prices(["BTC/USDT", "ETH/USDT"], deadline=5.0))
+    assert prices == {"BTC/USDT": None, "ETH/USDT": None}
+    assert {g["reason"] for g in gaps} == {"deadline:NetworkError"}
+    assert ft.t < 5.0 and gaps[0]["attempts"] > 1
+
+def test_sync_call_retries_transient_errors():
+    ft = FakeTime()
+    ex = SyncExchange({"BTC/USDT": [ccxt.RequestTimeout("t")] * 3})
+    sched = RequestScheduler(ex, clock=ft.clock, sleep=ft.sleep_sync, rng=random.Random(1))
+    prices, gaps = sched.fetch_prices_sync(["BTC/USDT"])
+    assert prices == {"BTC/USDT": 100.0} and gaps == []
+    assert sched.stats["retries"] == 3
+
+def test_async_logger_records_gaps(tmp_path):
+    csv_path = tmp_path / "prices.csv"
+    ex = FaultyExchange({"ETH/USDT": [ccxt.BadSymbol("gone"), ccxt.BadSymbol("gone")]})
+    asyncio.run(log_prices_async(0.01, ["BTC/USDT", "ETH/USDT"], exchange=ex,
+                                 csv_path=str(csv_path), max_ticks=3))
+    lines = csv_path.read_text().strip().splitlines()
+    assert len(lines) == 4 and lines[1].endswith(",100.0,")
+    gaps = (tmp_path / "prices_gaps.csv").read_text().strip().splitlines()
+    assert gaps[0] == "timestamp,symbol,reason,attempts"
+    assert len(gaps) == 3 and gaps[1].endswith(",ETH/USDT,BadSymbol,1")
+
+def test_sync_logger_records_gaps(tmp_path):
+    csv_path = tmp_path / "prices.csv"
+    ex = SyncExchange({"BTC/USDT": [ccxt.BadSymbol("gone")]})
+    log_prices(0, csv_path=str(csv_path), exchange=ex, max_ticks=2)
+    assert len(csv_path.read_text().strip().splitlines()) == 3
+    assert len((tmp_path / "prices_gaps.csv").read_text().strip().splitlines()) == 2
+
+def test_sync_logger_keeps_a_fixed_tick_grid(tmp_path, monkeypatch):
+    import types
+    import price_tracker
+    ft = FakeTime()
+    monkeypatch.setattr(price_tracker, "time", types.SimpleNamespace(monotonic=ft.clock, sleep=ft.sleep_sync))
+    fetch_secs = iter([3.0, 4.0, 25.0, 1.0])
+    started, on_disk = [], []
+    csv_path = tmp_path / "prices.csv"
+
+    class SlowExchange(SyncExchange):
+        def fetch_ticker(self, symbol):
+            if symbol == "BTC/USDT":
+                started.append(ft.t)
+                on_disk.append(len(csv_path.read_text().splitlines()) if csv_path.exists() else 0)
+                ft.t += next(fetch_secs)
+            return super().fetch_ticker(symbol)
+
+    log_prices(10, csv_path=str(csv_path), exchange=SlowExchange(), max_ticks=4, flush_interval=2)
+    assert started == [0.0, 10.0, 20.0, 50.0]  # the third tick overran to 45
+    assert on_disk == [0, 2, 3, 4]  # earlier ticks were flushed while waiting for the next one
+    assert len(csv_path.read_text().splitlines()) == 5
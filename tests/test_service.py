@@ -0,0 +1,130 @@
+import asyncio
+import json
+import numpy as np
+import pandas as pd
+import pytest
+from analysis import load_prices
+from strategy import generate_signals, backtest_long_only
+from paper_trader import replay_csv
+from service import LiveWindow, QueryService, replay, warm_start
+
+def _df(walk, n=600):
+    return walk(n, start="2025-09-03 10:00:00", freq="30s", decimals=2, text=True)
+
+async def _get(port, target):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(f"GET {target} HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n\r\n".encode())
+    await writer.drain()
+    raw = await reader.read()
+    writer.close()
+    head, _, body = raw.partition(b"\r\n\r\n")
+    status = int(head.split()[1])
+    return status, body
+
+def test_window_matches_offline_signals_and_wraps(walk):
+    df = _df(walk)
+    window = LiveWindow(capacity=256)
+    for row in df.to_dict("records"):
+        window.update(row)
+    bt = backtest_long_only(generate_signals(df.assign(timestamp=pd.to_datetime(df["timestamp"]))))
+    tail = bt.tail(256).reset_index(drop=True)
+    frame = window.frame()
+    assert len(window) == 256 and window.version == len(df)
+    pd.testing.assert_series_equal(frame["timestamp"], tail["timestamp"])
+    for c in ("BTC_USDT", "SMA_5", "SMA_20", "RSI_14", "equity"):
+        np.testing.assert_allclose(frame[c], tail[c], rtol=1e-12)
+    assert list(frame["signal"].astype(str)) == list(tail["signal"].astype(str))
+    assert (frame["position"].to_numpy() == tail["position"].to_numpy()).all()
+    lo, hi = window.bounds("2025-09-03 14:00:00", "2025-09-03 14:10:00")
+    assert hi - lo == 21 and window.bounds(limit=5) == (251, 256)
+
+def test_service_answers_from_memory_on_localhost(tmp_path, walk):
+    df = _df(walk)
+    csv_path = tmp_path / "feed.csv"
+    df.to_csv(csv_path, index=False)
+
+    async def scenario():
+        window = LiveWindow(capacity=1000)
+        service = QueryService(window, port=0, chart_interval=0.0)
+        port = await service.start()
+        try:
+            assert (await _get(port, "/latest"))[0] == 503
+            await replay(window, replay_csv(str(csv_path)), batch=100)
+
+            status, body = await _get(port, "/latest")
+            latest = json.loads(body)
+            assert status == 200 and latest["timestamp"] == df["timestamp"].iloc[-1]
+            assert latest["BTC_USDT"] == df["BTC_USDT"].iloc[-1]
+
+            status, body = await _get(port, "/range?start=2025-09-03%2010:10:00&end=2025-09-03%2010:20:00"
+                                            "&columns=BTC_USDT,RSI_14")
+            rng = json.loads(body)
+            assert status == 200 and set(rng) == {"timestamp", "BTC_USDT", "RSI_14"}
+            assert rng["timestamp"][0] == "2025-09-03 10:10:00" and len(rng["timestamp"]) == 21
+            assert rng["RSI_14"][0] is None or isinstance(rng["RSI_14"][0], float)
+
+            ref = load_prices(str(csv_path))
+            sma = ref["BTC_USDT"].rolling(20, min_periods=1).mean().tail(50).to_numpy()
+            status, body = await _get(port, "/indicator/SMA_20?limit=50")
+            np.testing.assert_allclose(json.loads(body)["values"], sma, rtol=1e-12)
+            assert (await _get(port, "/indicator/MACD"))[0] == 404
+            assert (await _get(port, "/range?columns=nope"))[0] == 400
+            assert (await _get(port, "/range?limit=abc"))[0] == 400
+            for empty in ("/range?start=2026-01-01%2000:00:00", "/range?end=2025-01-01%2000:00:00",
+                          "/range?start=2025-09-03%2012:00:00&end=2025-09-03%2011:00:00"):
+                status, body = await _get(port, empty + "&columns=BTC_USDT")
+                assert status == 200 and json.loads(body) == {"timestamp": [], "BTC_USDT": []}
+            status, body = await _get(port, "/indicator/RSI_14?start=2026-01-01%2000:00:00")
+            assert status == 200 and json.loads(body)["values"] == []
+
+            # Many pollers, one render per chart and data version
+            results = await asyncio.gather(*[_get(port, "/chart/signals.png?limit=300") for _ in range(5)])
+            assert all(s == 200 and b.startswith(b"\x89PNG") for s, b in results)
+            assert service.charts.renders == 1
+            await _get(port, "/chart/signals.png?limit=300")
+            assert service.charts.renders == 1
+            window.update({"timestamp": "2025-09-03 15:00:00", "BTC_USDT": 51000.0, "ETH_USDT": 3400.0})
+            assert (await _get(port, "/chart/signals.png?limit=300"))[0] == 200
+            assert service.charts.renders == 2
+            assert (await _get(port, "/chart/volume.png"))[0] == 404
+
+            health = json.loads((await _get(port, "/health"))[1])
+            assert health["rows"] == len(df) + 1 and health["last"] == "2025-09-03 15:00:00"
+        finally:
+            await service.close()
+
+    asyncio.run(scenario())
+
+def test_keep_alive_and_body_cache(walk):
+    async def scenario():
+        window = LiveWindow(capacity=50)
+        for row in _df(walk, 60).to_dict("records"):
+            window.update(row)
+        service = QueryService(window, port=0)
+        port = await service.start()
+        try:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            bodies = []
+            for _ in range(3):
+                writer.write(b"GET /range?limit=10 HTTP/1.1\r\nHost: x\r\n\r\n")
+                await writer.drain()
+                head = await reader.readuntil(b"\r\n\r\n")
+                length = int(head.split(b"Content-Length: ")[1].split(b"\r\n")[0])
+                bodies.append(await reader.readexactly(length))
+            writer.close()
+            assert bodies[0] == bodies[1] == bodies[2]
+            assert bodies[1] is not None and len(service._bodies) == 1
+            assert service.requests == 3
+        finally:
+            await service.close()
+
+    asyncio.run(scenario())
+
+def test_warm_start_reads_only_the_tail(tmp_path, walk):
+    csv_path = tmp_path / "prices.csv"
+    _df(walk).to_csv(csv_path, index=False)
+    window = LiveWindow(capacity=100)
+    assert warm_start(window, str(csv_path), 100) == 100
+    assert window.latest()["timestamp"] == _df(walk)["timestamp"].iloc[-1]
+    with pytest.raises(ValueError):
+        LiveWindow(capacity=0)
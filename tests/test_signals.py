@@ -1,6 +1,7 @@
 import os
+import numpy as np
 import pandas as pd
-from strategy import generate_signals, backtest_long_only, save_signals_csv, plot_price_with_signals
+from strategy import generate_signals, backtest_long_only, prepare_indicators, save_signals_csv, plot_price_with_signals
 
 def _toy():
     # build a simple ramp so RSI and SMA exist; 60 rows = enough for RSI
@@ -34,3 +35,28 @@ def test_outputs_written(tmp_path):
     plot_price_with_signals(bt, out_file=str(c))
     assert os.path.exists(p) and os.path.getsize(p) > 0
     assert os.path.exists(c) and os.path.getsize(c) > 0
+
+def _legacy_generate_signals(df):
+    # The original string + Python-loop implementation, kept as a reference
+    out = df.copy()
+    out["signal"] = ""
+    out.loc[(out["RSI_14"] < 30) & (out["BTC_USDT"] > out["SMA_20"]), "signal"] = "BUY"
+    out.loc[out["RSI_14"] > 70, "signal"] = "SELL"
+    pos, position = 0, []
+    for s in out["signal"]:
+        pos = 1 if s == "BUY" else 0 if s == "SELL" else pos
+        position.append(pos)
+    out["position"] = position
+    return out
+
+def test_vectorized_signals_match_legacy_loop(walk):
+    df = prepare_indicators(walk(5000, start="2025-09-03", freq="30s"))
+    ours, ref = generate_signals(df), _legacy_generate_signals(df)
+    assert ours["signal"].dtype == "category"
+    assert (ours["signal"] == "BUY").sum() > 0
+    assert list(ours["signal"].astype(str)) == list(ref["signal"])
+    assert np.array_equal(ours["position"].to_numpy(), ref["position"].to_numpy())
+    pd.testing.assert_frame_equal(
+        backtest_long_only(ours)[["strategy_ret", "equity"]],
+        backtest_long_only(ref)[["strategy_ret", "equity"]],
+    )
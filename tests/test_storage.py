@@ -0,0 +1,60 @@
+import os
+import numpy as np
+import pandas as pd
+from storage import ColumnarWriter, convert_csv, read_store, write_frame
+from analysis import load_prices
+
+def _frame(n=180, freq="min"):
+    return pd.DataFrame({
+        "timestamp": pd.date_range("2025-08-31 22:00:00", periods=n, freq=freq),
+        "BTC_USDT": np.linspace(50000.0, 51000.0, n),
+        "ETH_USDT": np.linspace(3000.0, 3100.0, n),
+    })
+
+def test_write_and_read_roundtrip_typed(tmp_path):
+    root = str(tmp_path / "store")
+    df = _frame()
+    write_frame(root, df, partition="hour")
+    # 22:00..00:59 spans three hourly partitions over two days
+    assert sorted(os.listdir(root)) == ["_schema.json", "date=2025-08-31", "date=2025-09-01"]
+    out = read_store(root)
+    assert out["timestamp"].dtype == "datetime64[ns]"
+    assert out["BTC_USDT"].dtype == "float64"
+    pd.testing.assert_frame_equal(out, df, check_freq=False)
+
+def test_read_pushes_down_range_and_columns(tmp_path):
+    root = str(tmp_path / "store")
+    write_frame(root, _frame(), partition="hour")
+    out = read_store(root, start="2025-08-31 23:30:00", end="2025-09-01 00:10:00", columns=["ETH_USDT"])
+    assert list(out.columns) == ["timestamp", "ETH_USDT"]
+    assert len(out) == 41
+    assert out["timestamp"].iloc[0] == pd.Timestamp("2025-08-31 23:30:00")
+    assert out["timestamp"].iloc[-1] == pd.Timestamp("2025-09-01 00:10:00")
+
+def test_writer_and_converter_feed_load_prices(tmp_path):
+    csv_path = tmp_path / "prices.csv"
+    _frame(n=10).to_csv(csv_path, index=False)
+    root = str(tmp_path / "converted")
+    assert convert_csv(str(csv_path), root, partition="day") == 10
+
+    live = str(tmp_path / "live")
+    with ColumnarWriter(live, ["timestamp", "BTC_USDT", "ETH_USDT"], flush_rows=4) as w:
+        for row in pd.read_csv(csv_path).to_dict("records"):
+            w.write(row)
+
+    expected = load_prices(str(csv_path))
+    for root_dir in (root, live):
+        pd.testing.assert_frame_equal(load_prices(root_dir), expected)
+    sub = load_prices(live, start="2025-08-31 22:05:00")
+    assert len(sub) == 5
+
+def test_writer_flushes_old_rows_on_the_next_write(tmp_path):
+    root = str(tmp_path / "live")
+    rows = _frame(n=3).to_dict("records")
+    w = ColumnarWriter(root, ["timestamp", "BTC_USDT", "ETH_USDT"], flush_rows=64, flush_interval=60)
+    w.write(rows[0])
+    assert len(read_store(root)) == 0  # still buffered
+    w.flush_interval = 0
+    w.write(rows[1])
+    assert len(read_store(root)) == 2
+    w.close()
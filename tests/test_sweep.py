@@ -0,0 +1,45 @@
+import math
+import numpy as np
+import pandas as pd
+import sweep as sweep_module
+from analysis import calculate_sharpe, calculate_drawdown
+from strategy import generate_signals, backtest_long_only
+from sweep import sweep
+
+def _df(walk, n=2000):
+    return walk(n, start="2025-09-03 10:00:00", freq="30s").assign(ETH_USDT=3000.0)
+
+def test_default_combo_matches_backtest(walk):
+    df = _df(walk)
+    table = sweep(df, n_jobs=1)
+    assert len(table) == 1
+    assert not sweep_module._SHARED  # in-process runs don't keep the arrays alive
+    bt = backtest_long_only(generate_signals(df), fee_bps=10.0)
+    row = table.iloc[0]
+    assert row["final_equity"] == bt["equity"].iloc[-1]
+    assert row["sharpe"] == calculate_sharpe(bt["strategy_ret"])
+    assert row["max_drawdown"] == calculate_drawdown(bt["equity"])["max_drawdown"]
+
+def test_grid_is_ranked_and_pool_matches_inprocess(walk):
+    df = _df(walk)
+    grid = dict(rsi_periods=(7, 14), rsi_buy=(25, 30, 35), rsi_sell=(65, 70), sma_windows=(10, 20), fee_bps=(5, 10))
+    serial = sweep(df, n_jobs=1, **grid)
+    parallel = sweep(df, n_jobs=2, **grid)
+    assert len(serial) == 2 * 3 * 2 * 2 * 2
+    pd.testing.assert_frame_equal(serial, parallel)
+    sharpe = serial["sharpe"].dropna().to_numpy()
+    assert np.all(np.diff(sharpe) <= 0)
+    assert math.isnan(serial["sharpe"].iloc[-1]) or len(sharpe) == len(serial)
+
+def test_threshold_pairs_match_signal_codes(walk):
+    from analysis import add_sma, add_rsi
+    from strategy import signal_codes, positions_from_codes
+    df = _df(walk)
+    ind = add_rsi(add_sma(df, windows=(10,)), period=7)
+    table = sweep(df, rsi_periods=(7,), sma_windows=(10,), rsi_buy=(35, 45), rsi_sell=(40, 60), n_jobs=1)
+    for _, row in table.iterrows():
+        codes = signal_codes(ind["BTC_USDT"], ind["SMA_10"], ind["RSI_7"], row["rsi_buy"], row["rsi_sell"])
+        bt = ind.assign(position=positions_from_codes(codes))
+        bt = backtest_long_only(bt, fee_bps=row["fee_bps"])
+        assert row["final_equity"] == bt["equity"].iloc[-1]
+        assert row["trades"] == int(bt["position"].diff().abs().sum())
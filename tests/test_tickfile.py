@@ -0,0 +1,118 @@
+import asyncio
+import os
+import subprocess
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+from tickfile import TickReader, TickWriter, is_tickfile, read_header, read_ticks, write_frame
+from analysis import load_prices
+from price_tracker import TeeWriter, log_prices_async, open_writer
+
+def _df(walk, n=1000):
+    return walk(n, freq="s")
+
+def test_roundtrip_and_zero_copy(tmp_path, walk):
+    path = str(tmp_path / "ticks.bin")
+    df = _df(walk)
+    assert write_frame(path, df) == len(df)
+    assert is_tickfile(path) and not is_tickfile(str(tmp_path))
+    assert read_header(path)["columns"] == ["BTC_USDT", "ETH_USDT"]
+    r = TickReader(path)
+    assert r.seq == len(r) == len(df)
+    got = r.frame()
+    pd.testing.assert_frame_equal(got, df, check_freq=False)
+    # views into the mapping, not copies
+    arrays = r.arrays(last_n=10)
+    assert np.shares_memory(arrays["BTC_USDT"], r._map) and np.shares_memory(arrays["timestamp"], r._map)
+    assert np.shares_memory(got["ETH_USDT"].to_numpy(), r._map)
+    assert np.shares_memory(got["timestamp"].to_numpy(), r._map)
+    assert len(arrays["BTC_USDT"]) == 10
+
+def test_row_writer_and_tail(tmp_path):
+    path = str(tmp_path / "ticks.bin")
+    with TickWriter(path, ["timestamp", "BTC_USDT", "ETH_USDT"], capacity=64, fsync="never") as w:
+        r = TickReader(path)
+        assert r.frame().empty
+        w.write({"timestamp": "2025-01-01 00:00:00", "BTC_USDT": 1.5, "ETH_USDT": None})
+        w.write({"timestamp": "2025-01-01 00:00:30", "BTC_USDT": 2.5, "ETH_USDT": 3.5})
+        df, since, lost = r.tail(0)
+        assert since == 2 and lost == 0
+        assert list(df["BTC_USDT"]) == [1.5, 2.5] and np.isnan(df["ETH_USDT"].iloc[0])
+        assert df["timestamp"].iloc[1] == pd.Timestamp("2025-01-01 00:00:30")
+        w.write({"timestamp": "2025-01-01 00:01:00", "BTC_USDT": 4.0, "ETH_USDT": 5.0})
+        df, since, _ = r.tail(since)
+        assert list(df["BTC_USDT"]) == [4.0] and since == 3
+        assert next(r.follow(since=2, poll=0.01, timeout=1))["BTC_USDT"].tolist() == [4.0]
+
+def test_ring_wraps_and_reports_lost_records(tmp_path, walk):
+    path = str(tmp_path / "ticks.bin")
+    df = _df(walk, 250)
+    write_frame(path, df.iloc[:100], capacity=64)
+    r = TickReader(path)
+    assert len(r) == 64 and r.oldest() == 36 and r.lapped(10)
+    pd.testing.assert_frame_equal(r.frame(), df.iloc[36:100].reset_index(drop=True), check_freq=False)
+    write_frame(path, df.iloc[100:])
+    got, since, lost = r.tail(100)
+    assert since == 250 and lost == 250 - 64 - 100
+    pd.testing.assert_frame_equal(got, df.iloc[186:].reset_index(drop=True), check_freq=False)
+
+def test_single_writer_and_schema_checks(tmp_path):
+    path = str(tmp_path / "ticks.bin")
+    with TickWriter(path, ["BTC_USDT"], capacity=8):
+        with pytest.raises(RuntimeError):
+            TickWriter(path, ["BTC_USDT"])
+    with pytest.raises(ValueError):
+        TickWriter(path, ["ETH_USDT"])
+    with pytest.raises(ValueError):
+        TickWriter(path, ["BTC_USDT"], fsync="sometimes")
+
+def test_open_writer_cleans_up_when_the_tick_file_is_locked(tmp_path, monkeypatch):
+    import price_tracker
+    path, csv_path = str(tmp_path / "ticks.bin"), str(tmp_path / "prices.csv")
+    closed = []
+    csv_close = price_tracker.CsvWriter.close
+    monkeypatch.setattr(price_tracker.CsvWriter, "close", lambda self: (closed.append("csv"), csv_close(self)))
+
+    class Failing:
+        def close(self):
+            closed.append("failing")
+            raise OSError("disk full")
+
+    class Ok:
+        def close(self):
+            closed.append("ok")
+
+    with TickWriter(path, ["timestamp", "BTC_USDT"]):
+        with pytest.raises(RuntimeError):
+            open_writer(csv_path, ["timestamp", "BTC_USDT"], tickfile=path, index=False)
+    assert closed == ["csv"]
+    with open_writer(csv_path, ["timestamp", "BTC_USDT"], tickfile=path, index=False) as w:
+        w.write({"timestamp": "2025-09-01 00:00:00", "BTC_USDT": 1.0})  # lock and CSV were released
+    with pytest.raises(OSError):
+        TeeWriter(Failing(), Ok()).close()
+    assert closed == ["csv", "csv", "failing", "ok"]
+
+def test_reader_in_another_process_sees_new_records(tmp_path, walk):
+    path = str(tmp_path / "ticks.bin")
+    df = _df(walk, 20)
+    with TickWriter(path, ["BTC_USDT", "ETH_USDT"], capacity=1024) as w:
+        w.write_arrays(df["timestamp"].to_numpy().view("int64")[:10], df[["BTC_USDT", "ETH_USDT"]].to_numpy()[:10])
+        code = ("import sys; from tickfile import TickReader; r = TickReader(sys.argv[1]); "
+                "print(r.seq, r.frame(last_n=1)['BTC_USDT'].iloc[0])")
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        out = subprocess.run([sys.executable, "-c", code, path], cwd=root, capture_output=True, text=True, check=True)
+        assert out.stdout.split() == ["10", str(float(df["BTC_USDT"].iloc[9]))]
+
+def test_logger_tees_rows_and_load_prices_reads_tickfile(tmp_path):
+    class Stub:
+        has = {"fetchTickers": True}
+        async def fetch_tickers(self, symbols):
+            return {s: {"last": 100.0 + len(s)} for s in symbols}
+    tick = str(tmp_path / "ticks.bin")
+    asyncio.run(log_prices_async(0.01, ["BTC/USDT", "ETH/USDT"], exchange=Stub(),
+                                 csv_path=str(tmp_path / "prices.csv"), max_ticks=3, tickfile=tick, verbose=False))
+    assert TickReader(tick).seq == 3
+    df = load_prices(tick)
+    assert len(df) == 3 and (df["BTC_USDT"] == 108.0).all()
+    assert read_ticks(tick, copy=True)["ETH_USDT"].to_numpy().flags.writeable
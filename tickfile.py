@@ -0,0 +1,279 @@
+# tickfile.py
+# Memory-mapped binary tick ring buffer: the logger writes it, dashboards and
+# analysis map it and read NumPy/pandas views straight out of the page cache.
+#
+# Layout (little-endian):
+#   [0, 4096)    header: magic, version, n_cols, capacity, seq, column names (JSON)
+#   [4096, ...)  capacity fixed-size records: int64 ns timestamp + one float64 per column
+# seq counts every record ever written; record i lives in slot i % capacity, so
+# once the ring is full the oldest record is overwritten.
+#
+# One writer (enforced with an exclusive flock), any number of readers, no reader
+# locks: the writer fills the slot first and only then publishes seq + 1, and
+# readers only look at records below the seq they read. Views handed out by a
+# reader are live memory: a record stays intact until `capacity` newer records have
+# been written (see TickReader.lapped); copy whatever you keep for longer.
+
+import os
+import json
+import mmap
+import time
+import struct
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from storage import TS_COL, parse_timestamp_ns
+
+try:
+    import fcntl
+    HAS_FCNTL = True
+except ImportError:  # Windows: no single-writer check
+    HAS_FCNTL = False
+
+MAGIC = b"CMLTICK\x01"
+VERSION = 1
+HEADER_SIZE = 4096
+DEFAULT_CAPACITY = 1 << 20  # records (~24 MB for two symbols)
+_FIXED = struct.Struct("<8sIIQQI")  # magic, version, n_cols, capacity, seq, names length
+_SEQ_OFFSET = 24
+
+
+def is_tickfile(path: str) -> bool:
+    """True if path is a tick file (checks the magic bytes)."""
+    if not os.path.isfile(path):
+        return False
+    with open(path, "rb") as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+def read_header(path: str) -> dict:
+    with open(path, "rb") as f:
+        raw = f.read(HEADER_SIZE)
+    if len(raw) < _FIXED.size or raw[:len(MAGIC)] != MAGIC:
+        raise ValueError(f"{path} is not a tick file")
+    _, version, n_cols, capacity, seq, n = _FIXED.unpack_from(raw)
+    if version != VERSION:
+        raise ValueError(f"{path}: unsupported tick file version {version}")
+    columns = json.loads(raw[_FIXED.size:_FIXED.size + n].decode("utf-8"))
+    return {"columns": columns, "capacity": capacity, "seq": seq, "n_cols": n_cols}
+
+
+def _create(path: str, columns: list, capacity: int) -> None:
+    names = json.dumps(columns).encode("utf-8")
+    if _FIXED.size + len(names) > HEADER_SIZE:
+        raise ValueError(f"Too many/long column names for a {HEADER_SIZE}-byte header")
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(_FIXED.pack(MAGIC, VERSION, len(columns), capacity, 0, len(names)) + names)
+        f.truncate(HEADER_SIZE + capacity * 8 * (1 + len(columns)))  # sparse on most filesystems
+    os.replace(tmp, path)
+
+
+# --------- Writing ---------
+class TickWriter:
+    """
+    Single writer with the write/flush/close interface of price_tracker.CsvWriter
+    (rows are dicts with a 'timestamp' string/datetime and one value per column).
+    Rows are visible to readers as soon as write() returns; fsync only decides how
+    often the mapping is msync'ed to disk: "never", "batch" (every flush_rows rows
+    and on close) or "always".
+    """
+
+    FSYNC_POLICIES = ("never", "batch", "always")
+
+    def __init__(self, path: str, columns: Iterable[str], capacity: int = DEFAULT_CAPACITY,
+                 flush_rows: int = 64, fsync: str = "batch"):
+        if fsync not in self.FSYNC_POLICIES:
+            raise ValueError(f"fsync must be one of {self.FSYNC_POLICIES}, got {fsync!r}")
+        self.path = path
+        self.columns = [c for c in columns if c != TS_COL]
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            _create(path, self.columns, int(capacity))
+        header = read_header(path)
+        if header["columns"] != self.columns:
+            raise ValueError(f"Tick file {path} has columns {header['columns']}, got {self.columns}")
+        self.capacity = header["capacity"]
+        self.flush_rows = max(1, int(flush_rows))
+        self.fsync = fsync
+        self._fh = open(path, "r+b")
+        if HAS_FCNTL:
+            try:
+                fcntl.flock(self._fh.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                self._fh.close()
+                raise RuntimeError(f"{path} is already open by another writer") from None
+        self._mm = mmap.mmap(self._fh.fileno(), 0)
+        self._seq = np.ndarray((1,), dtype="<u8", buffer=self._mm, offset=_SEQ_OFFSET)
+        self._ring = np.ndarray((self.capacity, 1 + len(self.columns)), dtype="<f8",
+                                buffer=self._mm, offset=HEADER_SIZE)
+        self.seq = int(self._seq[0])
+        self._unsynced = 0
+
+    def write(self, row: dict) -> None:
+        if self._mm is None:
+            raise ValueError(f"TickWriter for {self.path} is closed")
+        slot = self._ring[self.seq % self.capacity]
+        slot[1:] = [np.nan if row.get(c) is None else float(row[c]) for c in self.columns]
+        slot[:1].view("<i8")[0] = parse_timestamp_ns(row[TS_COL])
+        self._publish(1)
+
+    def write_arrays(self, ts_ns: np.ndarray, values: np.ndarray) -> None:
+        """Append many records at once: int64 ns timestamps and an (n, n_cols) float array."""
+        ts_ns = np.asarray(ts_ns, dtype="<i8")
+        values = np.asarray(values, dtype="<f8").reshape(len(ts_ns), len(self.columns))
+        done = 0
+        while done < len(ts_ns):
+            pos = self.seq % self.capacity
+            n = min(len(ts_ns) - done, self.capacity - pos)
+            block = self._ring[pos:pos + n]
+            block[:, 1:] = values[done:done + n]
+            block[:, 0] = ts_ns[done:done + n].view("<f8")
+            self._publish(n)
+            done += n
+
+    def _publish(self, n: int) -> None:
+        self.seq += n
+        self._seq[0] = self.seq  # readers see the records only after this store
+        self._unsynced += n
+        if self.fsync == "always" or (self.fsync == "batch" and self._unsynced >= self.flush_rows):
+            self.flush()
+
+    def flush(self) -> None:
+        if self._mm is not None and self._unsynced:
+            self._mm.flush()
+            self._unsynced = 0
+
+    def close(self) -> None:
+        if self._mm is None:
+            return
+        if self.fsync != "never":
+            self.flush()
+        del self._seq, self._ring  # release the buffer exports before unmapping
+        self._mm.close()
+        self._mm = None
+        self._fh.close()  # also drops the flock
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# --------- Reading ---------
+class TickReader:
+    """
+    Read-only view of a tick file. Never blocks or locks the writer.
+    arrays()/frame() return views into the mapping (a copy only when the requested
+    range wraps around the end of the ring).
+    """
+
+    def __init__(self, path: str):
+        header = read_header(path)
+        self.path = path
+        self.columns = header["columns"]
+        self.capacity = header["capacity"]
+        self._map = np.memmap(path, dtype="u1", mode="r")
+        self._seq = self._map[_SEQ_OFFSET:_SEQ_OFFSET + 8].view("<u8")
+        width = 1 + len(self.columns)
+        body = self._map[HEADER_SIZE:HEADER_SIZE + self.capacity * width * 8]
+        self._ring = body.view("<f8").reshape(self.capacity, width)
+
+    @property
+    def seq(self) -> int:
+        """Records written so far (re-read from the shared header on every access)."""
+        return int(self._seq[0])
+
+    def __len__(self) -> int:
+        return min(self.seq, self.capacity)
+
+    def oldest(self, seq: Optional[int] = None) -> int:
+        """Sequence number of the oldest record still in the ring."""
+        seq = self.seq if seq is None else seq
+        return max(0, seq - self.capacity)
+
+    def lapped(self, start: int) -> bool:
+        """True once record `start` has been overwritten (views from before are stale)."""
+        return start < self.oldest()
+
+    def _range(self, start: int, stop: int) -> Tuple[np.ndarray, np.ndarray]:
+        lo, hi = start % self.capacity, stop % self.capacity or self.capacity
+        if stop - start <= 0:
+            rows = self._ring[:0]
+        elif lo < hi:
+            rows = self._ring[lo:hi]
+        else:
+            rows = np.concatenate([self._ring[lo:], self._ring[:hi]])
+        return rows[:, 0].view("<i8"), rows[:, 1:]
+
+    def _bounds(self, last_n: Optional[int], since: Optional[int]) -> Tuple[int, int]:
+        stop = self.seq
+        start = self.oldest(stop)
+        if since is not None:
+            start = max(start, since)
+        if last_n is not None:
+            start = max(start, stop - int(last_n))
+        return start, stop
+
+    def arrays(self, last_n: Optional[int] = None, since: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """{timestamp: datetime64[ns], column: float64} for records [since, seq), newest last_n."""
+        ts, vals = self._range(*self._bounds(last_n, since))
+        out = {TS_COL: ts.view("datetime64[ns]")}
+        for i, c in enumerate(self.columns):
+            out[c] = vals[:, i]
+        return out
+
+    def frame(self, last_n: Optional[int] = None, since: Optional[int] = None) -> pd.DataFrame:
+        """Same range as arrays() as a DataFrame (timestamp + columns) sharing the mapped memory."""
+        ts, vals = self._range(*self._bounds(last_n, since))
+        return pd.concat([
+            pd.DataFrame({TS_COL: ts.view("datetime64[ns]")}, copy=False),
+            pd.DataFrame(vals, columns=self.columns, copy=False),
+        ], axis=1, copy=False)
+
+    def tail(self, since: int) -> Tuple[pd.DataFrame, int, int]:
+        """Records written after sequence `since` -> (frame, next since, records lost to the ring)."""
+        start, stop = self._bounds(None, since)
+        return self.frame(since=start), stop, max(0, start - since)
+
+    def follow(self, since: Optional[int] = None, poll: float = 0.5,
+               timeout: Optional[float] = None) -> Iterator[pd.DataFrame]:
+        """Yield a frame of new records whenever the writer publishes some (like tail -f)."""
+        since = self.seq if since is None else since
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while deadline is None or time.monotonic() < deadline:
+            if self.seq > since:
+                df, since, lost = self.tail(since)
+                if lost:
+                    print(f"⚠️ {self.path}: reader fell behind, {lost} records overwritten")
+                yield df
+            else:
+                time.sleep(poll)
+
+    def close(self) -> None:
+        self._ring = self._seq = None
+        self._map = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_ticks(path: str, last_n: Optional[int] = None, copy: bool = False) -> pd.DataFrame:
+    """Frame of the records in a tick file; copy=True detaches it from the live ring."""
+    df = TickReader(path).frame(last_n)
+    return df.copy() if copy else df
+
+
+def write_frame(path: str, df: pd.DataFrame, capacity: int = DEFAULT_CAPACITY) -> int:
+    """Append a DataFrame (timestamp + float columns) to a tick file. Returns rows written."""
+    columns = [c for c in df.columns if c != TS_COL]
+    ts = pd.to_datetime(df[TS_COL]).to_numpy(dtype="datetime64[ns]").view("int64")
+    with TickWriter(path, columns, capacity, fsync="batch") as w:
+        w.write_arrays(ts, df[columns].to_numpy(dtype="float64"))
+    return len(df)